@@ -0,0 +1,29 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   conftest.py
+@Time    :   2026/10/19 10:02:11
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import os
+import sys
+import pytest
+
+# 测试从仓库根目录按包导入 uim_ee
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from uim_ee import InstrProfile
+
+
+@pytest.fixture(autouse=True)
+def no_profile_cache(monkeypatch):
+    # 测试不读写 ~/.uim_ee/profiles.json, 每个测试从空缓存开始
+    monkeypatch.setattr(InstrProfile, 'CACHE', None)
+    monkeypatch.setattr(InstrProfile, '_data', None)
+    InstrProfile._profiles.clear()
+    yield
+    InstrProfile._profiles.clear()
@@ -0,0 +1,223 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_asyncdrivers.py
+@Time    :   2026/10/20 16:21:37
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import asyncio
+import contextlib
+import io
+import os
+import time
+import warnings
+import pytest
+import serial
+from uim_ee import Bench
+from uim_ee import InstrProfile
+from uim_ee.AsyncDrivers import AsyncDL3000, AsyncDP800, AsyncKEYSIGHT_344X, AsyncSDS2504X, AsyncUSB2IIC, AsyncZCTB_400L
+from uim_ee.AsyncInstr import AsyncInstrument, AsyncSerial
+from uim_ee.ElecLoad import DL3000
+from uim_ee.InstrSim import I2cControllerSim, I2cSlaveSim, Latency, ScpiServer, SerialSim, SimDevice, ThermalPlant, \
+    attach, make
+from uim_ee.MultiMeter import KEYSIGHT_344X
+from uim_ee.OilSink import ZCTB_400L
+from uim_ee.Osc import SDS2504X
+from uim_ee.PwrSupply import DP800
+
+posix = pytest.mark.skipif(os.name != 'posix', reason='pseudo terminals are POSIX only')
+
+
+def _run_all(obj, cls):
+    # Bench 中的全部方法与参数, 依次调用
+    out = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, args in Bench.methods(cls):
+            if args is not None:
+                out.append((name, getattr(obj, name)(*args)))
+    return out
+
+
+async def _run_all_async(obj, cls):
+    out = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for name, args in Bench.methods(cls):
+            if args is not None:
+                out.append((name, await getattr(obj, name)(*args)))
+    return out
+
+
+def _new_process():
+    # 异步驱动像在另一个进程中一样, 重新查询 *IDN? / *OPT?
+    InstrProfile._data = None
+    InstrProfile._profiles.clear()
+
+
+@pytest.mark.parametrize('sync_cls, async_cls, protocol', [
+    (DP800, AsyncDP800, 'socket'),
+    (DL3000, AsyncDL3000, 'socket'),
+    (KEYSIGHT_344X, AsyncKEYSIGHT_344X, 'hislip'),
+    (SDS2504X, AsyncSDS2504X, 'socket'),
+    (DP800, AsyncDP800, 'vxi11'),
+])
+def test_lan_driver_sends_the_same_commands(sync_cls, async_cls, protocol):
+    sync_device = make(sync_cls.__name__)
+    _run_all(attach(sync_cls('sim-%s' % protocol), sync_device), sync_cls)
+    _new_process()
+    server = ScpiServer(make(sync_cls.__name__), protocol)
+
+    async def main():
+        async with await async_cls.open(server.address, portmapper=server.port) as obj:
+            return await _run_all_async(obj, sync_cls)
+    try:
+        asyncio.run(main())
+    finally:
+        server.close()
+    assert server.device.log == sync_device.log
+    assert sync_device.log
+
+
+@posix
+def test_serial_driver_sends_the_same_commands():
+    sync_sim = SerialSim(make('ZCTB_400L', plant=ThermalPlant(noise=0.0, seed=0)))
+    async_sim = SerialSim(make('ZCTB_400L', plant=ThermalPlant(noise=0.0, seed=0)))
+    try:
+        _run_all(ZCTB_400L(sync_sim.port), ZCTB_400L)
+
+        async def main():
+            async with await AsyncZCTB_400L.open(async_sim.port) as obj:
+                return await _run_all_async(obj, ZCTB_400L)
+        asyncio.run(main())
+    finally:
+        sync_sim.close()
+        async_sim.close()
+    assert async_sim.device.log == sync_sim.device.log
+    assert async_sim.device.log
+
+
+def test_drivers_overlap_without_threads():
+    servers = [ScpiServer(make('DP800', Latency(0.1))) for _ in range(4)]
+
+    async def main():
+        psus = [await AsyncDP800.open(s.address) for s in servers]
+        t0 = time.perf_counter()
+        volts = await asyncio.gather(*[p.voltRead(1) for p in psus])
+        elapsed = time.perf_counter() - t0
+        for p in psus:
+            await p.close()
+        return volts, elapsed
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            volts, elapsed = asyncio.run(main())
+    finally:
+        for s in servers:
+            s.close()
+    assert len(volts) == 4
+    assert elapsed < 0.3
+
+
+def test_calls_on_one_instrument_do_not_interleave():
+    server = ScpiServer(make('SDS2504X'))
+
+    async def main():
+        osc = await AsyncSDS2504X.open(server.address)
+        with contextlib.redirect_stdout(io.StringIO()):
+            w1, w2 = await asyncio.gather(osc.getWaveform(1), osc.getWaveform(2))
+        await osc.close()
+        return w1, w2
+    try:
+        w1, w2 = asyncio.run(main())
+    finally:
+        server.close()
+    sources = [c for c in server.device.log if c.startswith(':WAV:SOUR')]
+    assert sources == [':WAV:SOUR C1', ':WAV:SOUR C2']
+    first = server.device.log.index(':WAV:SOUR C2')
+    assert ':WAV:DATA?' in server.device.log[:first]
+    assert len(w1) == len(w2) > 0
+
+
+def test_batch_joins_writes():
+    server = ScpiServer(make('DP800'))
+
+    async def main():
+        async with await AsyncDP800.open(server.address) as psu:
+            async with psu.batch():
+                await psu.outputOn(1)
+                await psu.voltSet(1, 3.3)
+            await psu.getIDN()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            asyncio.run(main())
+    finally:
+        server.close()
+    assert server.device.messages == 2
+    assert server.device.log == [':OUTP CH1,ON', ':APPL CH1,3.3', '*IDN?']
+
+
+def test_statistics_async():
+    server = ScpiServer(make('KEYSIGHT_344X'))
+
+    async def main():
+        async with await AsyncKEYSIGHT_344X.open(server.address) as dmm:
+            return await dmm.statistics(100, conf=None)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = asyncio.run(main())
+    finally:
+        server.close()
+    assert stats.count == 100
+    assert stats.min <= stats.mean <= stats.max
+
+
+@posix
+def test_async_serial_partial_reply_times_out():
+    device = SimDevice('echo', dialogues={'A?': 'half'})
+    sim = SerialSim(device, eol=b'')
+
+    async def main():
+        link = AsyncSerial(serial.Serial(sim.port, 9600, timeout=0), timeout=0.2)
+        try:
+            t0 = time.perf_counter()
+            with pytest.raises(serial.SerialTimeoutException, match='half'):
+                await link.query('A?')
+            return time.perf_counter() - t0
+        finally:
+            await link.close()
+    try:
+        assert 0.15 < asyncio.run(main()) < 1.0
+    finally:
+        sim.close()
+
+
+def test_threaded_i2c_driver():
+    slave = I2cSlaveSim()
+    slave.regs[0x10] = 0x55
+
+    async def main():
+        iic = await AsyncUSB2IIC.open('ftdi://sim/1', 0x5C, controller=I2cControllerSim({0x2E: slave}))
+        return await iic.readBytes(0x10)
+    with contextlib.redirect_stdout(io.StringIO()):
+        assert asyncio.run(main()) == 0x55
+
+
+def test_property_is_awaitable_once():
+    class Driver():
+        reads = 0
+
+        @property
+        def dev_info(self):
+            Driver.reads += 1
+            return 'ID'
+
+    async def main():
+        instrument = AsyncInstrument(Driver())
+        instrument.dev_info         # 不 await 时不读取, 也不产生未等待协程的警告
+        return await instrument.dev_info
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        assert asyncio.run(main()) == 'ID'
+    assert Driver.reads == 1
@@ -0,0 +1,22 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_discovery.py
+@Time    :   2026/10/19 10:33:48
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+from uim_ee import Discovery
+
+
+def test_offline_pc_still_probes_other_sources(monkeypatch):
+    def unreachable(prefix=24):
+        raise OSError('Network is unreachable')
+    probed = []
+    monkeypatch.setattr(Discovery, 'local_subnet', unreachable)
+    monkeypatch.setattr(Discovery, 'probe_serial', lambda port, timeout: probed.append(port))
+    assert Discovery.discover(visa=False, ports=['/dev/ttyUSB0'], cache=None) == []
+    assert probed == ['/dev/ttyUSB0']
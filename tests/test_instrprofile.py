@@ -0,0 +1,78 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_instrprofile.py
+@Time    :   2026/10/20 09:12:44
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import json
+from uim_ee import InstrProfile
+
+DMM_A = 'Keysight Technologies,34465A,MY00000001,A.03.01'
+DMM_B = 'Keysight Technologies,34465A,MY00000002,A.03.01'
+
+
+class _Instrument():
+    def __init__(self, idn, opt='MEM') -> None:
+        self.replies = {'*IDN?': idn, '*OPT?': opt}
+        self.asked = []
+
+    def ask(self, command):
+        self.asked.append(command)
+        return self.replies[command]
+
+
+def _new_process():
+    # 模拟重新启动: 内存中的缓存清空, 只剩缓存文件
+    InstrProfile._data = None
+    InstrProfile._profiles.clear()
+
+
+def test_idn_asked_once_per_address(monkeypatch, tmp_path):
+    monkeypatch.setattr(InstrProfile, 'CACHE', str(tmp_path / 'profiles.json'))
+    dmm = _Instrument(DMM_A)
+    p = InstrProfile.profile('10.0.0.5', dmm.ask)
+    assert InstrProfile.profile('10.0.0.5', dmm.ask) is p
+    assert dmm.asked == ['*IDN?', '*OPT?']
+    assert p.get('reading_memory') == 2000000
+
+
+def test_cache_file_keyed_by_serial(monkeypatch, tmp_path):
+    cache = tmp_path / 'profiles.json'
+    monkeypatch.setattr(InstrProfile, 'CACHE', str(cache))
+    p = InstrProfile.profile('10.0.0.5', _Instrument(DMM_A).ask)
+    InstrProfile.learn(p, 'onboard_stats', False)
+    data = json.loads(cache.read_text(encoding='utf-8'))
+    assert list(data['instruments']) == [p.key] and 'addresses' not in data
+
+    # 重启后同一台仪器: 只确认 *IDN?, 选件与学到的能力来自缓存文件
+    _new_process()
+    dmm = _Instrument(DMM_A)
+    p = InstrProfile.profile('10.0.0.5', dmm.ask)
+    assert dmm.asked == ['*IDN?']
+    assert p.options == ('MEM',) and p.get('onboard_stats') is False
+
+
+def test_address_reassigned(monkeypatch, tmp_path):
+    monkeypatch.setattr(InstrProfile, 'CACHE', str(tmp_path / 'profiles.json'))
+    InstrProfile.profile('10.0.0.5', _Instrument(DMM_A).ask)
+
+    # DHCP 把地址分给了另一台同型号仪器 (无 MEM 选件)
+    _new_process()
+    other = _Instrument(DMM_B, opt='0')
+    p = InstrProfile.profile('10.0.0.5', other.ask)
+    assert p.serial == 'MY00000002' and other.asked == ['*IDN?', '*OPT?']
+    assert p.options == () and p.get('reading_memory') == 50000
+
+
+def test_firmware_update_queries_options(monkeypatch, tmp_path):
+    monkeypatch.setattr(InstrProfile, 'CACHE', str(tmp_path / 'profiles.json'))
+    InstrProfile.profile('10.0.0.5', _Instrument(DMM_A).ask)
+    _new_process()
+    dmm = _Instrument(DMM_A.replace('A.03.01', 'A.03.02'))
+    assert InstrProfile.profile('10.0.0.5', dmm.ask).firmware == 'A.03.02'
+    assert dmm.asked == ['*IDN?', '*OPT?']
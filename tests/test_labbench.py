@@ -0,0 +1,74 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_labbench.py
+@Time    :   2026/10/19 10:18:44
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import sys
+import time
+import types
+import pytest
+from uim_ee.LabBench import LabBench
+
+
+class _Slow():
+    delay = 0.3
+
+    def __init__(self, address=None) -> None:
+        time.sleep(self.delay)
+        self.address = address
+
+
+class _Broken():
+    def __init__(self, address=None) -> None:
+        raise ConnectionRefusedError(address)
+
+
+@pytest.fixture(autouse=True)
+def drivers(monkeypatch):
+    module = types.ModuleType('bench_drivers')
+    module.Slow, module.Broken = _Slow, _Broken
+    monkeypatch.setitem(sys.modules, 'bench_drivers', module)
+
+
+def test_parallel_bring_up():
+    bench = LabBench({'instruments': {r: {'driver': 'bench_drivers.Slow', 'address': r} for r in 'abc'}})
+    t0 = time.perf_counter()
+    bench.connect()
+    assert time.perf_counter() - t0 < 0.3 * 2
+    assert bench.b.address == 'b'
+
+
+def test_late_connection_picked_up_after_timeout():
+    bench = LabBench({'instruments': {'psu': {'driver': 'bench_drivers.Slow', 'timeout': 0.05}}})
+    errors = bench.connect(raise_errors=False)
+    assert isinstance(errors['psu'], TimeoutError)
+    assert bench.stations['psu'].error is None
+    time.sleep(0.4)
+    assert bench.timings()['psu']['status'] == 'ok'
+    assert isinstance(bench.psu, _Slow)
+
+
+def test_driver_error_raised_on_access():
+    bench = LabBench({'instruments': {'eload': {'driver': 'bench_drivers.Broken', 'address': 'x'}}})
+    with pytest.raises(ConnectionError):
+        bench.connect()
+    with pytest.raises(ConnectionRefusedError):
+        bench.eload
+
+
+def test_lazy_station_connects_on_first_use():
+    bench = LabBench({'lazy': True, 'instruments': {'dmm': {'driver': 'bench_drivers.Slow'}}})
+    bench.connect()
+    assert bench.timings()['dmm']['status'] == 'lazy'
+    assert isinstance(bench.dmm, _Slow)
+
+
+def test_unknown_keys_rejected():
+    with pytest.raises(ValueError):
+        LabBench({'instruments': {'x': {'driver': 'DP800', 'adress': '1.2.3.4'}}})
@@ -0,0 +1,92 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_lantransport.py
+@Time    :   2026/10/19 10:15:20
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import re
+import pytest
+from uim_ee.BinBlock import make_block, parse_block
+from uim_ee.InstrSim import ScpiServer, SimDevice
+from uim_ee.LanTransport import HiSLIP, ScpiSocket, frame_end, parse_address
+
+
+@pytest.mark.parametrize('buf, end', [
+    (b'1.0\n', 4),
+    (b'#15ab\ncd\n', 9),            # 数据块中的结束符
+    (b'#15ab', None),
+    (b'"#1a"\n', 6),                # 引号内的 '#'
+    (b'"a\nb"\n', 3),               # 引号只在结束符之前配对
+    (b'CH#1A,2\n', 8),              # 长度不是十进制数
+    (b'#0abc\n', 6),
+    (b'say "hi\n', 8),              # 单个引号
+    (b'', None),
+])
+def test_frame_end(buf, end):
+    assert frame_end(buf)[0] == end
+
+
+def test_frame_end_resumes_inside_block():
+    end, pos = frame_end(b'#210abc')
+    assert end is None
+    assert frame_end(b'#210abcdefghij\n', pos) == (15, 15)
+
+
+@pytest.mark.parametrize('address, parsed', [
+    ('192.168.12.119', ('vxi11', '192.168.12.119', 'inst0')),
+    ('TCPIP0::10.0.0.1::gpib0,5::INSTR', ('vxi11', '10.0.0.1', 'gpib0,5')),
+    ('TCPIP0::10.0.0.1::5025::SOCKET', ('socket', '10.0.0.1', 5025)),
+    ('TCPIP0::10.0.0.1::hislip0::INSTR', ('hislip', '10.0.0.1', 'hislip0')),
+])
+def test_parse_address(address, parsed):
+    assert parse_address(address) == parsed
+
+
+def test_parse_address_transport():
+    assert parse_address('10.0.0.1:5026', 'socket') == ('socket', '10.0.0.1', 5026)
+    with pytest.raises(ValueError):
+        parse_address('10.0.0.1', 'usb')
+
+
+BLOB = bytes(range(256)) * 40        # 含 \n 与 #
+
+
+@pytest.fixture(params=['socket', 'hislip'])
+def server(request):
+    device = SimDevice('blob', dialogues={'*IDN?': 'UIM,SIM,0,1'},
+                       handlers=[(r'DATA\?', lambda dev, m: make_block(BLOB))])
+    server = ScpiServer(device, request.param)
+    yield server
+    server.close()
+
+
+def _open(server):
+    transport, host, where = parse_address(server.address)
+    if transport == 'socket':
+        return ScpiSocket(host, where, timeout=2.0)
+    sub_address, _, port = where.partition(',')
+    return HiSLIP(host, sub_address, int(port), timeout=2.0)
+
+
+def test_query_and_binary_block(server):
+    with _open(server) as inst:
+        assert inst.ask('*IDN?') == 'UIM,SIM,0,1'
+        assert parse_block(inst.ask_raw(b'DATA?')) == BLOB
+        inst.write('VOLT 1.5')
+        assert inst.ask('VOLT?') == '1.5'
+
+
+def test_hislip_message_split_at_max_size():
+    device = SimDevice('echo', handlers=[(r'ECHO (.*)', lambda dev, m: m.group(1))])
+    server = ScpiServer(device, 'hislip')
+    try:
+        with _open(server) as inst:
+            inst.max_message = 7        # 分成多个 Data 消息
+            assert inst.ask('ECHO ' + 'x' * 30) == 'x' * 30
+    finally:
+        server.close()
@@ -0,0 +1,65 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_linkpool.py
+@Time    :   2026/10/19 10:21:09
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import pytest
+from uim_ee.LinkPool import LinkPool, host_of
+
+
+def test_host_of():
+    assert host_of('IP:192.168.12.50') == '192.168.12.50'
+    assert host_of('TCPIP0::192.168.12.50::inst0::INSTR') == '192.168.12.50'
+
+
+def test_vxi11_link_per_device():
+    pool = LinkPool(idle=0)
+    a = pool.vxi11('TCPIP0::10.0.0.1::gpib0,5::INSTR')
+    b = pool.vxi11('TCPIP0::10.0.0.1::gpib0,7::INSTR')
+    assert a is not b
+    assert a.link_lock is b.link_lock       # 同一主机共用锁
+    assert pool.vxi11('10.0.0.1') is pool.lan('TCPIP0::10.0.0.1::inst0::INSTR')
+
+
+class _Conn():
+    def __init__(self, opened) -> None:
+        self.fail = not opened
+        self.sent = []
+        opened.append(self)
+
+    def ask(self, message):
+        self.sent.append(message)
+        if self.fail:
+            raise ConnectionResetError('reset')
+        return message
+
+    def close(self):
+        pass
+
+
+def test_broken_link_reconnects_without_resending():
+    opened = []
+    pool = LinkPool(idle=0)
+    link = pool.get(('test', 'h'), 'h', lambda: _Conn(opened))
+    link.timeout = 3
+    with pytest.raises(ConnectionResetError):
+        link.ask('INIT')
+    assert len(opened) == 1 and link.reconnects == 1 and not link.connected
+    assert link.ask('*IDN?') == '*IDN?'
+    assert len(opened) == 2
+    assert [c.sent for c in opened] == [['INIT'], ['*IDN?']]    # INIT 没有被重发
+    assert opened[1].timeout == 3           # 设置应用到重连后的连接
+
+
+def test_idempotent_call_is_resent():
+    opened = []
+    pool = LinkPool(idle=0)
+    link = pool.get(('test', 'h'), 'h', lambda: _Conn(opened))
+    assert link.idempotent('ask', 'MEAS:VOLT?') == 'MEAS:VOLT?'
+    assert len(opened) == 2 and link.reconnects == 1
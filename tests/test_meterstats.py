@@ -0,0 +1,58 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_meterstats.py
+@Time    :   2026/10/19 10:27:30
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import re
+import numpy as np
+from uim_ee import InstrProfile
+from uim_ee.InstrSim import SimDevice, _dmm, attach
+from uim_ee.MeterStats import host_stats, parse_stats
+from uim_ee.MultiMeter import KEYSIGHT_344X
+
+IDN = 'Keysight Technologies,34460X,MY00000009,A.03.01'
+
+
+def _meter(stats=True):
+    device = SimDevice('KEYSIGHT_344X', **_dmm(IDN, binary=True, stats=stats))
+    dmm = attach(KEYSIGHT_344X('sim-stats'), device)
+    dmm.session.timeout = 0.01          # 不支持的查询没有应答
+    return dmm, device
+
+
+def test_onboard_matches_host():
+    dmm, device = _meter()
+    s = dmm.statistics(200, bins=10)
+    assert s.source == 'meter'
+    h = host_stats(device.state['readings'], 10)
+    assert np.isclose(s.mean, h.mean) and np.isclose(s.sdev, h.sdev)
+    assert s.hist.sum() == 200
+
+
+def test_undefined_header_learned_for_model():
+    dmm, _ = _meter(stats=False)
+    assert dmm.statistics(50).source == 'host'
+    assert dmm.profile.get('onboard_stats') is False
+    assert InstrProfile._store()['models'][dmm.profile.model_key] == {'onboard_stats': False}
+
+
+def test_transient_failure_not_learned():
+    dmm, device = _meter()
+    device.handlers.insert(0, (re.compile(r'CALC:AVER:ALL\?', re.I), lambda dev, m: 'garbage'))
+    assert dmm.statistics(50).source == 'host'
+    assert 'onboard_stats' not in dmm.profile.learned
+    assert dmm.onboard_stats
+
+
+def test_parse_stats_short_reply():
+    try:
+        parse_stats('1,2', 10)
+    except ValueError:
+        return
+    raise AssertionError('short reply accepted')
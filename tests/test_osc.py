@@ -0,0 +1,43 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_osc.py
+@Time    :   2026/10/19 10:30:12
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import re
+import pytest
+from uim_ee.BinBlock import make_block
+from uim_ee.InstrSim import attach, make
+from uim_ee.Osc import SDS2504X
+
+
+def _osc(maxp):
+    device = make('SDS2504X')
+    device.dialogues['WAV:MAXP?'] = str(maxp)
+    return attach(SDS2504X('sim-osc'), device), device
+
+
+def test_waveform_read_in_segments():
+    osc, device = _osc(300000)
+    wave = osc.getWaveform(1)
+    assert len(wave.codes) == 1000000
+    assert sum(1 for c in device.log if c.lstrip(':').upper().startswith('WAV:DATA')) == 4
+
+
+def test_short_segment_raises():
+    osc, device = _osc(300000)
+    device.handlers.insert(0, (re.compile(r'WAV:DATA\?', re.I), lambda dev, m: make_block(b'\x01' * 10)))
+    with pytest.raises(IOError):
+        osc.getWaveform(1)
+
+
+def test_pava_not_in_model_list_is_sent():
+    osc, device = _osc(300000)
+    assert isinstance(osc.getValuePACU('RISE10T90', 1), float)
+    assert isinstance(osc.getValuePACU('XNEW', 2), float)      # 表中没有, 仍然发送
+    assert sum(1 for c in device.log if 'PAVA?' in c.upper()) == 2
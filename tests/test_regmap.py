@@ -0,0 +1,60 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_regmap.py
+@Time    :   2026/10/19 10:05:37
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+from uim_ee.InstrSim import I2cSlaveSim, usb2iic
+from uim_ee.RegMap import RegMap
+
+
+def _regmap(**kwargs):
+    reads = []
+    slave = I2cSlaveSim(on_read=lambda addr: reads.append(addr) or 0x80, volatile=kwargs.get('volatile', ()))
+    return RegMap(usb2iic(slave=slave), **kwargs), slave, reads
+
+
+def test_flush_merges_runs_across_known_gap():
+    regs, slave, _ = _regmap()
+    regs.read(0x12)                 # 块读取后 0x10..0x1F 已知
+    slave.reset_stats()
+    with regs:
+        regs.setBits('0x10[7:6]', 2)
+        regs.setBits('0x11[3:0]', 5)
+        regs.setBits('0x13[0:0]', 1)
+    assert slave.transactions == 1
+    assert list(slave.regs[0x10:0x14]) == [0x80, 0x05, 0x00, 0x01]
+
+
+def test_flush_does_not_fill_volatile_gap():
+    regs, slave, _ = _regmap(volatile=[0x12])
+    with regs:
+        regs.write(0x11, 1)
+        regs.write(0x13, 3)
+    assert regs.runs() == []
+    assert slave.transactions == 2
+
+
+def test_block_read_stops_short_of_volatile():
+    regs, slave, reads = _regmap(volatile=[0x03, 0x0A])
+    regs.read(0x05)
+    regs.read(0x01)
+    regs.read(0x0C)
+    assert reads == []              # 读清寄存器未被顺带读取
+    assert regs.values[0x03] is None and regs.values[0x0A] is None
+    assert regs.read(0x03) == 0x80
+    assert reads == [0x03]
+
+
+def test_shadowed_register_read_once():
+    regs, slave, _ = _regmap()
+    regs.getBits('0x20[3:0]')
+    slave.reset_stats()
+    regs.getBits('0x21[7:4]')
+    regs.getBits('0x20[3:0]')
+    assert slave.transactions == 0
@@ -0,0 +1,70 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_replay.py
+@Time    :   2026/10/19 10:24:51
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import pytest
+from uim_ee import Replay
+from uim_ee.InstrSim import ScpiServer, make
+from uim_ee.PwrSupply import DP800
+
+
+@pytest.fixture
+def recording(tmp_path):
+    server = ScpiServer(make('DP800'), 'socket')
+    path = str(tmp_path / 'psu.rec.gz')
+    with Replay.Recorder(path):
+        psu = DP800(server.address)
+        psu.voltSet(1, 3.3)
+        psu.outputOn(1)
+        reading = psu.voltRead(1)
+    server.close()          # 回放时没有仪器
+    return path, server.address, reading
+
+
+def test_replay_without_instrument(recording):
+    path, address, reading = recording
+    with Replay.Replayer(path) as rp:
+        psu = DP800(address)
+        psu.voltSet(1, 3.3)
+        psu.outputOn(1)
+        assert psu.voltRead(1) == reading
+    assert rp.unused() == []
+    assert Replay.compare(path, rp.recording) == []
+
+
+def test_strict_replay_reports_first_difference(recording):
+    path, address, _ = recording
+    with pytest.raises(Replay.ReplayMismatch, match='APPL CH1,3.3'):
+        with Replay.Replayer(path):
+            psu = DP800(address)
+            psu.voltSet(1, 3.4)
+
+
+def test_lenient_replay_and_batched_compare(recording):
+    path, address, reading = recording
+    with Replay.Replayer(path, strict=False) as rp:
+        psu = DP800(address)
+        psu.session.write(':appl CH1,3.3;:OUTP CH1,ON')
+        assert psu.voltRead(1) == reading
+    assert len(rp.extra) == 1
+    assert Replay.compare(path, rp.recording) == []
+
+
+def test_command_stream_dedupe():
+    rec = Replay.Recording()
+    for command in ('VOLT 1', 'VOLT 1', '*RST', 'VOLT 1'):
+        rec.add('lan:x', 'write', (command,), {}, 0.0, 0.0)
+    stream = [c for ch, c in Replay.command_stream(rec.events, dedupe=True)]
+    assert stream == ['VOLT 1', '*RST', 'VOLT 1']
+
+
+def test_encode_round_trip():
+    value = [b'\x00#\n', (1, 2.5), {'a': None}, 'text']
+    assert Replay.decode(Replay.encode(value)) == value
@@ -0,0 +1,50 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_scpibatch.py
+@Time    :   2026/10/19 10:08:02
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+from uim_ee.ScpiBatch import ScpiBatch
+
+
+def test_commands_joined_from_root():
+    sent = []
+    batch = ScpiBatch(sent.append)
+    batch.add('SOUR:VOLT 1')
+    batch.add(':OUTP ON')
+    batch.add('*OPC')
+    assert batch.flush() == 1
+    assert sent == [':SOUR:VOLT 1;:OUTP ON;*OPC']
+    assert len(batch) == 0
+
+
+def test_single_command_sent_unchanged():
+    sent = []
+    batch = ScpiBatch(sent.append)
+    batch.add('SOUR:VOLT 1')
+    batch.flush()
+    assert sent == ['SOUR:VOLT 1']
+
+
+def test_bswv_parameters_merged_last_wins():
+    sent = []
+    batch = ScpiBatch(sent.append)
+    batch.add('C1:BSWV WVTP,SINE,FRQ,1000')
+    batch.add('C1:BSWV FRQ,2000,AMP,1')
+    batch.add('C2:BSWV AMP,2')
+    batch.flush()
+    assert sent == [':C1:BSWV WVTP,SINE,FRQ,2000,AMP,1;:C2:BSWV AMP,2']
+
+
+def test_messages_respect_max_len():
+    batch = ScpiBatch(None, max_len=20)
+    for i in range(4):
+        batch.add('VOLT %d' % i)
+    msgs = batch.messages()
+    assert all(len(m) <= 20 for m in msgs)
+    assert ';'.join(msgs).replace(':', '') == 'VOLT 0;VOLT 1;VOLT 2;VOLT 3'
@@ -0,0 +1,74 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_seriallink.py
+@Time    :   2026/10/20 10:48:02
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import os
+import time
+import pytest
+import serial
+from uim_ee.InstrSim import SerialSim, SimDevice
+from uim_ee.SerialLink import SerialLink
+
+
+class _Port():
+    """serial.Serial stand-in: read_until returns what arrived before the timeout"""
+
+    def __init__(self, incoming=b'') -> None:
+        self.port = '/dev/ttyFAKE'
+        self.timeout = None
+        self.incoming = incoming
+        self.written = []
+
+    def write(self, data):
+        self.written.append(data)
+
+    def reset_input_buffer(self):
+        self.incoming = b''
+
+    def read_until(self, term):
+        line, sep, rest = self.incoming.partition(term)
+        self.incoming = rest
+        return line + sep
+
+
+def test_partial_line_raises():
+    port = _Port()
+    link = SerialLink(port, timeout=0.2)
+    port.reset_input_buffer = lambda: None
+    port.incoming = b'+1.2345E'         # 截止时间前只到了半行
+    with pytest.raises(serial.SerialTimeoutException) as info:
+        link.query('MEAS?')
+    assert "b'+1.2345E'" in str(info.value)
+    assert port.timeout == 0.2 and port.written == [b'MEAS?\r\n']
+
+
+def test_stale_reply_discarded():
+    port = _Port(b'OLD\r\n')
+    link = SerialLink(port)
+    port.write = lambda data: setattr(port, 'incoming', b'NEW\r\n')
+    assert link.query('VOLT?') == 'NEW'
+
+
+@pytest.mark.skipif(os.name != 'posix', reason='SerialSim needs a pseudo terminal')
+def test_query_over_pty():
+    # 应答自带结束符, MEAS? 的应答不完整
+    device = SimDevice('serial', dialogues={'*IDN?': 'UIM,SERIAL,1,1.0\r\n', 'MEAS?': '+1.23E'})
+    sim = SerialSim(device, eol=b'')
+    try:
+        link = SerialLink(serial.Serial(sim.port, 9600, timeout=1), timeout=0.5)
+        t0 = time.perf_counter()
+        assert link.query('*IDN?') == 'UIM,SERIAL,1,1.0'
+        assert time.perf_counter() - t0 < 0.3        # 不等待固定延时
+        with pytest.raises(serial.SerialTimeoutException) as info:
+            link.query('MEAS?', timeout=0.05)
+        assert "b'+1.23E'" in str(info.value)
+        link.session.close()
+    finally:
+        sim.close()
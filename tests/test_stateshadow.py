@@ -0,0 +1,70 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_stateshadow.py
+@Time    :   2026/10/19 10:11:45
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import pytest
+from uim_ee.InstrSim import attach
+from uim_ee.PwrSupply import DP800
+from uim_ee.StateShadow import StateShadow
+
+
+def test_write_skips_known_value():
+    sent = []
+    shadow = StateShadow()
+    assert shadow.write(sent.append, 'VOLT 1', 'VOLT', '1')
+    assert not shadow.write(sent.append, 'VOLT 1', 'VOLT', '1')
+    assert shadow.write(sent.append, 'VOLT 2', 'VOLT', '2')
+    assert sent == ['VOLT 1', 'VOLT 2']
+
+
+def test_write_several_keys():
+    sent = []
+    shadow = StateShadow()
+    shadow.write(sent.append, 'APPL 1,2', ['V', 'I'], ['1', '2'])
+    assert not shadow.write(sent.append, 'APPL 1,2', ['V', 'I'], ['1', '2'])
+    shadow.write(sent.append, 'APPL 1,3', ['V', 'I'], ['1', '3'])
+    assert sent == ['APPL 1,2', 'APPL 1,3']
+    assert shadow.get('I') == '3'
+
+
+def test_failed_write_forgets_everything():
+    shadow = StateShadow()
+    shadow.set('A', 1)
+
+    def fail(command):
+        raise IOError('lost')
+    with pytest.raises(IOError):
+        shadow.write(fail, 'B 2', 'B', 2)
+    assert shadow.get('A') is None
+
+
+def test_disabled_shadow_always_sends():
+    sent = []
+    shadow = StateShadow()
+    shadow.enabled = False
+    shadow.write(sent.append, 'X 1', 'X', 1)
+    shadow.write(sent.append, 'X 1', 'X', 1)
+    assert len(sent) == 2
+
+
+def test_dp800_setpoint_format_same_cached_or_read():
+    psu = attach(DP800('sim-shadow'))
+    psu.voltage_cuurent_Set(1, 3.3, 0.5)
+    cached = psu.voltSetGet(1), psu.currentSetGet(1)
+    psu.shadow.invalidate()
+    assert (psu.voltSetGet(1), psu.currentSetGet(1)) == cached == ('3.300', '0.500')
+
+
+def test_dp800_repeated_setpoint_not_resent():
+    psu = attach(DP800('sim-repeat'))
+    psu.voltSet(1, 3.3)
+    n = psu.session.device.messages
+    psu.voltSet(1, '3.30')
+    assert psu.session.device.messages == n
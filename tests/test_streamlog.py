@@ -0,0 +1,103 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_streamlog.py
+@Time    :   2026/10/20 14:08:13
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import os
+import threading
+import numpy as np
+import pytest
+from uim_ee.StreamLog import StreamLog
+
+
+def _fill(path, rows, start=0, **kw):
+    with StreamLog(path, {'v': 'f8', 'n': 'i4'}, **kw) as log:
+        for i in range(start, start + rows):
+            log.append(i * 0.5, i, t=1000.0 + i)
+    return log.rows
+
+
+def test_round_trip_across_chunks(tmp_path):
+    path = str(tmp_path / 'run')
+    assert _fill(path, 100, chunk=16, chunks=2) == 100
+    for mmap in (True, False):
+        data = StreamLog.load(path, mmap=mmap)
+        assert list(data['n']) == list(range(100)) and data['n'].dtype == np.int32
+        assert np.allclose(data['v'], np.arange(100) * 0.5)
+    # 再次打开时追加
+    assert _fill(path, 10, start=100, chunk=16) == 110
+    assert list(StreamLog.load(path)['n'][-3:]) == [107, 108, 109]
+
+
+def test_torn_rows_cut_on_reopen(tmp_path):
+    path = str(tmp_path / 'run')
+    _fill(path, 10)
+    # 崩溃: 一列多写了整行, 另一列只写了半行
+    with open(os.path.join(path, 't.bin'), 'ab') as f:
+        f.write(np.float64(2000.0).tobytes())
+    with open(os.path.join(path, 'v.bin'), 'ab') as f:
+        f.write(b'\x00' * 5)
+    with StreamLog(path, {'v': 'f8', 'n': 'i4'}) as log:
+        assert log.rows == 10
+        assert os.path.getsize(os.path.join(path, 't.bin')) == 80
+        assert os.path.getsize(os.path.join(path, 'v.bin')) == 80
+        log.append(5.0, 10, t=1010.0)
+    data = StreamLog.load(path)
+    assert list(data['n']) == list(range(11)) and data['t'][-1] == 1010.0
+
+
+def test_between_with_torn_index(tmp_path):
+    path = str(tmp_path / 'run')
+    _fill(path, 50, chunk=8)
+    with open(os.path.join(path, 'index.jsonl'), 'a', encoding='utf-8') as f:
+        f.write('{"row": 50, "n"')          # 写了一半的索引行
+    with open(os.path.join(path, 'n.bin'), 'ab') as f:
+        f.write(np.arange(50, 53, dtype=np.int32).tobytes())
+    for name, value in (('t', 1050.0), ('v', 25.0)):
+        with open(os.path.join(path, name + '.bin'), 'ab') as f:
+            f.write(np.arange(value, value + 3, dtype=np.float64).tobytes())
+    part = StreamLog.between(path, 1010.0, 1020.0)
+    assert list(part['n']) == list(range(10, 20))
+    # 数据已落盘但没有索引的行也能找到
+    assert list(StreamLog.between(path, 1049.0, 1060.0)['n']) == [49, 50, 51, 52]
+
+
+def test_column_mismatch(tmp_path):
+    path = str(tmp_path / 'run')
+    _fill(path, 1)
+    with pytest.raises(ValueError):
+        StreamLog(path, ['other'])
+
+
+def test_drop_when_writer_stalls(tmp_path):
+    gate = threading.Event()
+    log = StreamLog(str(tmp_path / 'run'), ['v'], chunk=4, chunks=2, block=False, interval=60)
+    write = log._write
+
+    def stalled(*args):
+        gate.wait()
+        write(*args)
+    log._write = stalled
+    kept = sum(log.append(float(i)) for i in range(20))
+    assert log.dropped == 20 - kept and kept <= 12
+    gate.set()
+    log.close()
+    assert len(StreamLog.load(log.path)['v']) == kept == log.rows
+
+
+def test_poll_tuple_columns(tmp_path):
+    values = iter(range(100))
+    with StreamLog(str(tmp_path / 'run'), ['v', 'i', 'p']) as log:
+        n = log.poll({('v', 'i'): (lambda: next(values), lambda x: (x, -x)), 'p': lambda: '1.5'},
+                     period=0.0, count=5)
+        log.flush()
+        assert n == 5 and log.rows == 5
+    data = StreamLog.load(log.path)
+    assert list(data['v']) == [0, 1, 2, 3, 4] and list(data['i']) == [0, -1, -2, -3, -4]
+    assert np.all(data['p'] == 1.5)
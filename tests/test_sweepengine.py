@@ -0,0 +1,89 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_sweepengine.py
+@Time    :   2026/10/20 10:05:17
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import threading
+import time
+import numpy as np
+import pytest
+from uim_ee.SweepEngine import Sweep, SweepError
+
+
+class _Meter():
+    def __init__(self) -> None:
+        self.busy = threading.Lock()
+        self.overlap = False
+
+    def read(self):
+        # 同一对象的两个读取同时进入则记下
+        if not self.busy.acquire(blocking=False):
+            self.overlap = True
+            return 0.0
+        try:
+            time.sleep(0.002)
+            return 1.0
+        finally:
+            self.busy.release()
+
+
+def test_grid_order_and_sources_only_on_change():
+    calls = []
+    sweep = Sweep(grid={'a': [1, 2], 'b': [10, 20, 30]},
+                  sources={'a': lambda v: calls.append(('a', v)), 'b': lambda v: calls.append(('b', v))},
+                  readers={'y': (lambda: '3.5', float)})
+    data = sweep.run()
+    assert list(data['a']) == [1, 1, 1, 2, 2, 2] and list(data['b']) == [10, 20, 30] * 2
+    assert np.all(data['y'] == 3.5)
+    assert [c for c in calls if c[0] == 'a'] == [('a', 1), ('a', 2)]
+
+
+def test_same_instrument_readers_serialized():
+    meter = _Meter()
+    sweep = Sweep(grid={'x': range(20)}, sources={'x': lambda v: None},
+                  readers={'r1': meter.read, 'r2': meter.read})
+    data = sweep.run()
+    assert not meter.overlap and np.all(data['r1'] == 1.0)
+
+
+def test_failed_reader_leaves_nan():
+    def flaky():
+        raise TimeoutError('no reply')
+    count = iter(range(100))
+    sweep = Sweep(grid={'x': [0, 1, 2]}, sources={'x': lambda v: None},
+                  readers={'ok': lambda: next(count), 'bad': flaky, 'text': (lambda: 'OVLD', float)})
+    data = sweep.run()
+    assert list(data['ok']) == [0, 1, 2]
+    assert np.all(np.isnan(data['bad'])) and np.all(np.isnan(data['text']))
+    assert [(i, n) for i, n, e in sweep.errors if n == 'bad'] == [(0, 'bad'), (1, 'bad'), (2, 'bad')]
+    assert isinstance(sweep.errors[0][2], (TimeoutError, ValueError))
+
+
+def test_failed_source_keeps_measured_points():
+    def source(v):
+        if v == 3:
+            raise ConnectionResetError('psu gone')
+    sweep = Sweep(grid={'x': range(5)}, sources={'x': source}, readers={'y': lambda: 1.0})
+    with pytest.raises(SweepError) as info:
+        sweep.run()
+    err = info.value
+    assert err.index == 3 and isinstance(err.__cause__, ConnectionResetError)
+    assert list(err.data['y'][:3]) == [1.0, 1.0, 1.0] and np.all(np.isnan(err.data['y'][3:]))
+
+
+def test_parallel_sources_overlap():
+    def slow(v):
+        time.sleep(0.05)
+    grid = [{'a': 1, 'b': 1}, {'a': 2, 'b': 2}]
+    t0 = time.perf_counter()
+    Sweep(grid, sources={'a': slow, 'b': slow}, readers={}).run()
+    serial = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    Sweep(grid, sources={'a': slow, 'b': slow}, readers={}, parallel_sources=True).run()
+    assert time.perf_counter() - t0 < serial * 0.75
@@ -0,0 +1,103 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_tempcampaign.py
+@Time    :   2026/10/20 13:31:50
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import itertools
+import random
+import numpy as np
+import pytest
+from uim_ee.TempCampaign import Campaign, ChamberModel, order_setpoints, path_time
+
+
+def _brute(points, start, cost, end):
+    return min(path_time(p, start, cost, end) for p in itertools.permutations(points))
+
+
+@pytest.mark.parametrize('end', [None, 25.0])
+def test_held_karp_is_optimal(end):
+    rand = random.Random(7)
+    for _ in range(20):
+        points = rand.sample(range(-40, 130, 5), 6)
+        # 非对称且不满足三角不等式的代价
+        table = {}
+
+        def cost(a, b):
+            return table.setdefault((a, b), rand.uniform(0, 100))
+        order = order_setpoints(points, 25.0, cost, end)
+        assert sorted(order) == sorted(points)
+        assert path_time(order, 25.0, cost, end) == pytest.approx(_brute(points, 25.0, cost, end))
+
+
+def test_asymmetric_rates_order():
+    # 降温比升温慢得多: 只降温一次 (25 -> -40), 之后单调升温
+    model = ChamberModel(heat=5.0, cool=0.5, soak=0)
+    order = order_setpoints([85, -40, 25, 125, 0], 25.0, model.move_time)
+    assert order[-2:] == [85, 125]
+    assert path_time(order, 25.0, model.move_time) == pytest.approx((65 / 0.5 + 165 / 5.0) * 60)
+
+
+def test_many_points_not_worse_than_sorted():
+    model = ChamberModel(heat=2.0, cool=1.0, soak=300)
+    points = list(range(-40, 130, 10))
+    order = order_setpoints(points, 60.0, model.move_time, end=25.0, exact=10)
+    assert sorted(order) == points
+    best_sweep = min(path_time(o, 60.0, model.move_time, 25.0) for o in (sorted(points), sorted(points)[::-1]))
+    assert path_time(order, 60.0, model.move_time, 25.0) <= best_sweep
+
+
+def test_duplicates_and_trivial():
+    assert order_setpoints([], 25.0, abs) == []
+    assert order_setpoints([85, 85], 25.0, lambda a, b: abs(b - a)) == [85]
+
+
+def test_model_update_and_history():
+    model = ChamberModel(heat=2.0, cool=1.0, soak=100)
+    model.update(25, 85, 60 / 4.0 * 60 + 100, weight=1.0)      # 60 degC 用 15 min
+    assert model.heat == pytest.approx(4.0)
+    limited = ChamberModel(heat=2.0, soak=0, scan_rate=1.0)
+    limited.update(25, 85, 3600)                                # 受 scan rate 限制, 不学习
+    assert limited.heat == 2.0 and limited.ramp_time(25, 85) == 3600
+    t = np.arange(0, 1800, 5.0)
+    temp = np.where(t < 900, 25 + 3.0 * t / 60, 70 - 1.5 * (t - 900) / 60)
+    fitted = ChamberModel.from_history(t, temp)
+    assert fitted.heat == pytest.approx(3.0, rel=0.05) and fitted.cool == pytest.approx(1.5, rel=0.05)
+
+
+class _Chamber():
+    def __init__(self) -> None:
+        self.temp = 25.0
+        self.set_points = []
+
+    def set_temp(self, temp):
+        self.set_points.append(temp)
+        self.temp = temp
+
+    def read_current_temp(self):
+        return self.temp
+
+
+def test_plan_and_run():
+    camp = Campaign()
+    chamber = _Chamber()
+    camp.add_chamber('box', chamber, ChamberModel(heat=6000.0, cool=6000.0, soak=0.0),
+                     duts=['U1'], period=0.005, band=0.5, hold=0.02)
+    seen = []
+    camp.add_step(lambda name, duts, temp: seen.append(('meas', temp)) or temp, duration=60)
+    camp.add_step(lambda name, duts, temp: seen.append(('save', temp)), duration=30, thermal=False)
+    plan = camp.plan([85, -40, 0], end=25.0)
+    assert plan.orders['box'] == [0, -40, 85] or plan.orders['box'] == [-40, 0, 85]
+    kinds = [e[1] for e in plan.timeline()]
+    assert kinds.count('overlap') == 3 and kinds.count('ramp') == 4
+    assert 'saves' in plan.report()
+    results = plan.run(timeout_factor=1000)
+    assert [temp for temp, out in results['box']] == plan.orders['box']
+    assert chamber.set_points == plan.orders['box'] + [25.0]
+    assert sorted(seen) == sorted([('meas', t) for t in plan.orders['box']] + [('save', t) for t in plan.orders['box']])
+    assert sum(1 for a in plan.actual if a[1] == 'move') == 4
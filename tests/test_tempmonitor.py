@@ -0,0 +1,125 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_tempmonitor.py
+@Time    :   2026/10/20 11:52:08
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import math
+import numpy as np
+import pytest
+from uim_ee import TempMonitor as tm
+from uim_ee.TempMonitor import TempMonitor, fit_first_order
+
+
+class _Clock():
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+class _Chamber():
+    """first-order chamber: temp approaches the setpoint with time constant tau"""
+
+    def __init__(self, clock, temp=25.0, tau=60.0, ramp=0.0) -> None:
+        self.clock = clock
+        self.start = clock.now
+        self.temp0 = temp
+        self.setpoint = temp
+        self.tau = tau
+        self.ramp = ramp        # degC/s, 缓慢漂移
+
+    def set_temp(self, temp):
+        self.temp0 = self.read_current_temp()
+        self.start = self.clock.now
+        self.setpoint = temp
+
+    def read_set_temp(self):
+        return self.setpoint
+
+    def read_current_temp(self):
+        dt = self.clock.now - self.start
+        return self.setpoint + (self.temp0 - self.setpoint) * math.exp(-dt / self.tau) + self.ramp * dt
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    c = _Clock()
+    monkeypatch.setattr(tm, 'time', c)      # 只替换 TempMonitor 模块中的时钟
+    return c
+
+
+def _run(mon, clock, seconds):
+    for _ in range(int(seconds / mon.period)):
+        clock.now += mon.period
+        mon.sample()
+
+
+def test_fit_first_order():
+    t = np.arange(0, 300, 1.0)
+    temp = 85 + (25 - 85) * np.exp(-t / 50)
+    tau, final = fit_first_order(t, temp, setpoint=85)
+    assert tau == pytest.approx(50, rel=1e-3) and final == 85
+    tau, final = fit_first_order(t, temp)
+    assert tau == pytest.approx(50, rel=0.1) and final == pytest.approx(85, abs=0.5)
+    assert fit_first_order(t, np.full_like(t, 25.0), setpoint=85) is None     # 没有趋近
+
+
+def test_settles_after_hold(clock):
+    chamber = _Chamber(clock, tau=60)
+    mon = TempMonitor(chamber, period=1.0, band=0.2, hold=30)
+    seen = []
+    mon.on_settled(seen.append)
+    mon.set_temp(85)
+    # 误差 60 * exp(-t/60) 在 t ~ 342 s 进入带内, 但漂移 (误差/tau) 到 t ~ 425 s 才低于 0.05 degC/min
+    _run(mon, clock, 400)
+    assert not mon.settled and mon.predict() > 0
+    _run(mon, clock, 60)
+    assert mon.settled and seen == [mon] and mon.predict() == 0.0
+    _run(mon, clock, 10)
+    assert len(seen) == 1                   # 同一设定点只回调一次
+
+
+def test_prediction_close_to_actual(clock):
+    chamber = _Chamber(clock, tau=60)
+    mon = TempMonitor(chamber, period=1.0, band=0.2, hold=30, fit=120)
+    mon.set_temp(85)
+    _run(mon, clock, 120)
+    predicted = mon.predict()
+    start = clock.now
+    while not mon.settled and clock.now - start < 1000:
+        _run(mon, clock, 1)
+    assert predicted == pytest.approx(clock.now - start, abs=15)
+
+
+def test_drift_in_band_is_not_settled(clock):
+    # 在带内但一直以 0.3 degC/min 漂移
+    chamber = _Chamber(clock, ramp=0.005)
+    mon = TempMonitor(chamber, period=1.0, band=1.0, slope=0.05, hold=30)
+    mon.track(25)
+    _run(mon, clock, 60)
+    assert not mon.settled and mon.drift() == pytest.approx(0.3, rel=0.01)
+
+
+def test_new_setpoint_clears_settled(clock):
+    chamber = _Chamber(clock)
+    mon = TempMonitor(chamber, period=1.0, band=0.2, hold=10)
+    mon.track(25)
+    _run(mon, clock, 12)
+    assert mon.settled
+    mon.set_temp(-40)
+    assert not mon.settled and not mon.wait(0)
+
+
+def test_background_thread():
+    chamber = _Chamber(_Clock())
+    with TempMonitor(chamber, period=0.01, band=0.2, hold=0.05) as mon:
+        assert mon.setpoint == 25.0         # 从 read_set_temp 取得
+        assert mon.wait(2.0)
+    assert mon.errors == 0
@@ -0,0 +1,76 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   test_trace.py
+@Time    :   2026/10/20 11:20:36
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import json
+import pytest
+from uim_ee.InstrSim import attach, make
+from uim_ee.PwrSupply import DP800
+from uim_ee.Trace import Tracer, TracedProxy, tracer
+
+
+@pytest.fixture
+def traced():
+    tracer.clear()
+    tracer.enable()
+    yield tracer
+    tracer.disable()
+    tracer.clear()
+
+
+def _fill(t, count):
+    for i in range(count):
+        t.record('vxi11', 'DMM@1', 'ask', 'CMD%d' % i, float(i), i + 0.5)
+
+
+def test_ring_wraps_keeping_newest():
+    t = Tracer(capacity=5)
+    t.enable()
+    _fill(t, 12)
+    assert [e['command'] for e in t.snapshot()] == ['CMD7', 'CMD8', 'CMD9', 'CMD10', 'CMD11']
+    # 缩小容量时保留最新的事件
+    t.enable(capacity=3)
+    assert [e['command'] for e in t.snapshot()] == ['CMD9', 'CMD10', 'CMD11']
+    assert t.summary() == {('DMM@1', 'ask'): [3, 1.5, 0]}
+
+
+def test_only_filter_and_truncation():
+    t = Tracer(capacity=10)
+    t.enable(only={'DP800'})
+    t.record('vxi11', 'DP800@10.0.0.1', 'write', b'X' * 500, 0.0, 1.0)
+    t.record('vxi11', 'SDM3065@10.0.0.2', 'write', 'VOLT?', 0.0, 1.0)
+    events = t.snapshot()
+    assert len(events) == 1 and len(events[0]['command']) == 200
+
+
+def test_driver_session_traced(traced, tmp_path):
+    psu = attach(DP800('sim-trace'), make('DP800'))
+    traced.disable()
+    assert not isinstance(psu.session, TracedProxy)     # 关闭时没有代理
+    psu.voltRead(1)
+    assert not traced.events
+    traced.enable()
+    psu.voltRead(1)
+    events = traced.snapshot()
+    assert events and all(e['instrument'] == 'DP800@sim-trace' for e in events)
+    asks = [e for e in events if e['op'] == 'ask']
+    assert asks and asks[-1]['nbytes']
+    assert events[-1]['op'] == 'log'                    # debugPrint 的输出记作 log 事件
+    traced.to_chrome(str(tmp_path / 'run.json'))
+    out = json.loads((tmp_path / 'run.json').read_text(encoding='utf-8'))
+    assert out['traceEvents'][0]['args']['name'] == 'DP800@sim-trace'
+
+
+def test_failed_call_records_error(traced):
+    psu = attach(DP800('sim-trace'), make('DP800'))
+    psu.session.timeout = 0.01
+    with pytest.raises(Exception):
+        psu.session.read()              # 没有待读的应答
+    assert traced.events[-1][-1] is not None
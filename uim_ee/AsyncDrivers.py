@@ -0,0 +1,551 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   AsyncDrivers.py
+@Time    :   2026/10/19 02:36:15
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import asyncio
+import contextlib
+from . import InstrProfile
+from .AsyncInstr import AsyncInstrument, AsyncSerial, open_lan_async, PORTMAPPER_PORT
+from .BinBlock import parse_block
+from .ElecLoad import FUNC_MODE
+from .MeterStats import MeterStats, host_stats, parse_stats
+from .Osc import Waveform, parse_wavedesc
+from .PwrSupply import _setting
+from .ScpiBatch import ScpiBatch
+from .StateShadow import StateShadow
+from .Trace import debugPrint
+from .LazyImport import lazy_import
+
+np = lazy_import('numpy')
+serial = lazy_import('serial', 'pyserial')
+struct = lazy_import('struct')
+
+
+# 同一任务可重入的 asyncio 锁, 多条命令的操作期间不让其他协程插入
+class _TaskLock():
+    def __init__(self) -> None:
+        self._lock = None
+        self._owner = None
+        self._depth = 0
+
+    async def __aenter__(self):
+        task = asyncio.current_task()
+        if self._owner is not task:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            await self._lock.acquire()
+            self._owner = task
+        self._depth += 1
+
+    async def __aexit__(self, *exc):
+        self._depth -= 1
+        if not self._depth:
+            self._owner = None
+            self._lock.release()
+
+
+# 网口仪器 asyncio 驱动的公共部分, 对应 VxiInstr.VxiInstrument
+class AsyncVxiInstrument():
+    """common part of the asyncio LAN drivers
+
+        psu = await AsyncDP800.open('192.168.12.119')
+        dmm = await AsyncKEYSIGHT_344X.open('TCPIP0::192.168.12.50::5025::SOCKET')
+        v, i = await asyncio.gather(dmm.measureVolt(), psu.currentRead(1))
+
+    Same methods and commands as the blocking driver, as coroutines on an
+    asyncio transport (AsyncInstr.open_lan_async): no thread per call.
+    Each object has its own connection; the commands of one call are never
+    interleaved with those of another call on the same object.
+    """
+    batch_max_len = 256     # 单条消息最大长度
+    transport = None        # 默认传输: None/'vxi11', 'socket', 'hislip'
+
+    def __init__(self, ipaddr, session) -> None:
+        """use open(), session an opened AsyncInstr transport"""
+        self.ipaddr = ipaddr
+        self.session = session
+        self.shadow = StateShadow()
+        self.lock = _TaskLock()
+        self._batch = None
+
+    @classmethod
+    async def open(cls, ipaddr, transport=None, timeout=10.0, portmapper=PORTMAPPER_PORT):
+        """connect to the instrument, arguments as for open_lan_async"""
+        session = await open_lan_async(ipaddr, transport or cls.transport, timeout, portmapper)
+        return cls(ipaddr, session)
+
+    async def close(self):
+        await self.session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _write(self, command):
+        async with self.lock:
+            if self._batch is not None:
+                self._batch.add(command)
+                return
+            await self.session.write(command)
+
+    async def _flush(self):
+        batch, self._batch = self._batch, None
+        try:
+            for message in batch.take():
+                await self.session.write(message)
+        finally:
+            self._batch = batch
+
+    async def _query(self, command):
+        async with self.lock:
+            if self._batch is not None:
+                await self._flush()
+            return await self.session.ask(command)
+
+    async def _ask(self, command):
+        ret = await self._query(command)
+        debugPrint(ret)
+        return ret
+
+    async def _ask_raw(self, data):
+        async with self.lock:
+            if self._batch is not None:
+                await self._flush()
+            return await self.session.ask_raw(data)
+
+    async def get_profile(self):
+        """identity and capabilities (InstrProfile.Profile), *IDN? is queried once per address"""
+        return await InstrProfile.profile_async(self.ipaddr, self._query)
+
+    async def capability(self, name, default=None):
+        # 型号能力表 / 运行中学到的能力, 未知或查询失败时用 default
+        try:
+            return (await self.get_profile()).get(name, default)
+        except Exception as e:
+            debugPrint('%s profile: %s' % (self.ipaddr, e))
+            return default
+
+    async def learn(self, name, value):
+        # 记下运行中发现的型号能力, 以后不再尝试
+        try:
+            InstrProfile.learn(await self.get_profile(), name, value)
+        except Exception as e:
+            debugPrint('%s profile: %s' % (self.ipaddr, e))
+
+    async def waitOpc(self, timeout=10.0):
+        """wait until all pending operations are complete (*OPC?)
+
+        :timeout: s, upper bound for the operation
+        """
+        async with self.lock:
+            old = self.session.timeout
+            self.session.timeout = max(old, timeout)
+            try:
+                await self._ask('*OPC?')
+            except BaseException:
+                self.shadow.invalidate()
+                raise
+            finally:
+                self.session.timeout = old
+
+    @contextlib.asynccontextmanager
+    async def batch(self):
+        """send the writes made inside the block as one ';' joined message
+
+            async with dmm.batch():
+                await dmm.configVolt('DC')
+                await dmm.SampleCount(100)
+        """
+        async with self.lock:
+            if self._batch is not None:
+                yield self._batch
+                return
+            self._batch = ScpiBatch(None, self.batch_max_len)
+            try:
+                yield self._batch
+                await self._flush()
+            except BaseException:
+                self.shadow.invalidate()
+                raise
+            finally:
+                self._batch = None
+
+
+# 串口仪器 asyncio 驱动的公共部分
+class AsyncSerialInstrument():
+    """common part of the asyncio serial drivers, self.link an AsyncInstr.AsyncSerial"""
+
+    def __init__(self, link) -> None:
+        """use open()"""
+        self.link = link
+        self.session = link.session
+
+    async def close(self):
+        await self.link.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def _undefined_header(ask, depth=10):
+    # MeterStats.undefined_header 的协程版本
+    found = False
+    for _ in range(depth):
+        try:
+            code = int((await ask('SYST:ERR?')).split(',')[0])
+        except Exception:
+            break
+        if code == 0:
+            break
+        found = found or code == -113
+    return found
+
+
+# 仪器内部统计, 对应 MeterStats.MeterStats
+class AsyncMeterStats():
+    """MeterStats.statistics() as a coroutine
+
+        s = await dmm.statistics(10000, bins=20)
+    """
+    onboard_stats = MeterStats.onboard_stats
+    stats_enable = MeterStats.stats_enable
+    hist_enable = MeterStats.hist_enable
+
+    async def _stats_fetch(self):
+        return np.fromstring(await self._query('FETC?'), sep=',')
+
+    async def statistics(self, count=1000, bins=0, conf='VOLT:DC', plc=None, timeout=None):
+        """take count readings and return their Stats, arguments as for MeterStats.statistics"""
+        async with self.lock:
+            if timeout is None:
+                timeout = 2 + 2 * count * (plc or 10) / 50
+            onboard = self.onboard_stats and await self.capability('onboard_stats', True)
+            memory = await self.capability('reading_memory')
+            if not onboard and memory is not None and count > memory:
+                raise ValueError('%d readings do not fit the %d reading memory of %s' % (
+                    count, memory, type(self).__name__))
+            async with self.batch():
+                if conf is not None:
+                    await self._write('CONF:%s' % conf)
+                    if plc is not None:
+                        await self._write('%s:NPLC %s' % (conf, plc))
+                await self._write('TRIG:SOUR IMM')
+                await self._write('SAMP:COUN %d' % count)
+                if onboard:
+                    for command in self.stats_enable:
+                        await self._write(command)
+                    await self._write('CALC:AVER:CLE')
+                    if bins:
+                        await self._write('CALC:TRAN:HIST:POIN %d' % bins)
+                        for command in self.hist_enable:
+                            await self._write(command)
+                        await self._write('CALC:TRAN:HIST:CLE')
+                await self._write('INIT')
+            self.shadow.invalidate()
+            await self.waitOpc(timeout)
+            if not onboard:
+                return host_stats(await self._stats_fetch(), bins)
+            try:
+                return parse_stats(await self._ask('CALC:AVER:ALL?' + (';:CALC:TRAN:HIST:ALL?' if bins else '')),
+                                   count, bins)
+            except Exception as e:
+                debugPrint('statistics on %s failed (%s), computing on host' % (type(self).__name__, e))
+                if await _undefined_header(self._ask):
+                    self.onboard_stats = False
+                    await self.learn('onboard_stats', False)
+                return host_stats(await self._stats_fetch(), bins)
+
+
+# RIGOL 的电源, 对应 PwrSupply.DP800
+class AsyncDP800(AsyncVxiInstrument):
+    async def getIDN(self):
+        return await self._ask('*IDN?')
+
+    async def SelectChnnl(self, chnnl):
+        await self._write(':INST CH%s' % chnnl)
+
+    async def GetCurrChnnl(self):
+        return await self._ask(':INST?')
+
+    async def outputOn(self, chnnl):
+        await self._write(':OUTP CH%s,ON' % chnnl)
+
+    async def outputOff(self, chnnl):
+        await self._write(':OUTP CH%s,OFF' % chnnl)
+
+    async def OutputSta(self, chnnl):
+        return await self._ask('OUTP? CH%s' % chnnl)
+
+    async def GetChnnlAll(self, chnnl):
+        return await self._ask(':MEAS:ALL? CH%s' % chnnl)
+
+    async def voltRead(self, chnnl):
+        return await self._ask(':MEAS? CH%s' % chnnl)
+
+    async def currentRead(self, chnnl):
+        return await self._ask(':MEAS:CURR? CH%s' % chnnl)
+
+    async def powerRead(self, chnnl):
+        return await self._ask(':MEAS:POWE? CH%s' % chnnl)
+
+    async def voltage_cuurent_Set(self, chnnl, vol, current):
+        async with self.lock:
+            await self.shadow.write_async(self._write, ':APPL CH%s,%s,%s' % (chnnl, vol, current),
+                                          ['VOLT CH%s' % chnnl, 'CURR CH%s' % chnnl],
+                                          [_setting(vol), _setting(current)])
+
+    async def voltSet(self, chnnl, volt):
+        async with self.lock:
+            await self.shadow.write_async(self._write, ':APPL CH%s,%s' % (chnnl, volt), 'VOLT CH%s' % chnnl,
+                                          _setting(volt))
+
+    async def _applied(self, chnnl, key, index):
+        async with self.lock:
+            ret = self.shadow.get(key)
+            if ret is None:
+                ret = _setting((await self._query(':APPL? CH%s' % chnnl)).split(',')[index])
+                self.shadow.set(key, ret)
+        debugPrint(ret)
+        return ret
+
+    async def voltSetGet(self, chnnl):
+        return await self._applied(chnnl, 'VOLT CH%s' % chnnl, 1)
+
+    async def currentSetGet(self, chnnl):
+        return await self._applied(chnnl, 'CURR CH%s' % chnnl, 2)
+
+
+# RIGOL 的电子负载, 对应 ElecLoad.DL3000
+class AsyncDL3000(AsyncVxiInstrument):
+    async def getIDN(self):
+        return await self._ask('*IDN?')
+
+    async def getInVol(self):
+        return await self._ask(':MEASure:VOLTage:DC?')
+
+    async def getInCur(self):
+        return await self._ask(':MEASure:CURRent:DC?')
+
+    async def getInResis(self):
+        return await self._ask(':MEASure:RESistance:DC?')
+
+    async def getInPower(self):
+        return await self._ask(':MEASure:POWer:DC?')
+
+    async def OutputOn(self):
+        await self._write(':SOUR:INP:STAT 1')
+
+    async def OutputOff(self):
+        await self._write(':SOUR:INP:STAT 0')
+
+    async def getInSta(self):
+        return await self._ask(':SOUR:INP:STAT?')
+
+    async def setmode(self, mode):
+        ret = FUNC_MODE.get(mode.upper()[:3], mode)
+        async with self.lock:
+            await self.shadow.write_async(self._write, ':SOUR:FUNC %s' % mode, 'FUNC', ret)
+
+    async def getmode(self):
+        async with self.lock:
+            ret = self.shadow.get('FUNC')
+            if ret is None:
+                ret = await self._query(':SOUR:FUNC?')
+                self.shadow.set('FUNC', ret)
+        debugPrint(ret)
+        return ret
+
+    async def setModeRange(self, mode, range):
+        await self._write(':SOUR:%s:RANG %s' % (mode, range))
+
+    async def getModeRange(self, mode):
+        return await self._ask(':SOUR:%s:RANG?' % mode)
+
+    async def setModeValue(self, mode, value):
+        await self._write(':SOUR:%s:LEV:IMM %s' % (mode, value))
+
+    async def getsetModeValue(self, mode):
+        return await self._ask('SOUR:%s:LEV:IMM?' % mode)
+
+    async def setModeCurretLimit(self, mode, value):
+        await self._write(':SOUR:%s:ILIM %s' % (mode, value))
+
+    async def getsetModeCurrentLimit(self, mode):
+        return await self._ask('SOUR:%s:ILIM?' % mode)
+
+    async def setModeVolLimit(self, mode, value):
+        await self._write(':SOUR:%s:VLIM %s' % (mode, value))
+
+    async def getsetModeVolLimit(self, mode):
+        return await self._ask('SOUR:%s:VLIM?' % mode)
+
+    async def CCmodeVon(self, value):
+        await self._write(':SOUR:CURR:VON %s' % value)
+
+
+# keysight 的万用表, 对应 MultiMeter.KEYSIGHT_344X
+class AsyncKEYSIGHT_344X(AsyncMeterStats, AsyncVxiInstrument):
+    async def getIDN(self):
+        return await self._ask('*IDN?')
+
+    async def measureVolt(self, dcac='DC'):
+        return await self._ask('MEAS:VOLT:%s?' % dcac)
+
+    async def measureCurrent(self, dcac='DC'):
+        return await self._ask('MEAS:CURR:%s?' % dcac)
+
+
+# 鼎阳的示波器, 对应 Osc.SDS2504X
+class AsyncSDS2504X(AsyncVxiInstrument):
+    async def getIDN(self):
+        return await self._ask('*IDN?')
+
+    async def setTimeDiv(self, time):
+        await self._write('TIM:SCAL %s' % time)
+
+    async def getValuePACU(self, meastyp, chnn):
+        # 型号表未列出的参数只记录, 仍然发送
+        pava = await self.capability('pava')
+        if pava is not None and meastyp.upper() not in pava:
+            debugPrint('PAVA %s is not in the %s list' % (meastyp, (await self.get_profile()).model))
+        ret = await self._ask('C%s:PAVA? %s' % (chnn, meastyp))
+        if '****' in ret.split(',')[1]:
+            return 'UNDEF'
+        return float(ret.split(',')[1].split('V')[0])
+
+    async def TrigeMode(self, mode='NORMal'):
+        await self._write('TRIGger:MODE %s' % mode)
+
+    async def getTrigMode(self):
+        return await self._ask('TRIG:STAT?')
+
+    async def setOffset(self, chnn, offset_value):
+        await self._write('CHAN%s:OFFS %s' % (chnn, offset_value))
+
+    async def setTrigTypeSrc(self, type, src):
+        async with self.lock:
+            await self._write('TRIGger:TYPE %s' % type)
+            await self._write('TRIG:%s:SOUR C%s' % (type, src))
+
+    async def setEdgeLevel(self, level):
+        await self._write('TRIG:EDGE:LEV %s' % level)
+
+    async def setEdgeSlope(self, slope):
+        await self._write('TRIG:EDGE:SLOP %s' % slope)
+
+    async def SaveImage(self, path, reverse='OFF', format='PNG'):
+        await self._write(':SAVE:IMAGe "%s",%s,%s' % (path, format, reverse))
+
+    async def getWaveform(self, chnn, word=None):
+        """read one channel trace as binary blocks, see Osc.SDS2504X.getWaveform"""
+        if word is None:
+            word = await self.capability('adc_bits', 8) > 8
+        dtype = '<i2' if word else np.int8
+        async with self.lock:
+            await self._write(':WAV:SOUR C%s' % chnn)
+            await self._write(':WAV:WIDT %s' % ('WORD' if word else 'BYTE'))
+            pre = parse_block(await self._ask_raw(b':WAV:PRE?'))
+            desc = parse_wavedesc(pre)
+            probe = struct.unpack_from(desc['order'] + 'd', pre, 328)[0]
+            tdiv = float(await self._ask(':TIM:SCAL?'))
+            total = desc['wave_array_count']
+            maxpt = await self.capability('wave_max_points')
+            if maxpt is None:
+                maxpt = int(float(await self._ask(':WAV:MAXP?')))
+                await self.learn('wave_max_points', maxpt)
+
+            await self._write(':WAV:STAR 0')
+            if total <= maxpt:
+                await self._write(':WAV:POIN %d' % total)
+                codes = np.frombuffer(parse_block(await self._ask_raw(b':WAV:DATA?')), dtype=dtype)
+            else:
+                codes = np.empty(total, dtype=dtype)
+                for start in range(0, total, maxpt):
+                    await self._write(':WAV:STAR %d' % start)
+                    count = min(maxpt, total - start)
+                    await self._write(':WAV:POIN %d' % count)
+                    chunk = np.frombuffer(parse_block(await self._ask_raw(b':WAV:DATA?')), dtype=dtype)
+                    if len(chunk) != count:
+                        raise IOError('C%s: %d points at %d, expected %d' % (chnn, len(chunk), start, count))
+                    codes[start:start+count] = chunk
+
+        gain = desc['vertical_gain'] * probe / desc['code_per_div']
+        offset = desc['vertical_offset'] * probe
+        t0 = -desc['horiz_offset'] - tdiv * 10 / 2
+        return Waveform(codes, gain, offset, desc['horiz_interval'], t0)
+
+
+# 油槽, 对应 OilSink.ZCTB_400L
+class AsyncZCTB_400L(AsyncSerialInstrument):
+    @classmethod
+    async def open(cls, comport):
+        session = serial.Serial(comport, 9600, timeout=0)
+        return cls(AsyncSerial(session, eol=b'\r\n', name='ZCTB_400L'))
+
+    async def _query(self, command):
+        ret = (await self.link.query(command)).split(':')[1]
+        debugPrint(ret)
+        return ret
+
+    async def getID(self):
+        ret = await self.link.query('*ver')
+        debugPrint(ret)
+        return ret
+
+    async def set_temp(self, temp):
+        await self.link.write(b's=%d' % temp)
+
+    async def set_sr(self, scanrate):
+        await self.link.write(b'sr=%d' % scanrate)
+
+    async def read_state(self):
+        # 0 不稳定 1稳定
+        return await self._query('st')
+
+    async def read_set_temp(self):
+        return await self._query('s')
+
+    async def coolstate(self):
+        await self._query('co')
+
+    async def set_cool(self, state):
+        await self.link.write('co=%s' % state)
+
+    async def read_current_temp(self):
+        return await self._query('t')
+
+    async def heatpower(self):
+        return await self._query('po')
+
+    async def read_holdtime(self):
+        return await self._query('pt')
+
+
+# usb转i2c, pyftdi 只有阻塞接口, 在线程中执行
+class AsyncUSB2IIC(AsyncInstrument):
+    """USB2IIC driven from asyncio: pyftdi (libusb) has no asyncio API, so
+    each call runs in an executor thread as in AsyncInstrument
+
+        iic = await AsyncUSB2IIC.open(sla=0x5C)
+        value = await iic.readBytes(0x10)
+    """
+
+    @classmethod
+    async def open(cls, *args, executor=None, **kwargs):
+        """USB2IIC(*args, **kwargs) opened in the executor"""
+        from .FtdiUsbI2c import USB2IIC
+        loop = asyncio.get_running_loop()
+        driver = await loop.run_in_executor(executor, lambda: USB2IIC(*args, **kwargs))
+        return cls(driver, executor)
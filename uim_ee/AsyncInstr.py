@@ -0,0 +1,651 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   AsyncInstr.py
+@Time    :   2026/10/18 14:02:45
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import functools
+import os
+import threading
+import time
+import weakref
+from .Trace import tracer
+from .LazyImport import lazy_import
+
+# 只有 asyncio 接口需要, 驱动导入 instrument_lock 时不加载
+asyncio = lazy_import('asyncio')
+struct = lazy_import('struct')
+lt = lazy_import('.LanTransport', package=__package__)
+serial = lazy_import('serial', 'pyserial')
+
+
+_locks = weakref.WeakKeyDictionary()
+_locks_guard = threading.Lock()
+
+
+def instrument_lock(driver):
+    """the lock serializing transactions on one driver object
+
+    Drivers on a LinkPool link share the lock of the instrument host.
+    """
+    for name in ('session', 'inst'):
+        lock = getattr(getattr(driver, name, None), 'link_lock', None)
+        if lock is not None:
+            return lock
+    with _locks_guard:
+        lock = _locks.get(driver)
+        if lock is None:
+            lock = _locks[driver] = threading.RLock()
+        return lock
+
+
+# 驱动属性的读取, await 时才执行
+class _Deferred():
+    __slots__ = ('_instrument', '_name')
+
+    def __init__(self, instrument, name) -> None:
+        self._instrument = instrument
+        self._name = name
+
+    def __await__(self):
+        return self._instrument._run(getattr, self._instrument.driver, self._name).__await__()
+
+
+# 仪器的 asyncio 接口 (线程)
+class AsyncInstrument():
+    """awaitable wrapper of any uim_ee driver object, the driver runs in a thread
+
+        iic = AsyncInstrument(USB2IIC())
+        value = await iic.readBytes(0x10)
+        idn = await dmm_visa.dev_info
+
+    Every public method of the driver becomes a coroutine, properties
+    (dev_info) are read when awaited. Each call runs the blocking driver in
+    an executor thread, so at most as many instruments are polled at once
+    as the executor has threads. Calls to one instrument are kept in
+    submission order and never interleave. LAN and serial drivers have
+    native asyncio counterparts without threads, see AsyncDrivers; this
+    wrapper is for the others (FTDI I2C, VISA).
+    """
+
+    def __init__(self, driver, executor=None) -> None:
+        """
+        :driver: driver object, e.g. DP800(...), USB2IIC(...)
+        :executor: concurrent.futures executor, default the loop's
+        """
+        self.driver = driver
+        self.executor = executor
+        self._order = None      # asyncio.Lock, 在事件循环中创建
+
+    async def _run(self, func, *args, **kwargs):
+        if self._order is None:
+            self._order = asyncio.Lock()
+        lock = instrument_lock(self.driver)
+
+        def call():
+            with lock:
+                return func(*args, **kwargs)
+        async with self._order:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, call)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if isinstance(getattr(type(self.driver), name, None), property):
+            return _Deferred(self, name)
+        attr = getattr(self.driver, name)
+        if not callable(attr):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self._run(attr, *args, **kwargs)
+        return method
+
+
+# ---------------------------------------------------------------- asyncio LAN 传输
+
+# 原始套接字 / HiSLIP / VXI-11 的 asyncio 客户端公共接口
+class _AsyncLan():
+    kind = None     # 跟踪记录中的传输名
+
+    def __init__(self, timeout) -> None:
+        self.timeout = timeout
+        self._lock = asyncio.Lock()     # 一问一答不被其他协程打断
+
+    @property
+    def name(self):
+        return '%s:%s' % (self.host, getattr(self, 'port', ''))
+
+    async def _io(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+    async def _traced(self, op, command, awaitable):
+        if not tracer.enabled:
+            return await awaitable
+        start = time.perf_counter()
+        try:
+            ret = await awaitable
+        except Exception as e:
+            tracer.record(self.kind, self.name, op, command, start, time.perf_counter(), None, type(e).__name__)
+            raise
+        tracer.record(self.kind, self.name, op, command, start, time.perf_counter(),
+                      None if ret is None else len(ret))
+        return ret
+
+    async def write(self, message, encoding='utf-8'):
+        if isinstance(message, str):
+            message = message.encode(encoding)
+        async with self._lock:
+            await self._traced('write', message, self.write_raw(message))
+
+    async def read(self, encoding='utf-8'):
+        async with self._lock:
+            data = await self._traced('read', None, self.read_raw())
+        return data.decode(encoding).rstrip('\r\n')
+
+    async def _ask_raw(self, data):
+        await self.write_raw(data)
+        return await self.read_raw()
+
+    async def ask_raw(self, data):
+        async with self._lock:
+            return await self._traced('ask', data, self._ask_raw(data))
+
+    async def ask(self, message, encoding='utf-8'):
+        return (await self.ask_raw(message.encode(encoding))).decode(encoding).rstrip('\r\n')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def _nodelay(writer):
+    import socket
+    sock = writer.get_extra_info('socket')
+    if sock is not None:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+class AsyncScpiSocket(_AsyncLan):
+    """SCPI over a plain TCP connection on the event loop, see LanTransport.ScpiSocket
+
+        dmm = await AsyncScpiSocket.open('192.168.12.50')
+        v = await dmm.ask('MEAS:VOLT:DC?')
+    """
+    kind = 'socket'
+
+    def __init__(self, reader, writer, host, port, timeout=10.0, term=b'\n') -> None:
+        _AsyncLan.__init__(self, timeout)
+        self.host = host
+        self.port = port
+        self.term = term
+        self._reader = reader
+        self._writer = writer
+        self._buf = bytearray()
+
+    @classmethod
+    async def open(cls, host, port=None, timeout=10.0, term=b'\n'):
+        """:port: default LanTransport.SOCKET_PORT"""
+        port = port or lt.SOCKET_PORT
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        _nodelay(writer)
+        return cls(reader, writer, host, port, timeout, term)
+
+    async def write_raw(self, data):
+        data = bytes(data)
+        if not data.endswith(self.term):
+            data += self.term
+        self._writer.write(data)
+        await self._io(self._writer.drain())
+
+    async def read_raw(self):
+        """one reply including its terminator"""
+        buf = self._buf
+        pos = 0
+        while True:
+            end, pos = lt.frame_end(buf, pos, self.term)
+            if end is not None:
+                data = bytes(buf[:end])
+                del buf[:end]
+                return data
+            chunk = await self._io(self._reader.read(max(65536, pos - len(buf))))
+            if not chunk:
+                raise ConnectionError('%s:%d closed the connection' % (self.host, self.port))
+            buf += chunk
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+
+
+def _send(writer, kind, control=0, param=0, payload=b''):
+    writer.write(lt._HEADER.pack(b'HS', kind, control, param, len(payload)) + bytes(payload))
+
+
+async def _recv(reader):
+    prologue, kind, control, param, length = lt._HEADER.unpack(await reader.readexactly(lt._HEADER.size))
+    if prologue != b'HS':
+        raise ConnectionError('not a HiSLIP message: %r' % prologue)
+    return kind, control, param, await reader.readexactly(length) if length else b''
+
+
+class AsyncHiSLIP(_AsyncLan):
+    """SCPI over HiSLIP on the event loop, see LanTransport.HiSLIP
+
+        osc = await AsyncHiSLIP.open('192.168.12.253')
+        idn = await osc.ask('*IDN?')
+    """
+    kind = 'hislip'
+
+    def __init__(self, host, sub_address='hislip0', port=None, timeout=10.0) -> None:
+        """:port: default LanTransport.HISLIP_PORT"""
+        _AsyncLan.__init__(self, timeout)
+        self.host = host
+        self.sub_address = sub_address
+        self.port = port or lt.HISLIP_PORT
+        self.message_id = 0xFFFFFF00
+        self.max_message = 1 << 20
+        self._rmt = False
+        self._sync = self._async = None     # (reader, writer)
+
+    @classmethod
+    async def open(cls, host, sub_address='hislip0', port=None, timeout=10.0):
+        self = cls(host, sub_address, port, timeout)
+        try:
+            await self._io(self._initialize())
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        _nodelay(writer)
+        return reader, writer
+
+    async def _expect(self, channel, kind):
+        msg = await _recv(channel[0])
+        if msg[0] in (lt.ERROR, lt.FATAL_ERROR):
+            raise ConnectionError('%s: HiSLIP error %d: %s' % (self.host, msg[1], bytes(msg[3]).decode('latin-1')))
+        if msg[0] != kind:
+            raise ConnectionError('%s: HiSLIP message %d while waiting for %d' % (self.host, msg[0], kind))
+        return msg
+
+    async def _initialize(self):
+        self._sync = await self._connect()
+        _send(self._sync[1], lt.INITIALIZE, 0, (0x0100 << 16) | int.from_bytes(lt.VENDOR_ID, 'big'),
+              self.sub_address.encode('ascii'))
+        param = (await self._expect(self._sync, lt.INITIALIZE_RESPONSE))[2]
+        self.session_id = param & 0xFFFF
+        self._async = await self._connect()
+        _send(self._async[1], lt.ASYNC_INITIALIZE, 0, self.session_id)
+        await self._expect(self._async, lt.ASYNC_INITIALIZE_RESPONSE)
+        _send(self._async[1], lt.ASYNC_MAXIMUM_MESSAGE_SIZE, 0, 0, (1 << 20).to_bytes(8, 'big'))
+        payload = (await self._expect(self._async, lt.ASYNC_MAXIMUM_MESSAGE_SIZE_RESPONSE))[3]
+        self.max_message = int.from_bytes(payload, 'big')
+
+    async def write_raw(self, data):
+        data = memoryview(bytes(data))
+        size = max(1, self.max_message)
+        writer = self._sync[1]
+        for start in range(0, max(len(data), 1), size):
+            last = start + size >= len(data)
+            _send(writer, lt.DATA_END if last else lt.DATA, int(self._rmt), self.message_id, data[start:start+size])
+            self._rmt = False
+            self.message_id = (self.message_id + 2) & 0xFFFFFFFF
+        await self._io(writer.drain())
+
+    async def read_raw(self):
+        """one whole reply"""
+        parts = []
+        while True:
+            kind, control, param, payload = await self._io(_recv(self._sync[0]))
+            if kind == lt.DATA:
+                parts.append(payload)
+            elif kind == lt.DATA_END:
+                parts.append(payload)
+                self._rmt = True
+                return b''.join(parts)
+            elif kind == lt.FATAL_ERROR:
+                raise ConnectionError('%s: HiSLIP fatal error %d: %s' % (
+                    self.host, control, bytes(payload).decode('latin-1')))
+            elif kind == lt.ERROR:
+                raise IOError('%s: HiSLIP error %d: %s' % (self.host, control, bytes(payload).decode('latin-1')))
+
+    async def close(self):
+        for channel in (self._sync, self._async):
+            if channel is not None:
+                channel[1].close()
+
+
+# ---------------------------------------------------------------- asyncio VXI-11
+
+# ONC RPC 与 VXI-11 核心通道 (VXI-11 规范 B.6)
+PORTMAPPER_PORT = 111
+_PMAP_PROG, _PMAP_VERS, _PMAP_GETPORT = 100000, 2, 3
+_CORE_PROG, _CORE_VERS = 0x0607AF, 1
+_CREATE_LINK, _DEVICE_WRITE, _DEVICE_READ, _DESTROY_LINK = 10, 11, 12, 23
+_FLAG_END = 0x08
+_REASON_CHR, _REASON_END = 0x02, 0x04
+_ERR_IO_TIMEOUT = 15
+_LAST_FRAGMENT = 0x80000000
+
+
+def xdr_opaque(data):
+    """XDR variable length opaque / string: length, data, zero padding to 4 bytes"""
+    data = bytes(data)
+    return struct.pack('>I', len(data)) + data + b'\0' * (-len(data) % 4)
+
+
+def rpc_record(message):
+    """one ONC RPC record over TCP (record marking, a single last fragment)"""
+    return struct.pack('>I', _LAST_FRAGMENT | len(message)) + message
+
+
+# ONC RPC over TCP 客户端, 只有 AUTH_NULL
+class _AsyncRpc():
+    def __init__(self, reader, writer, prog, vers) -> None:
+        self.reader = reader
+        self.writer = writer
+        self.prog = prog
+        self.vers = vers
+        self.xid = int.from_bytes(os.urandom(4), 'big')
+
+    async def _record(self):
+        data = b''
+        while True:
+            header = struct.unpack('>I', await self.reader.readexactly(4))[0]
+            data += await self.reader.readexactly(header & ~_LAST_FRAGMENT)
+            if header & _LAST_FRAGMENT:
+                return data
+
+    async def call(self, proc, args=b''):
+        """send one call and return the XDR encoded results"""
+        self.xid = (self.xid + 1) & 0xFFFFFFFF
+        self.writer.write(rpc_record(struct.pack('>6I4I', self.xid, 0, 2, self.prog, self.vers, proc,
+                                                 0, 0, 0, 0) + args))
+        await self.writer.drain()
+        while True:
+            data = await self._record()
+            xid, kind, stat = struct.unpack_from('>3I', data)
+            # 超时被取消的调用的迟到应答, 丢弃
+            if xid == self.xid and kind == 1:
+                break
+        if stat != 0:
+            raise ConnectionError('RPC call %d denied' % proc)
+        length = struct.unpack_from('>I', data, 16)[0]
+        pos = 20 + length + (-length % 4)
+        accept = struct.unpack_from('>I', data, pos)[0]
+        if accept != 0:
+            raise ConnectionError('RPC call %d failed, accept_stat %d' % (proc, accept))
+        return data[pos + 4:]
+
+    def close(self):
+        self.writer.close()
+
+
+def _vxi11_error(host, error):
+    if error == _ERR_IO_TIMEOUT:
+        return TimeoutError('%s: VXI-11 I/O timeout' % host)
+    return IOError('%s: VXI-11 error %d' % (host, error))
+
+
+class AsyncVxi11(_AsyncLan):
+    """SCPI over VXI-11 on the event loop, duck-typed as vxi11.Instrument with coroutines
+
+        dmm = await AsyncVxi11.open('192.168.12.50')
+        v = await dmm.ask('MEAS:VOLT:DC?')
+
+    The core channel port comes from the portmapper (TCP 111) of the host.
+    Abort and interrupt channels, device locking and SRQ are not used.
+    """
+    kind = 'vxi11'
+
+    def __init__(self, host, name='inst0', timeout=10.0) -> None:
+        _AsyncLan.__init__(self, timeout)
+        self.host = host
+        self.device = name
+        self.port = None
+        self.max_recv_size = 1 << 20
+        self._rpc = None
+        self._lid = None
+
+    @property
+    def name(self):
+        return '%s:%s' % (self.host, self.device)
+
+    @classmethod
+    async def open(cls, host, name='inst0', timeout=10.0, portmapper=PORTMAPPER_PORT):
+        """:portmapper: port of the host's portmapper"""
+        self = cls(host, name, timeout)
+        try:
+            await asyncio.wait_for(self._create_link(portmapper), timeout)
+        except BaseException:
+            await self.close()
+            raise
+        return self
+
+    async def _create_link(self, portmapper):
+        reader, writer = await asyncio.open_connection(self.host, portmapper)
+        pmap = _AsyncRpc(reader, writer, _PMAP_PROG, _PMAP_VERS)
+        try:
+            ret = await pmap.call(_PMAP_GETPORT, struct.pack('>4I', _CORE_PROG, _CORE_VERS, 6, 0))
+        finally:
+            pmap.close()
+        self.port = struct.unpack('>I', ret[:4])[0]
+        if not self.port:
+            raise ConnectionError('%s: no VXI-11 service registered' % self.host)
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        _nodelay(writer)
+        self._rpc = _AsyncRpc(reader, writer, _CORE_PROG, _CORE_VERS)
+        ret = await self._rpc.call(_CREATE_LINK, struct.pack('>iII', os.getpid() & 0x7FFFFFFF, 0, 0) +
+                                   xdr_opaque(self.device.encode('ascii')))
+        error, lid, abort_port, max_recv = struct.unpack('>iiII', ret[:16])
+        if error:
+            raise _vxi11_error(self.host, error)
+        self._lid = lid
+        self.max_recv_size = max_recv or self.max_recv_size
+
+    async def _call(self, proc, args):
+        # 仪器侧用 io_timeout 超时, 本地多等 1 s 以收到它的错误应答
+        return await asyncio.wait_for(self._rpc.call(proc, args), self.timeout + 1.0)
+
+    def _io_timeout(self):
+        return int(self.timeout * 1000)
+
+    async def write_raw(self, data):
+        data = bytes(data)
+        size = max(1, self.max_recv_size)
+        for start in range(0, max(len(data), 1), size):
+            chunk = data[start:start + size]
+            flags = _FLAG_END if start + size >= len(data) else 0
+            ret = await self._call(_DEVICE_WRITE, struct.pack('>iIIi', self._lid, self._io_timeout(), 0, flags) +
+                                   xdr_opaque(chunk))
+            error = struct.unpack('>i', ret[:4])[0]
+            if error:
+                raise _vxi11_error(self.host, error)
+
+    async def read_raw(self):
+        """one whole reply (up to END or the terminator character)"""
+        parts = []
+        while True:
+            ret = await self._call(_DEVICE_READ, struct.pack('>iIIIii', self._lid, 1 << 20, self._io_timeout(),
+                                                             0, 0, 0))
+            error, reason, length = struct.unpack('>iiI', ret[:12])
+            if error:
+                raise _vxi11_error(self.host, error)
+            parts.append(ret[12:12 + length])
+            if reason & (_REASON_END | _REASON_CHR):
+                return b''.join(parts)
+
+    async def close(self):
+        if self._rpc is None:
+            return
+        try:
+            if self._lid is not None:
+                await asyncio.wait_for(self._rpc.call(_DESTROY_LINK, struct.pack('>i', self._lid)), 1.0)
+        except (OSError, EOFError, asyncio.TimeoutError) as e:
+            from .Trace import debugPrint
+            debugPrint('%s: destroy_link: %s' % (self.host, e))
+        finally:
+            self._rpc.close()
+            self._rpc = self._lid = None
+
+
+async def open_lan_async(address, transport=None, timeout=10.0, portmapper=PORTMAPPER_PORT):
+    """asyncio connection for a LAN address (LanTransport.parse_address)
+
+        dmms = await asyncio.gather(*[open_lan_async(a) for a in addresses])
+        volts = await asyncio.gather(*[d.ask('READ?') for d in dmms])
+
+    :portmapper: portmapper port for vxi11
+    """
+    transport, host, where = lt.parse_address(address, transport)
+    if transport == 'socket':
+        return await AsyncScpiSocket.open(host, where, timeout)
+    if transport == 'hislip':
+        sub_address, _, port = where.partition(',')
+        return await AsyncHiSLIP.open(host, sub_address, int(port or lt.HISLIP_PORT), timeout)
+    return await AsyncVxi11.open(host, where, timeout, portmapper)
+
+
+# ---------------------------------------------------------------- asyncio 串口
+
+# 串口命令/应答收发, 按结束符分帧, 在事件循环中等待
+class AsyncSerial():
+    """SerialLink on the event loop: the reply is awaited, not polled
+
+        link = await AsyncSerial.open('/dev/ttyUSB0', 9600, eol=b'\\r\\n')
+        temp = await link.query('t')
+
+    On POSIX the port is read without blocking when the loop reports it
+    readable (loop.add_reader); where that is not available (Windows
+    proactor loop) each read waits in an executor thread instead.
+    """
+
+    def __init__(self, session, eol=b'\r\n', term=b'\n', timeout=1.0, encoding='ascii', name=None) -> None:
+        """same arguments as SerialLink, session an opened serial.Serial"""
+        self.session = session
+        self.name = '%s@%s' % (name or 'serial', getattr(session, 'port', '?'))
+        self.eol = eol
+        self.term = term
+        self.timeout = timeout
+        self.encoding = encoding
+        self._buf = bytearray()
+        self._lock = None       # asyncio.Lock, 在事件循环中创建
+        self._selectable = os.name == 'posix' and hasattr(session, 'fileno')
+
+    @classmethod
+    async def open(cls, port, baudrate=9600, **kwargs):
+        """serial.Serial(port, baudrate) wrapped, kwargs as for __init__"""
+        return cls(serial.Serial(port, baudrate, timeout=0), **kwargs)
+
+    @property
+    def lock(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    def _send(self, cmd):
+        if isinstance(cmd, str):
+            cmd = cmd.encode(self.encoding)
+        if not cmd.endswith(self.eol):
+            cmd = cmd.rstrip(b'\r\n') + self.eol
+        self.session.write(cmd)
+
+    async def _readable(self):
+        loop = asyncio.get_running_loop()
+        fd = self.session.fileno()
+        ready = loop.create_future()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await ready
+        finally:
+            loop.remove_reader(fd)
+
+    async def _read_some(self):
+        if self._selectable:
+            if self.session.timeout != 0:
+                self.session.timeout = 0
+            try:
+                await self._readable()
+                return self.session.read(max(1, self.session.in_waiting))
+            except NotImplementedError:
+                self._selectable = False
+        # 不能注册读事件的事件循环: 在线程中等待, 每次最多 50 ms
+        if self.session.timeout != 0.05:
+            self.session.timeout = 0.05
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self.session.read(max(1, self.session.in_waiting)))
+
+    async def write(self, cmd):
+        """send one command, the terminator is appended if missing"""
+        start = time.perf_counter()
+        async with self.lock:
+            self._send(cmd)
+        if tracer.enabled:
+            tracer.record('serial', self.name, 'write', cmd, start, time.perf_counter())
+
+    async def write_raw(self, data: bytes):
+        """send bytes exactly as given"""
+        start = time.perf_counter()
+        async with self.lock:
+            self.session.write(data)
+        if tracer.enabled:
+            tracer.record('serial', self.name, 'write_raw', data, start, time.perf_counter())
+
+    async def readline(self, timeout=None):
+        """read one reply line (terminator included) before the deadline"""
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        buf = self._buf
+        while True:
+            end = buf.find(self.term)
+            if end >= 0:
+                line = bytes(buf[:end + len(self.term)])
+                del buf[:end + len(self.term)]
+                return line
+            remain = deadline - loop.time()
+            if remain <= 0:
+                line = bytes(buf)
+                buf.clear()
+                raise serial.SerialTimeoutException(
+                    'no complete reply within %.3f s, got %r' % (timeout, line))
+            try:
+                buf += await asyncio.wait_for(self._read_some(), remain)
+            except asyncio.TimeoutError:
+                pass
+
+    async def query(self, cmd, timeout=None):
+        """send a command and return its reply without the terminator"""
+        start = time.perf_counter()
+        try:
+            async with self.lock:
+                # 丢弃上一条命令残留的应答
+                self.session.reset_input_buffer()
+                self._buf.clear()
+                self._send(cmd)
+                line = await self.readline(timeout)
+        except Exception as e:
+            if tracer.enabled:
+                tracer.record('serial', self.name, 'query', cmd, start, time.perf_counter(), None, type(e).__name__)
+            raise
+        if tracer.enabled:
+            tracer.record('serial', self.name, 'query', cmd, start, time.perf_counter(), len(line))
+        return line.decode(self.encoding).rstrip('\r\n')
+
+    async def close(self):
+        self.session.close()
@@ -0,0 +1,519 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   Bench.py
+@Time    :   2026/10/18 17:48:53
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import numpy as np
+from . import InstrProfile
+from .InstrSim import Latency, ThermalPlant, SerialSim, ScpiServer, SimResourceManager, I2cSlaveSim, make, attach, usb2iic
+
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# 典型链路延时, 宏基准使用
+LAN = Latency(0.0003, 0.00005, 1e-8, seed=1)            # VXI-11 / VISA over LAN
+SERIAL_9600 = Latency(0.005, 0.001, 0.00104, seed=2)    # 9600 baud
+I2C_100K = Latency(0.001, 0.0001, 0.00009, seed=3)      # FTDI USB 帧 + 100 kHz 总线
+
+# (模块, 类, 传输)
+DRIVERS = [
+    ('PwrSupply', 'DP800', 'vxi11'),
+    ('PwrSupply', 'GPD_X303X', 'serial'),
+    ('ElecLoad', 'DL3000', 'vxi11'),
+    ('MultiMeter', 'KEYSIGHT_344X', 'vxi11'),
+    ('MultiMeter', 'SDM3065', 'vxi11'),
+    ('MultiMeter', 'AGILENT_344X', 'serial'),
+    ('Osc', 'GDS_2000x', 'serial'),
+    ('Osc', 'LECROY_HD9000', 'vxi11'),
+    ('Osc', 'SDS2504X', 'vxi11'),
+    ('WaveGen', 'SDG6000X_E', 'vxi11'),
+    ('OilSink', 'ZCTB_400L', 'serial'),
+    ('Instruments', 'DigitalMultimeterSDM3065X', 'visa'),
+    ('Instruments', 'Keysight34461A', 'visa'),
+    ('Instruments', 'SDG7102A', 'visa'),
+    ('Instruments', 'OscilloscopeSDS2504X', 'visa'),
+    ('Instruments', 'LECROY_HD9000', 'vxi11'),
+    ('Instruments', 'DP832A', 'visa'),
+    ('Instruments', 'SPD3303X', 'visa'),
+    ('Instruments', 'GPO_2303S', 'visa'),
+    ('Instruments', 'B2902B', 'visa'),
+    ('Instruments', 'DL3021A', 'visa'),
+    ('Instruments', 'ZCTB', 'serial'),
+    ('Instruments', 'TEMP_BOX', 'serial'),
+    ('Instruments', 'ATS5XX', 'serial'),
+    ('Instruments', 'ZCTB_400L', 'serial'),
+    ('FtdiUsbI2c', 'USB2IIC', 'i2c'),
+]
+
+# 方法参数, 'Class.method' 优先于 'method'; 多余的参数按签名截断
+ARGS = {
+    'SelectChnnl': (1,), 'outputOn': (1,), 'outputOff': (1,), 'OutputSta': (1,), 'GetChnnlAll': (1,),
+    'voltRead': (1,), 'currentRead': (1,), 'powerRead': (1,), 'voltSet': (1, 3.3), 'currentSet': (1, 0.5),
+    'voltSetGet': (1,), 'currentSetGet': (1,), 'voltage_cuurent_Set': (1, 3.3, 0.5),
+    'setmode': ('CURR',), 'setModeRange': ('CURR', 4), 'getModeRange': ('CURR',),
+    'setModeValue': ('CURR', 0.5), 'getsetModeValue': ('CURR',), 'setModeCurretLimit': ('VOLT', 1),
+    'getsetModeCurrentLimit': ('VOLT',), 'setModeVolLimit': ('CURR', 10), 'getsetModeVolLimit': ('CURR',),
+    'CCmodeVon': (0.5,), 'TRANsform': ('OFF',), 'SampleCount': (10,),
+    'saveImage': ('bench',), 'setLabel': (1, 'VOUT'), 'setLabelDispOn': (1,), 'setLabelDispOff': (1,),
+    'setVerticalPos': (1, 0.0), 'setVerticalScale': (1, 0.5), 'setHorizontalPos': (0.0,),
+    'setHorizontalScale': (1e-3,), 'setZoomPos': (0.0,), 'setZoomScale': (1e-4,), 'setTrigLevel': ('C1', 0.5),
+    'GDS_2000x.setTrigLevel': (0.5,),
+    'setOffset': (1, 0.0), 'setTimeDiv': (1e-3,), 'setVoltDiv': (1, 0.5), 'setTrigTypeSrc': ('EDGE', 'C1'),
+    'setTrigSlope': ('C1', 'POS'), 'setDispOn': (1,), 'setDispOff': (1,), 'getParameterCustom': (1,),
+    'deletePACU': (1,), 'setParameterCustom': (1, 'MAX', 1), 'getValuePACU': ('MAX', 1),
+    'saveScreenImg': ('D:\\', 'bench'), 'getWaveform': (1,), 'setEdgeLevel': (0.5,), 'setEdgeSlope': ('RISing',),
+    'SaveImage': ('local/bench.png',),
+    'WaveType': (1, 'SINE'), 'Frequency': (1, 1000), 'Period': (1, 1e-3), 'Amplitude': (1, 1.0),
+    'Offset': (1, 0.0), 'Duty': (1, 50), 'Time_Rise': (1, 1e-6), 'Time_Fall': (1, 1e-6), 'HighLevel': (1, 1.0),
+    'LowLevel': (1, 0.0), 'getchnnlStatus': (1,), 'SetARB': (1, 'ramp1'), 'GetARB': (1,),
+    'set_temp': (25,), 'set_sr': (10,), 'set_cool': ('auto',), 'ATS5XX.set_temp': (2, -40),
+    'set_wvtp': (1, 'SINE'), 'set_freq': (1, 1000), 'get_measure': (1,),
+    'set_voltage_current': (1, 3.3), 'channel_state': (1, 'ON'), 'GPO_2303S.channel_state': ('ON',),
+    'set_voltage': (1, 3.3), 'set_current': (1, 0.01), 'set_state': (1, 'ON'), 'meas_set': (1,),
+    'get_curr': (1,), 'get_volt': (1,),
+    'setSla': (0x5C,), 'readBytes': (0x10,), 'readBytes1': (0x10,), 'writeBytes': (0x10, 0x55),
+    'writeBytes1': (0x10, 0x55), 'writeBits': ('0x10[7:6]', 2), 'writeBits1': ('0x10[7:6]', 2),
+    'readBits': ('0x10[7:6]',), 'readBits1': ('0x10[7:6]',), 'singleWrite': ([0x10],), 'singleWrite1': ([0x10],),
+}
+
+# 不测: 连接/总线扫描/通用底层接口, 以及需要真实硬件的 GPIO
+SKIP = {'instr_initial', 'list_connected_devices', 'connect', 'batch', 'write_command', 'query_command',
+        'registerMap', 'setSpeed', 'setGpioMode', 'writeGpio', 'readGpio'}
+
+
+@contextlib.contextmanager
+def isolated():
+    """run benchmarks on an in-memory profile cache and a simulated VISA manager, restored afterwards"""
+    # 仿真仪器的 profile 只留在内存, 不写入用户的缓存文件
+    from . import Instruments
+    saved = (InstrProfile.CACHE, InstrProfile._data, dict(InstrProfile._profiles),
+             Instruments._rm, Instruments._resources, Instruments._resources_time)
+    InstrProfile.CACHE, InstrProfile._data = None, None
+    InstrProfile._profiles.clear()
+    try:
+        yield
+    finally:
+        InstrProfile.CACHE, InstrProfile._data = saved[:2]
+        InstrProfile._profiles.clear()
+        InstrProfile._profiles.update(saved[2])
+        Instruments._rm, Instruments._resources, Instruments._resources_time = saved[3:]
+
+
+# 统计驱动中的 time.sleep (仿真延时不计入), 只在 measure() 的计时段内替换
+class SleepMeter():
+    def __init__(self) -> None:
+        self.total = 0.0
+        self._orig = None
+
+    def _sleep(self, seconds):
+        self.total += seconds
+        self._orig(seconds)
+
+    def __enter__(self):
+        self._orig = time.sleep
+        time.sleep = self._sleep
+        return self
+
+    def __exit__(self, *exc):
+        time.sleep = self._orig
+        self._orig = None
+
+
+def _counts(sims):
+    tx = nbytes = 0
+    for sim in sims:
+        tx += sim.messages if hasattr(sim, 'messages') else sim.transactions
+        nbytes += sim.nbytes
+    return tx, nbytes
+
+
+# 被测仪器: 驱动对象 + 仿真端
+class Target():
+    def __init__(self, obj, sims, servers=None) -> None:
+        self.obj = obj
+        self.sims = sims
+        self.servers = servers or []    # SerialSim / ScpiServer
+
+    def drain(self):
+        for s in self.servers:
+            s.drain()
+
+    def close(self):
+        for s in self.servers:
+            s.close()
+
+
+_sim_ip = [0]
+
+
+def build(module, clsname, transport, latency=None):
+    """driver object of module.clsname on a simulated transport, call inside isolated()"""
+    mod = importlib.import_module('.' + module, __package__)
+    cls = getattr(mod, clsname)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if transport == 'i2c':
+            slave = I2cSlaveSim(latency=latency)
+            return Target(usb2iic(slave=slave), [slave])
+        device = make(clsname, latency, plant=ThermalPlant(noise=0.0, seed=0))
+        # 每个目标一个地址, profile 按地址缓存
+        _sim_ip[0] += 1
+        addr = '10.0.%d.%d' % divmod(_sim_ip[0], 250)
+        if transport == 'vxi11':
+            return Target(attach(cls('sim-' + addr), device), [device])
+        if transport == 'serial':
+            sim = SerialSim(device)
+            return Target(cls(sim.port), [device], [sim])
+        if transport in ('socket', 'hislip'):
+            server = ScpiServer(device, transport)
+            return Target(cls(server.address), [device], [server])
+        from . import Instruments
+        rm = Instruments._rm
+        if not isinstance(rm, SimResourceManager):
+            rm = Instruments._rm = SimResourceManager()
+        rm.resources['TCPIP0::%s::inst0::INSTR' % addr] = device
+        Instruments.list_resources(refresh=True)
+        obj = cls('IP:' + addr)
+        if obj.inst is None:
+            obj.instr_initial()     # DL3021A 需要先 connect()
+        return Target(obj, [device])
+
+
+def _args(cls, name, func):
+    args = ARGS.get('%s.%s' % (cls.__name__, name), ARGS.get(name, ()))
+    params = list(inspect.signature(func).parameters.values())[1:]
+    required = [p for p in params if p.default is p.empty and p.kind == p.POSITIONAL_OR_KEYWORD]
+    if len(args) < len(required):
+        return None
+    return tuple(args[:len(params)])
+
+
+def methods(cls):
+    """(name, args) of the benchmarked public methods of cls, args None if unknown"""
+    out = []
+    for name, func in vars(cls).items():
+        if name.startswith('_') or name in SKIP or not inspect.isfunction(func):
+            continue
+        out.append((name, _args(cls, name, func)))
+    return out
+
+
+def measure(call, target, repeat):
+    """run call repeat times, return the per call statistics
+
+    A warm-up call comes first, so the figures are for the steady state
+    (settings already cached in the driver shadows are not resent).
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        call()                                  # 预热, 建立影子/缓存状态
+        target.drain()
+        for sim in target.sims:
+            sim.reset_stats()
+        times = []
+        with SleepMeter() as sleeps:
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                call()
+                times.append(time.perf_counter() - t0)
+                target.drain()
+    tx, nbytes = _counts(target.sims)
+    times = np.array(times) * 1e3
+    return {'calls': repeat, 'tx': tx / repeat, 'bytes': nbytes / repeat, 'sleep_ms': sleeps.total / repeat * 1e3,
+            'p50_ms': float(np.percentile(times, 50)), 'p99_ms': float(np.percentile(times, 99))}
+
+
+def micro(repeat=20, latency=None, select=None):
+    """every public method of every driver, one call at a time
+
+    :return: ({'module.Class.method': stats}, ['module.Class.method: reason' skipped])
+    """
+    results, skipped = {}, []
+    with isolated():
+        for module, clsname, transport in DRIVERS:
+            prefix = '%s.%s' % (module, clsname)
+            if select and not any(s in prefix for s in select):
+                continue
+            target = build(module, clsname, transport, latency)
+            try:
+                for name, args in methods(type(target.obj)):
+                    key = '%s.%s' % (prefix, name)
+                    if args is None:
+                        skipped.append('%s: no arguments known' % key)
+                        continue
+                    func = getattr(target.obj, name)
+                    try:
+                        results[key] = measure(lambda: func(*args), target, repeat)
+                    except Exception as e:
+                        skipped.append('%s: %s: %s' % (key, type(e).__name__, e))
+            finally:
+                target.close()
+    return results, skipped
+
+
+# ---------------------------------------------------------------- macro
+
+def sweep_psu_dmm(points=100):
+    """100 point PSU voltage sweep with a DMM reading and the PSU current at every point"""
+    from .SweepEngine import Sweep
+    psu = build('PwrSupply', 'DP800', 'vxi11', LAN)
+    dmm = build('MultiMeter', 'SDM3065', 'vxi11', LAN)
+    sweep = Sweep(grid={'vin': np.linspace(1.0, 5.0, points)},
+                  sources={'vin': lambda v: psu.obj.voltSet(1, v)},
+                  readers={'vout': dmm.obj.measureVolt, 'iin': lambda: psu.obj.currentRead(1)})
+    return sweep.run, Target(None, psu.sims + dmm.sims)
+
+
+def waveform_1m():
+    """1M point byte waveform fetched and scaled to volts"""
+    osc = build('Osc', 'SDS2504X', 'vxi11', LAN)
+    return lambda: osc.obj.getWaveform(1).volts, osc
+
+
+def waveform_1m_lan(transport):
+    """the waveform_1m read over a local raw socket / HiSLIP server (real loopback I/O)"""
+    def scenario():
+        osc = build('Osc', 'SDS2504X', transport)
+        return lambda: osc.obj.getWaveform(1).volts, osc
+    return scenario
+
+
+def query_1000(transport):
+    """1000 short queries over a local server, the per-message cost of the transport"""
+    def scenario():
+        psu = build('PwrSupply', 'DP800', transport)
+
+        def run():
+            for _ in range(1000):
+                psu.obj.session.ask('*IDN?')
+        return run, psu
+    return scenario
+
+
+def dmm_stats_10k(count=10000):
+    """mean / sdev / min / max of 10k DMM readings, computed in the meter"""
+    dmm = build('Instruments', 'Keysight34461A', 'visa', LAN)
+    return lambda: dmm.obj.statistics(count, plc=0.02), dmm
+
+
+def _fields(count, seed=0):
+    rand = random.Random(seed)
+    fields = []
+    for _ in range(count):
+        msb = rand.randrange(8)
+        lsb = rand.randrange(msb + 1)
+        fields.append(('0x%02X[%d:%d]' % (rand.randrange(256), msb, lsb), rand.randrange(1 << (msb - lsb + 1))))
+    return fields
+
+
+def i2c_fields_writebits(count=1000):
+    """count field writes, one read-modify-write per field"""
+    iic = build('FtdiUsbI2c', 'USB2IIC', 'i2c', I2C_100K)
+    fields = _fields(count)
+
+    def run():
+        for f, v in fields:
+            iic.obj.writeBits(f, v)
+    return run, iic
+
+
+def i2c_fields_regmap(count=1000):
+    """count field writes staged in a RegMap and flushed in bursts"""
+    iic = build('FtdiUsbI2c', 'USB2IIC', 'i2c', I2C_100K)
+    fields = _fields(count)
+
+    def run():
+        with iic.obj.registerMap() as regs:
+            for f, v in fields:
+                regs.setBits(f, v)
+    return run, iic
+
+
+SCENARIOS = {
+    'sweep100_psu_dmm': sweep_psu_dmm,
+    'waveform_1m': waveform_1m,
+    'waveform_1m_socket': waveform_1m_lan('socket'),
+    'waveform_1m_hislip': waveform_1m_lan('hislip'),
+    'query1000_socket': query_1000('socket'),
+    'query1000_hislip': query_1000('hislip'),
+    'dmm_stats10k': dmm_stats_10k,
+    'i2c1000_writeBits': i2c_fields_writebits,
+    'i2c1000_regmap': i2c_fields_regmap,
+}
+
+
+def macro(repeat=3, select=None):
+    results = {}
+    with isolated():
+        for name, scenario in SCENARIOS.items():
+            if select and not any(s in name for s in select):
+                continue
+            call, target = scenario()
+            try:
+                results['macro.' + name] = measure(call, target, repeat)
+            finally:
+                target.close()
+    return results
+
+
+# ---------------------------------------------------------------- import
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+IMPORTS = ['uim_ee'] + sorted(set(module for module, clsname, transport in DRIVERS))
+
+# 驱动模块只计自身加载的模块, 包本身 (import.uim_ee) 先导入
+_IMPORT_CHILD = """
+import importlib, json, sys, time
+sys.path.insert(0, %r)
+if %r:
+    import uim_ee
+n = len(sys.modules)
+t0 = time.perf_counter()
+importlib.import_module(%r)
+print(json.dumps([time.perf_counter() - t0, len(sys.modules) - n]))
+"""
+
+
+def import_times(repeat=5, select=None):
+    """cost of a cold import of the package and of each driver module
+
+    Every import runs in a fresh interpreter. tx is the number of modules
+    the import loads, so a new eager dependency fails --check.
+    """
+    results = {}
+    for name in IMPORTS:
+        key = 'import.' + name
+        if select and not any(s in key for s in select):
+            continue
+        times, loaded = [], 0
+        for _ in range(repeat):
+            qualified = name if name == 'uim_ee' else 'uim_ee.' + name
+            code = _IMPORT_CHILD % (os.path.dirname(HERE), name != 'uim_ee', qualified)
+            out = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                 cwd=os.path.dirname(HERE), check=True).stdout
+            t, loaded = json.loads(out.strip().splitlines()[-1])
+            times.append(t * 1e3)
+        results[key] = {'calls': repeat, 'tx': loaded, 'bytes': 0, 'sleep_ms': 0.0,
+                        'p50_ms': float(np.percentile(times, 50)), 'p99_ms': float(np.percentile(times, 99))}
+    return results
+
+
+# ---------------------------------------------------------------- baseline
+
+def save(results, path=BASELINE):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=1, sort_keys=True)
+
+
+def load(path=BASELINE):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _group(key):
+    # micro 用例的键为 '模块.类.方法'
+    prefix = key.split('.', 1)[0]
+    return prefix if prefix in ('macro', 'import') else 'micro'
+
+
+def _speed(results, baseline, group):
+    # 本机相对基准机的速度: 同组各用例 p50 比值的中位数
+    ratios = [results[k]['p50_ms'] / baseline[k]['p50_ms'] for k in results
+              if _group(k) == group and k in baseline and baseline[k]['p50_ms'] > 0]
+    return float(np.median(ratios)) if ratios else 1.0
+
+
+def check(results, baseline, timing=False, tol=0.5, slack_ms=0.5):
+    """regressions of results against baseline
+
+    Transactions may not grow at all, bytes by at most 10 %. These counts
+    do not depend on the machine. With timing, the p50 latency of a case
+    may grow by at most tol + slack_ms relative to the others in its group
+    (micro / macro / import): the baseline is first scaled by the median
+    ratio of the group, so a slower or faster host does not fail the check.
+    """
+    bad = []
+    speed = {g: _speed(results, baseline, g) for g in ('micro', 'macro', 'import')}
+    for key, cur in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if cur['tx'] > base['tx'] + 1e-9:
+            bad.append('%s: transactions %.2f -> %.2f' % (key, base['tx'], cur['tx']))
+        if cur['bytes'] > base['bytes'] * 1.1 + 1:
+            bad.append('%s: bytes %.0f -> %.0f' % (key, base['bytes'], cur['bytes']))
+        scale = speed[_group(key)]
+        if timing and cur['p50_ms'] > base['p50_ms'] * scale * (1 + tol) + slack_ms:
+            bad.append('%s: p50 %.3f ms -> %.3f ms (%.3f ms expected on this host)' % (
+                key, base['p50_ms'], cur['p50_ms'], base['p50_ms'] * scale))
+    return bad
+
+
+def report(results, out=sys.stdout):
+    width = max([len(k) for k in results] + [10])
+    out.write('%-*s %8s %10s %10s %10s %10s\n' % (width, 'case', 'tx/call', 'bytes/call', 'sleep ms', 'p50 ms', 'p99 ms'))
+    for key, r in results.items():
+        out.write('%-*s %8.2f %10.0f %10.3f %10.3f %10.3f\n' % (
+            width, key, r['tx'], r['bytes'], r['sleep_ms'], r['p50_ms'], r['p99_ms']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='uim_ee driver benchmarks against simulated instruments')
+    parser.add_argument('-k', dest='select', action='append', help='only cases containing this text')
+    parser.add_argument('--repeat', type=int, default=20, help='calls per method')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated latency per transaction, s')
+    parser.add_argument('--no-micro', action='store_true')
+    parser.add_argument('--no-macro', action='store_true')
+    parser.add_argument('--no-imports', action='store_true')
+    parser.add_argument('--save', action='store_true', help='store the results as the baseline')
+    parser.add_argument('--check', action='store_true', help='fail on regressions against the baseline')
+    parser.add_argument('--timing', action='store_true',
+                        help='with --check, also compare latencies (relative to the other cases)')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args(argv)
+
+    results = {}
+    skipped = []
+    if not args.no_micro:
+        latency = Latency(args.latency) if args.latency else None
+        results, skipped = micro(args.repeat, latency, args.select)
+    if not args.no_macro:
+        results.update(macro(select=args.select))
+    if not args.no_imports:
+        results.update(import_times(select=args.select))
+    report(results)
+    for s in skipped:
+        print('skipped %s' % s)
+    if args.json:
+        save(results, args.json)
+    if args.save:
+        baseline = load(args.baseline) if os.path.exists(args.baseline) else {}
+        baseline.update(results)
+        save(baseline, args.baseline)
+    if args.check:
+        bad = check(results, load(args.baseline), args.timing)
+        for b in bad:
+            print('REGRESSION %s' % b)
+        return 1 if bad else 0
+    return 0
+
+
+# main函数: 在仓库根目录运行 python -m uim_ee.Bench --check
+if __name__ == "__main__":
+    sys.exit(main())
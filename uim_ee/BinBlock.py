@@ -0,0 +1,35 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   BinBlock.py
+@Time    :   2026/10/18 10:02:17
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+
+# IEEE 488.2 二进制数据块
+def parse_block(raw):
+    """return the payload of a definite-length block as a memoryview
+
+    :raw: bytes as read from the instrument, e.g. b'C1:WF DAT1,#9000001000....\\n'
+          any response header before '#' is skipped, nothing is copied
+    """
+    start = raw.index(b'#')
+    ndig = int(raw[start+1:start+2])
+    if ndig == 0:
+        # #0 不定长数据块, 以结束符结尾
+        return memoryview(raw)[start+2:len(raw.rstrip(b'\n'))]
+    length = int(raw[start+2:start+2+ndig])
+    begin = start + 2 + ndig
+    if len(raw) < begin + length:
+        raise ValueError('block truncated: header says %d bytes, got %d' % (length, len(raw) - begin))
+    return memoryview(raw)[begin:begin+length]
+
+
+def make_block(payload):
+    """payload wrapped as a definite-length block, e.g. b'#15hello'"""
+    digits = str(len(payload))
+    return ('#%d%s' % (len(digits), digits)).encode() + bytes(payload)
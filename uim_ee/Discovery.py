@@ -0,0 +1,315 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   Discovery.py
+@Time    :   2026/10/19 00:41:25
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import ipaddress
+import json
+import os
+import re
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from .Trace import debugPrint
+
+
+CACHE = os.path.join(os.path.expanduser('~'), '.uim_ee', 'discovery.json')
+
+# 应答 -> 各接入方式的驱动 '模块.类'; lan: vxi11 驱动, 按顺序取第一个匹配
+FINGERPRINTS = [
+    (r'RIGOL.*,DP8\d\d', {'lan': 'PwrSupply.DP800', 'visa': 'Instruments.DP832A'}),
+    (r'RIGOL.*,DL30\d\d', {'lan': 'ElecLoad.DL3000', 'visa': 'Instruments.DL3021A'}),
+    (r'(Keysight|Agilent).*,3446\d', {'lan': 'MultiMeter.KEYSIGHT_344X', 'visa': 'Instruments.Keysight34461A'}),
+    (r'(HEWLETT-PACKARD|Agilent).*,344\d\d', {'serial': 'MultiMeter.AGILENT_344X', 'lan': 'MultiMeter.KEYSIGHT_344X'}),
+    (r'Siglent.*,SDM30\d\d', {'lan': 'MultiMeter.SDM3065', 'visa': 'Instruments.DigitalMultimeterSDM3065X'}),
+    (r'Siglent.*,SDS2\d\d\d', {'lan': 'Osc.SDS2504X', 'visa': 'Instruments.OscilloscopeSDS2504X'}),
+    (r'Siglent.*,SDG6\d\d\dX-E', {'lan': 'WaveGen.SDG6000X_E'}),
+    (r'Siglent.*,SDG7\d\d\d', {'visa': 'Instruments.SDG7102A'}),
+    (r'Siglent.*,SPD3303', {'visa': 'Instruments.SPD3303X'}),
+    (r'LECROY,(HDO|WAVEPRO|WP)', {'lan': 'Osc.LECROY_HD9000'}),
+    (r'Keysight.*,B29\d\d', {'visa': 'Instruments.B2902B'}),
+    (r'GW.*,GPD-\d303S', {'visa': 'Instruments.GPO_2303S', 'serial': 'PwrSupply.GPD_X303X'}),
+    (r'GW.*,GPD-\d303', {'serial': 'PwrSupply.GPD_X303X'}),
+    (r'GW.*,GDS-2', {'serial': 'Osc.GDS_2000x'}),
+    # 串口温控设备, *ver / TEMP? 的应答
+    (r'ver:.*400L', {'serial': 'OilSink.ZCTB_400L'}),
+    (r'ver:.*ZCTB', {'serial': 'Instruments.ZCTB'}),
+    (r'ver:', {'serial': 'Instruments.TEMP_BOX'}),
+    (r'^[-+]?\d+\.\d+$', {'serial': 'Instruments.ATS5XX'}),
+]
+
+# 串口依次尝试的查询: (命令, 应答的识别式)
+SERIAL_PROBES = [
+    (b'*IDN?', r'.+,.+,'),
+    (b'*ver', r'ver:'),
+    (b'TEMP?', r'^[-+]?\d+\.\d+$'),
+]
+
+
+# 发现的一台仪器
+class Found():
+    __slots__ = ('driver', 'address', 'idn', 'transport', 'resource', 'port', 'seconds')
+
+    def __init__(self, driver, address, idn, transport, resource, port=None, seconds=0.0) -> None:
+        self.driver = driver        # '模块.类', 未识别为 None
+        self.address = address      # 驱动构造参数: IP / 'IP:x' / 'COM3' ...
+        self.idn = idn
+        self.transport = transport  # 'lan', 'visa', 'serial'
+        self.resource = resource    # 探测时的资源名 / 主机 / 串口
+        self.port = port            # lan: 5025 或 111 (vxi11 portmapper)
+        self.seconds = seconds      # 探测用时
+
+    @property
+    def serial(self):
+        """serial number field of *IDN?, '' if none"""
+        fields = self.idn.split(',')
+        return fields[2].strip() if len(fields) > 2 else ''
+
+    def open(self):
+        """construct the driver for this instrument"""
+        if self.driver is None:
+            raise LookupError('no driver known for %r' % self.idn)
+        from .Registry import driver
+        return driver(self.driver)(self.address)
+
+    def to_dict(self):
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def __repr__(self):
+        return 'Found(%s %r, %s %s)' % (self.driver, self.address, self.transport, self.idn)
+
+
+def _match(idn, transport):
+    # (驱动, 其接入方式) 或 (None, None)
+    for pattern, drivers in FINGERPRINTS:
+        if re.search(pattern, idn, re.I):
+            if transport in drivers:
+                return drivers[transport], transport
+            other = {'lan': 'visa', 'visa': 'lan'}.get(transport)
+            if other in drivers:
+                return drivers[other], other
+    return None, None
+
+
+def match(idn, transport):
+    """the driver ('module.Class') for an identification reply on a transport, or None
+
+    A LAN instrument without a vxi11 driver is given its VISA driver, a
+    VISA LAN resource without a VISA driver its vxi11 driver.
+    """
+    return _match(idn, transport)[0]
+
+
+def _found(idn, transport, resource, port=None, seconds=0.0):
+    driver, kind = _match(idn, transport)
+    m = re.match(r'TCPIP\d*::([^:]+)::', resource, re.I)
+    host = resource if transport == 'lan' else m.group(1) if m else None
+    # 驱动的构造参数: vxi11 驱动用主机, VISA 驱动用 'IP:x' / 'GPIB:n' / 资源名
+    if kind == 'lan':
+        if host is None:
+            driver = None       # USB 等 VISA 资源无法用 vxi11 驱动
+        address = host or resource
+    elif kind == 'visa':
+        m = re.match(r'GPIB\d*::(\d+)::', resource, re.I)
+        address = 'IP:' + host if host else 'GPIB:' + m.group(1) if m else resource
+    else:
+        address = host or resource
+    return Found(driver, address, idn, transport, resource, port, seconds)
+
+
+# ---------------------------------------------------------------- LAN
+
+def local_subnet(prefix=24):
+    """the /prefix network of the interface holding the default route"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(('10.255.255.255', 1))    # 不发送数据, 只选路
+        ip = s.getsockname()[0]
+    finally:
+        s.close()
+    return ipaddress.ip_network('%s/%d' % (ip, prefix), strict=False)
+
+
+def _port_open(host, port, timeout):
+    try:
+        socket.create_connection((host, port), timeout).close()
+        return True
+    except OSError:
+        return False
+
+
+def _ask_socket(host, port, timeout):
+    with socket.create_connection((host, port), timeout) as s:
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        s.sendall(b'*IDN?\n')
+        data = b''
+        while not data.endswith(b'\n'):
+            chunk = s.recv(4096)
+            if not chunk:
+                break
+            data += chunk
+    return data.decode('latin-1').strip()
+
+
+def _ask_vxi11(host, timeout):
+    import vxi11
+    inst = vxi11.Instrument(host)
+    inst.timeout = timeout
+    try:
+        return inst.ask('*IDN?').strip()
+    finally:
+        inst.close()
+
+
+def probe_host(host, timeout=0.3, reply_timeout=1.0):
+    """Found for an instrument at host (raw SCPI port 5025 or VXI-11), None if nothing answers"""
+    host = str(host)
+    start = time.monotonic()
+    for port in (5025, 111):
+        if not _port_open(host, port, timeout):
+            continue
+        try:
+            idn = _ask_socket(host, port, reply_timeout) if port == 5025 else _ask_vxi11(host, reply_timeout)
+        except Exception as e:
+            debugPrint('discovery %s:%d: %s' % (host, port, e))
+            continue
+        if idn:
+            return _found(idn, 'lan', host, port, time.monotonic() - start)
+    return None
+
+
+# ---------------------------------------------------------------- VISA / serial
+
+def probe_visa(rm, resource, timeout=1.0):
+    start = time.monotonic()
+    try:
+        inst = rm.open_resource(resource, open_timeout=int(timeout * 1000))
+    except Exception as e:
+        debugPrint('discovery %s: %s' % (resource, e))
+        return None
+    try:
+        inst.timeout = int(timeout * 1000)
+        idn = inst.query('*IDN?').strip()
+    except Exception as e:
+        debugPrint('discovery %s: %s' % (resource, e))
+        return None
+    finally:
+        inst.close()
+    return _found(idn, 'visa', resource, seconds=time.monotonic() - start) if idn else None
+
+
+def probe_serial(port, timeout=0.3, baudrate=9600):
+    """try the SERIAL_PROBES queries on a port, Found for the first reply with a known driver
+
+    A reply without a known driver is kept (driver None) unless a later probe is recognized.
+    """
+    import serial
+    start = time.monotonic()
+    try:
+        session = serial.Serial(port, baudrate, timeout=timeout)
+    except Exception as e:
+        debugPrint('discovery %s: %s' % (port, e))
+        return None
+    unknown = None
+    try:
+        for command, expect in SERIAL_PROBES:
+            session.reset_input_buffer()
+            session.write(command + b'\r\n')
+            reply = session.readline().decode('latin-1', 'replace').strip()
+            if not reply or not re.search(expect, reply, re.I):
+                continue
+            found = _found(reply, 'serial', port, seconds=time.monotonic() - start)
+            if found.driver is not None:
+                return found
+            unknown = unknown or found
+    except Exception as e:
+        debugPrint('discovery %s: %s' % (port, e))
+    finally:
+        session.close()
+    return unknown
+
+
+def serial_ports():
+    from serial.tools import list_ports
+    return [p.device for p in list_ports.comports()]
+
+
+# ---------------------------------------------------------------- 入口
+
+def discover(subnet=None, visa=True, ports=None, timeout=0.3, workers=128, cache=CACHE, max_age=None):
+    """find the instruments on the LAN, VISA and serial ports, all probed concurrently
+
+        for f in discover('192.168.12.0/24'):
+            print(f.driver, f.address, f.idn)
+        psu = find('DP8B000000001')[0].open()
+
+    :subnet: network to scan ('192.168.12.0/24'), None for the local /24
+             (skipped without a default route), False to skip
+    :visa: probe the VISA resources (serial ASRL ones are left to the serial probe)
+    :ports: serial ports to probe, None for all, () to skip
+    :timeout: s, connect / serial reply timeout per probe
+    :cache: JSON file the result is saved to, None not to save
+    :max_age: s, return the cached result if it is younger
+    :return: [Found]
+    """
+    if max_age is not None and cache and os.path.exists(cache):
+        saved = load(cache, with_time=True)
+        if time.time() - saved[0] < max_age:
+            return saved[1]
+    jobs = []
+    with ThreadPoolExecutor(workers) as pool:
+        net = None
+        if subnet is None:
+            try:
+                net = local_subnet()
+            except OSError as e:
+                # 无默认路由 (离线台架电脑): 跳过网口扫描, 仍探测 VISA 与串口
+                debugPrint('no local subnet (%s), LAN scan skipped' % e)
+        elif subnet is not False:
+            net = ipaddress.ip_network(subnet, strict=False)
+        if net is not None:
+            jobs += [pool.submit(probe_host, host, timeout) for host in net.hosts()]
+        if visa:
+            from . import Instruments
+            rm = Instruments.resource_manager()
+            for resource in Instruments.list_resources(refresh=True):
+                if not resource.upper().startswith('ASRL'):
+                    jobs.append(pool.submit(probe_visa, rm, resource, max(1.0, timeout)))
+        for port in (serial_ports() if ports is None else ports):
+            jobs.append(pool.submit(probe_serial, port, timeout))
+        found = [j.result() for j in jobs]
+    found = [f for f in found if f is not None]
+    if cache:
+        save(found, cache)
+    return found
+
+
+def save(found, path=CACHE):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'time': time.time(), 'found': [x.to_dict() for x in found]}, f, indent=1)
+    os.replace(tmp, path)
+
+
+def load(path=CACHE, with_time=False):
+    """[Found] of the last discover(); with_time: (time.time() of the scan, [Found])"""
+    if not os.path.exists(path):
+        return (0.0, []) if with_time else []
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    found = [Found(**x) for x in data['found']]
+    return (data['time'], found) if with_time else found
+
+
+def find(text, path=CACHE):
+    """cached instruments whose driver, *IDN? (model, serial number) or address contain text"""
+    text = text.lower()
+    return [f for f in load(path)
+            if text in (f.driver or '').lower() or text in f.idn.lower() or text in str(f.address).lower()]
@@ -8,23 +8,28 @@
 '''
 
 # here put the import lib
-import vxi11
-import serial
+# 平铺脚本 (python ElecLoad.py / 在本目录 from ElecLoad import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
+
+from .VxiInstr import VxiInstrument
 import time
+from .Trace import debugPrint
+from .LazyImport import lazy_import
 
-
-DEBUG = 1
-def debugPrint(msg):
-    if DEBUG:
-        print(msg)
+serial = lazy_import('serial', 'pyserial')
 
 
 ######   Rigol 仪器设备  ######################
 
-class DL3000():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
+# :SOUR:FUNC 设置值与 :SOUR:FUNC? 返回值的对应
+FUNC_MODE = {'CUR': 'CC', 'VOL': 'CV', 'RES': 'CR', 'POW': 'CP'}
+
 
+class DL3000(VxiInstrument):
     def getIDN(self):
         ret = self.session.ask('*IDN?')
         debugPrint(ret)
@@ -74,14 +79,18 @@ class DL3000():
         set operation mode
         CURRent:CURR RESistance:RES VOLTage:VOLT  POWer:POW
         '''
-        self.session.write(':SOUR:FUNC %s'%mode)
+        ret = FUNC_MODE.get(mode.upper()[:3], mode)
+        self.shadow.write(self.session.write, ':SOUR:FUNC %s'%mode, 'FUNC', ret)
 
     def getmode(self):
         '''
         get operation mode 
         return CC CV CR CP
         '''
-        ret = self.session.ask(':SOUR:FUNC?')
+        ret = self.shadow.get('FUNC')
+        if ret is None:
+            ret = self.session.ask(':SOUR:FUNC?')
+            self.shadow.set('FUNC', ret)
         debugPrint(ret)
         return ret   
 
@@ -172,4 +181,4 @@ if __name__ == "__main__":
     # elecload.setModeRange('RES','MAX')
     # elecload.getModeRange('CURR')
     # elecload.getInVol()
-
+    pass
@@ -8,22 +8,47 @@
 '''
 # here put the import lib
 
-from pyftdi.i2c import *
-import re
-import usb.core
-from pyftdi.ftdi import Ftdi
-from pyftdi.ftdi import UsbTools
+# 平铺脚本 (python FtdiUsbI2c.py / 在本目录 from FtdiUsbI2c import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
+
 import time
+from .RegMap import RegMap, field
+from .Trace import TracedAttr
+
+
+def default_url():
+    """ftdi url of the first FTDI device found"""
+    # pyftdi / pyusb 在打开设备时才导入
+    from pyftdi.ftdi import Ftdi, UsbTools
+    return UsbTools.build_dev_strings('ftdi', Ftdi.VENDOR_IDS, Ftdi.PRODUCT_IDS, Ftdi.list_devices())[0][0]
+
+
+def open_controller():
+    """a new pyftdi I2cController"""
+    from pyftdi.i2c import I2cController
+    return I2cController()
 
 
 # usb转i2c
 class USB2IIC():
+    i2cPort = TracedAttr('i2c')
 
     # 初始化
-    def __init__(self, url=UsbTools.build_dev_strings('ftdi', Ftdi.VENDOR_IDS, Ftdi.PRODUCT_IDS, Ftdi.list_devices())[0][0], sla=0x5C):
+    def __init__(self, url=None, sla=0x5C, controller=None):
+        """
+            :url: ftdi url, None for the first FTDI device found
+            :sla: 8 bit slave address
+            :controller: I2cController to use instead of a new one (e.g. a simulator)
+        """
+        if url is None:
+            url = default_url()
         self.url = url
         self.sla = sla
-        self.port = I2cController()
+        self.port = open_controller() if controller is None else controller
         self.port.configure(url)
         # self.session = self.port.get_port(sla>>1)
         self.i2cPort = self.port.get_port(self.sla>>1)
@@ -119,78 +144,54 @@ class USB2IIC():
             self.i2cPort.write_to1(addr, [val])
 
     # 写位
-    def writeBits(self, regparts: str, val):
+    def writeBits(self, regparts, val):
         """write specified bits
 
-            :regparts: e.g. "0x10[7:6]", 0x10 register bits 7-6
+            :regparts: RegField or e.g. "0x10[7:6]", 0x10 register bits 7-6
         """
-        regparts = re.split('(\[)(.*)(\:)(.*)(\])', regparts)
-        addr = int(regparts[0], 16)
-        bith = int(regparts[2])
-        bitl = int(regparts[4])
-        valr = self.readBytes(addr)
-        valw = 0
-        for i in range(7, -1, -1):
-            if bith >= i and i >= bitl:
-                valw = valw << 1
-            else:
-                valw = (valw << 1) | 1
-        valw = valr & valw | (val << bitl)
-        self.writeBytes(addr, valw)
+        f = field(regparts)
+        valr = self.readBytes(f.addr)
+        self.writeBytes(f.addr, f.put(valr, val))
 
     # 写位(选择cmd写，减少delay时间)
-    def writeBits1(self, regparts: str, val):
+    def writeBits1(self, regparts, val):
         """write specified bits
         optimize cmd write, decrease delay time
 
-            :regparts: e.g. "0x10[7:6]", 0x10 register bits 7-6
+            :regparts: RegField or e.g. "0x10[7:6]", 0x10 register bits 7-6
         """
-        regparts = re.split('(\[)(.*)(\:)(.*)(\])', regparts)
-        addr = int(regparts[0], 16)
-        bith = int(regparts[2])
-        bitl = int(regparts[4])
-        valr = self.readBytes1(addr)
-        valw = 0
-        for i in range(7, -1, -1):
-            if bith >= i and i >= bitl:
-                valw = valw << 1
-            else:
-                valw = (valw << 1) | 1
-        valw = valr & valw | (val << bitl)
-        self.writeBytes1(addr, valw)
+        f = field(regparts)
+        valr = self.readBytes1(f.addr)
+        self.writeBytes1(f.addr, f.put(valr, val))
 
     # 读位
-    def readBits(self, regparts: str):
+    def readBits(self, regparts):
         """write specified bits
 
-            :regparts: e.g. "0x10[7:6]", 0x10 register bits 7-6
+            :regparts: RegField or e.g. "0x10[7:6]", 0x10 register bits 7-6
         """
-        regparts = re.split('(\[)(.*)(\:)(.*)(\])', regparts)
-        addr = int(regparts[0], 16)
-        bith = int(regparts[2])
-        bitl = int(regparts[4])
-        valr = self.readBytes(addr)
-        valtmp = 1
-        for i in range(bith):
-            valtmp = valtmp << 1 | 1
-        return (valr & valtmp) >> bitl
+        f = field(regparts)
+        return f.get(self.readBytes(f.addr))
 
     # 读位(选择cmd写，减少delay时间)
-    def readBits1(self, regparts: str):
+    def readBits1(self, regparts):
         """read specified bits
         optimize cmd write, decrease delay time
 
-            :regparts: e.g. "0x10[7:6]", 0x10 register bits 7-6
+            :regparts: RegField or e.g. "0x10[7:6]", 0x10 register bits 7-6
+        """
+        f = field(regparts)
+        return f.get(self.readBytes1(f.addr))
+
+    # 寄存器影子, 批量写入
+    def registerMap(self, volatile=(), size=256, **kwargs):
+        """register map with a shadow copy of the DUT registers
+
+            :volatile: register addresses that are always read from the device
+            :size: number of register addresses
+            :kwargs: see RegMap (block, gap, fast)
         """
-        regparts = re.split('(\[)(.*)(\:)(.*)(\])', regparts)
-        addr = int(regparts[0], 16)
-        bith = int(regparts[2])
-        bitl = int(regparts[4])
-        valr = self.readBytes1(addr)
-        valtmp = 1
-        for i in range(bith):
-            valtmp = valtmp << 1 | 1
-        return (valr & valtmp) >> bitl
+        return RegMap(self, size=size, volatile=volatile, **kwargs)
 
     # 单个bit读
     def singleRead(self):
@@ -0,0 +1,285 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   InstrProfile.py
+@Time    :   2026/10/19 01:48:37
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import os
+import re
+import threading
+import time
+from .Trace import debugPrint
+
+
+CACHE = os.path.join(os.path.expanduser('~'), '.uim_ee', 'profiles.json')
+
+# SDS2000X 系列 PAVA? 的测量参数; 未列出的参数只记录, 仍然发送
+_SDS_PAVA = ('PKPK', 'MAX', 'MIN', 'AMPL', 'TOP', 'BASE', 'LEVELX', 'CMEAN', 'MEAN', 'STDEV', 'VSTD',
+             'RMS', 'CRMS', 'MEDIAN', 'CMEDIAN', 'OVSN', 'FPRE', 'OVSP', 'RPRE', 'PER', 'FREQ', 'TMAX',
+             'TMIN', 'PWID', 'NWID', 'DUTY', 'NDUTY', 'WID', 'NBWID', 'DELAY', 'TIMEL', 'RISE', 'FALL',
+             'RISE10T90', 'FALL90T10', 'CCJ', 'PAREA', 'NAREA', 'AREA', 'ABSAREA', 'CYCLES', 'REDGES',
+             'FEDGES', 'EDGES', 'PPULSES', 'NPULSES', 'PHA', 'SKEW', 'FRR', 'FRF', 'FFR', 'FFF', 'LRR',
+             'LRF', 'LFR', 'LFF', 'PACAREA', 'NACAREA', 'ACAREA', 'ABSACAREA', 'PSLOPE', 'NSLOPE', 'TSR',
+             'TSF', 'THR', 'THF', 'ALL')
+
+# 各型号的能力, 按 *IDN? 匹配, 取第一个匹配项
+#   binary_format:   FORM:DATA REAL 二进制读数
+#   onboard_stats:   CALC:AVER:ALL? 仪器内部统计
+#   reading_memory:  读数存储点数 (FETC? 能取回的最多读数)
+#   channels:        通道数
+#   pava:            C<n>:PAVA? 支持的测量参数
+#   adc_bits:        示波器 ADC 位数, >8 时用 WORD 波形
+#   opt:             响应 *OPT?, 否则不查询以免等待超时
+MODELS = [
+    (r'(Keysight|Agilent).*,3446[01]A', {'binary_format': True, 'onboard_stats': True, 'reading_memory': 10000,
+                                         'channels': 1, 'opt': True}),
+    (r'(Keysight|Agilent).*,(3446[5-9]|3447\d)A', {'binary_format': True, 'onboard_stats': True,
+                                                  'reading_memory': 50000, 'channels': 1, 'opt': True}),
+    (r'(HEWLETT-PACKARD|Agilent).*,34401A', {'binary_format': False, 'onboard_stats': False,
+                                             'reading_memory': 512, 'channels': 1, 'opt': False}),
+    (r'Siglent.*,SDM30\d\dX?', {'binary_format': False, 'onboard_stats': True, 'channels': 1, 'opt': False}),
+    (r'Siglent.*,SDS2\d0\dX HD', {'channels': 4, 'adc_bits': 12, 'pava': _SDS_PAVA, 'opt': True}),
+    (r'Siglent.*,SDS2\d04X', {'channels': 4, 'adc_bits': 8, 'pava': _SDS_PAVA, 'opt': True}),
+    (r'Siglent.*,SDS2\d02X', {'channels': 2, 'adc_bits': 8, 'pava': _SDS_PAVA, 'opt': True}),
+    (r'LECROY,(HDO|WAVEPRO|WP)', {'channels': 4, 'adc_bits': 12, 'opt': True}),
+    (r'Siglent.*,SDG\d{4}', {'channels': 2, 'opt': True}),
+    (r'Siglent.*,SPD3303', {'channels': 3, 'opt': False}),
+    (r'RIGOL.*,DP83\d', {'channels': 3, 'opt': True}),
+    (r'RIGOL.*,DP82\d', {'channels': 2, 'opt': True}),
+    (r'RIGOL.*,DP81\d', {'channels': 1, 'opt': True}),
+    (r'RIGOL.*,DL30\d\d', {'channels': 1, 'opt': True}),
+    (r'Keysight.*,B2901', {'channels': 1, 'opt': True}),
+    (r'Keysight.*,B29[01]2', {'channels': 2, 'opt': True}),
+    (r'GW.*,GPD-2303', {'channels': 2, 'opt': False}),
+    (r'GW.*,GPD-3303', {'channels': 3, 'opt': False}),
+    (r'GW.*,GPD-4303', {'channels': 4, 'opt': False}),
+]
+# *OPT? 中的选件带来的能力: (型号识别式, 选件, 能力)
+OPTIONS = [
+    (r',(3446[5-9]|3447\d)A', 'MEM', {'reading_memory': 2000000}),
+]
+
+
+def parse_idn(idn):
+    """(manufacturer, model, serial, firmware) of an *IDN? reply, missing fields ''"""
+    fields = [f.strip() for f in idn.strip().split(',')]
+    fields += [''] * (4 - len(fields))
+    return fields[0], fields[1], fields[2], ','.join(fields[3:])
+
+
+def parse_opt(reply):
+    """option names of an *OPT? reply; '0' and empty fields mean none"""
+    names = [f.strip().strip('"') for f in reply.strip().split(',')]
+    return tuple(n for n in names if n and n != '0')
+
+
+def idn_key(idn):
+    """'manufacturer,model,serial' of an *IDN? reply"""
+    return '%s,%s,%s' % parse_idn(idn)[:3]
+
+
+def model_caps(idn, options=()):
+    """the MODELS / OPTIONS capabilities for an *IDN? reply"""
+    caps = {}
+    for pattern, values in MODELS:
+        if re.search(pattern, idn, re.I):
+            caps.update(values)
+            break
+    for pattern, option, values in OPTIONS:
+        if option in options and re.search(pattern, idn, re.I):
+            caps.update(values)
+    return caps
+
+
+# 一台仪器的身份与能力
+class Profile():
+    """identity (*IDN?, *OPT?) and capabilities of one instrument
+
+        p = dmm.profile
+        p.model, p.serial, p.options
+        p.get('binary_format', False)
+
+    Capabilities come from MODELS / OPTIONS and from what drivers learned
+    on this model at run time (learn()), the learned ones taking precedence.
+    """
+    __slots__ = ('idn', 'manufacturer', 'model', 'serial', 'firmware', 'options', 'caps', 'learned')
+
+    def __init__(self, idn, options=(), learned=None) -> None:
+        self.idn = idn.strip()
+        self.manufacturer, self.model, self.serial, self.firmware = parse_idn(self.idn)
+        self.options = tuple(options)
+        self.caps = model_caps(self.idn, self.options)
+        self.learned = learned if learned is not None else {}   # 与同型号的其他 Profile 共用
+
+    @property
+    def key(self):
+        """'manufacturer,model,serial', the identity cache key"""
+        return idn_key(self.idn)
+
+    @property
+    def model_key(self):
+        return '%s,%s' % (self.manufacturer, self.model)
+
+    def get(self, name, default=None):
+        if name in self.learned:
+            return self.learned[name]
+        return self.caps.get(name, default)
+
+    def __repr__(self):
+        return 'Profile(%s %s %s, options %s)' % (self.manufacturer, self.model, self.serial,
+                                                  ','.join(self.options) or '-')
+
+
+# ---------------------------------------------------------------- 缓存
+
+_lock = threading.RLock()
+_data = None            # {'models': {型号: 学到的能力}, 'instruments': {序列号键: 身份}}
+_profiles = {}          # 地址 -> Profile, 本进程内; 地址不写入缓存文件 (DHCP 会重新分配)
+
+
+def _store():
+    global _data
+    if _data is None:
+        import json     # 只在读写缓存时需要
+        _data = {'models': {}, 'instruments': {}}
+        if CACHE and os.path.exists(CACHE):
+            try:
+                with open(CACHE, encoding='utf-8') as f:
+                    _data.update(json.load(f))
+            except (OSError, ValueError) as e:
+                debugPrint('profiles %s: %s' % (CACHE, e))
+        # 旧版本的 地址 -> 仪器 记录不再使用
+        _data.pop('addresses', None)
+    return _data
+
+
+def save(path=None):
+    """write the identity cache (default CACHE); nothing is written if CACHE is None"""
+    import json
+    path = path or CACHE
+    if not path:
+        return
+    with _lock:
+        text = json.dumps(_store(), indent=1)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _save():
+    try:
+        save()
+    except OSError as e:
+        debugPrint('profiles %s: %s' % (CACHE, e))
+
+
+def _make(entry):
+    p = Profile(entry['idn'], entry.get('options', ()))
+    # 学到的能力按型号保存, 同型号的仪器共用
+    p.learned = _store()['models'].setdefault(p.model_key, {})
+    return p
+
+
+def identify(ask, idn=None):
+    """Profile from the instrument: *IDN?, then *OPT? for the models answering it
+
+    :ask: query function, e.g. session.ask or inst.query
+    :idn: *IDN? reply already read, not asked again
+    """
+    idn = (idn or ask('*IDN?')).strip()
+    options = ()
+    if model_caps(idn).get('opt'):
+        try:
+            options = parse_opt(ask('*OPT?'))
+        except Exception as e:
+            debugPrint('*OPT? on %s: %s' % (idn, e))
+    with _lock:
+        return _make({'idn': idn, 'options': options})
+
+
+def _known(address, idn, refresh):
+    # 缓存中同一台仪器 (序列号与固件相同) 的 Profile, 没有序列号的仪器无法区分同型号的各台, 不用缓存
+    serial = parse_idn(idn)[2]
+    entry = _store()['instruments'].get(idn_key(idn)) if serial and serial != '0' and not refresh else None
+    if entry is None or entry['idn'] != idn:
+        return None
+    p = _profiles[address] = _make(entry)
+    return p
+
+
+def _register(address, p):
+    with _lock:
+        _store()['instruments'][p.key] = {'idn': p.idn, 'options': list(p.options), 'time': time.time()}
+        _profiles[address] = p
+    _save()
+    return p
+
+
+def profile(address, ask, refresh=False):
+    """the Profile of the instrument at address
+
+    *IDN? is asked once per address in this process, so an address now
+    answering for another instrument is never taken for the old one. The
+    options and learned capabilities are then looked up in the cache by
+    manufacturer/model/serial (*OPT? is skipped for a known instrument with
+    the same firmware); refresh=True queries everything again.
+    """
+    address = str(address).lower()
+    with _lock:
+        p = None if refresh else _profiles.get(address)
+    if p is not None:
+        return p
+    idn = ask('*IDN?').strip()
+    with _lock:
+        p = _known(address, idn, refresh)
+    if p is not None:
+        return p
+    return _register(address, identify(ask, idn))
+
+
+async def profile_async(address, ask, refresh=False):
+    """profile() for the asyncio drivers, ask is a coroutine function"""
+    address = str(address).lower()
+    with _lock:
+        p = None if refresh else _profiles.get(address)
+    if p is not None:
+        return p
+    idn = (await ask('*IDN?')).strip()
+    with _lock:
+        p = _known(address, idn, refresh)
+    if p is not None:
+        return p
+    options = ()
+    if model_caps(idn).get('opt'):
+        try:
+            options = parse_opt(await ask('*OPT?'))
+        except Exception as e:
+            debugPrint('*OPT? on %s: %s' % (idn, e))
+    with _lock:
+        p = _make({'idn': idn, 'options': options})
+    return _register(address, p)
+
+
+def learn(p, name, value):
+    """record a capability found at run time for p's model (e.g. a command it rejects)"""
+    with _lock:
+        if p.learned.get(name) == value:
+            return
+        p.learned[name] = value
+    _save()
+
+
+def forget(address=None):
+    """drop the profile of address (all if None) in this process, the next use asks *IDN? again"""
+    with _lock:
+        if address is None:
+            _profiles.clear()
+        else:
+            _profiles.pop(str(address).lower(), None)
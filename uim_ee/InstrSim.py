@@ -0,0 +1,990 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   InstrSim.py
+@Time    :   2026/10/18 17:02:19
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import math
+import os
+import random
+import re
+import socket
+import struct
+import threading
+import time
+from collections import deque
+import numpy as np
+from .BinBlock import make_block
+
+
+_sleep = time.sleep     # 不受基准测试对 time.sleep 的统计影响
+
+
+# 延时模型
+class Latency():
+    """per transaction delay: base + gaussian jitter + per_byte * size, never negative"""
+
+    def __init__(self, base=0.0, jitter=0.0, per_byte=0.0, seed=None) -> None:
+        self.base = base
+        self.jitter = jitter
+        self.per_byte = per_byte
+        self.rand = random.Random(seed)
+
+    def delay(self, nbytes=0):
+        t = self.base + nbytes * self.per_byte
+        if self.jitter:
+            t += self.rand.gauss(0.0, self.jitter)
+        return max(t, 0.0)
+
+    def wait(self, nbytes=0):
+        t = self.delay(nbytes)
+        if t:
+            _sleep(t)
+        return t
+
+
+NO_LATENCY = Latency()
+
+
+# 一阶温度模型, 油槽/温箱共用
+class ThermalPlant():
+    """temperature approaching the setpoint exponentially with time constant tau (s)"""
+
+    def __init__(self, temp=25.0, tau=60.0, noise=0.01, band=0.1, seed=None) -> None:
+        self.tau = tau
+        self.noise = noise
+        self.band = band
+        self.rand = random.Random(seed)
+        self._t0 = time.monotonic()
+        self._start = temp
+        self.setpoint = temp
+
+    def temp(self):
+        dt = time.monotonic() - self._t0
+        t = self.setpoint + (self._start - self.setpoint) * math.exp(-dt / self.tau)
+        return t + (self.rand.gauss(0.0, self.noise) if self.noise else 0.0)
+
+    def set(self, setpoint):
+        self._start = self.temp()
+        self._t0 = time.monotonic()
+        self.setpoint = float(setpoint)
+
+    def stable(self):
+        return abs(self.temp() - self.setpoint) < self.band
+
+
+# 命令/应答仿真核心
+class SimDevice():
+    """pyvisa-sim style command interpreter for one instrument
+
+    A profile is made of
+        dialogues:  {'*IDN?': 'RIGOL,DP832,...'}, fixed replies
+        properties: {'SOUR:FUNC': 'CURR'}, generic settings: 'HDR value' sets, 'HDR?' reads
+        handlers:   [(regex, func(dev, match) -> reply or None)], matched on the command
+                    without leading ':' (case-insensitive)
+        latency:    Latency for every transaction, and {regex: Latency} overrides
+    Messages may hold several ';' separated commands, replies of queries are
+    joined with ';'. Binary replies are bytes.
+    SYST:ERR? pops the errors queue.
+    """
+
+    def __init__(self, name, dialogues=None, properties=None, handlers=(), latency=None, overrides=None) -> None:
+        self.name = name
+        self.dialogues = {k.upper(): v for k, v in (dialogues or {}).items()}
+        self.defaults = dict(properties or {})
+        self.properties = dict(self.defaults)
+        self.handlers = [(re.compile(p, re.I), f) for p, f in handlers]
+        self.latency = latency or NO_LATENCY
+        self.overrides = [(re.compile(p, re.I), l) for p, l in (overrides or {}).items()]
+        self.state = {}         # 各 profile 自用的状态
+        self.errors = deque()   # SYST:ERR? 错误队列
+        self.log = []           # 收到的命令
+        self.messages = 0       # 事务数 (消息数)
+        self.nbytes = 0         # 收发字节数
+        self.lock = threading.RLock()
+
+    def latency_for(self, message):
+        for pattern, latency in self.overrides:
+            if pattern.search(message):
+                return latency
+        return self.latency
+
+    def reset(self):
+        self.properties = dict(self.defaults)
+
+    def reset_stats(self):
+        self.log = []
+        self.messages = 0
+        self.nbytes = 0
+
+    def _command(self, command):
+        command = command.strip()
+        if not command:
+            return None
+        self.log.append(command)
+        bare = command.lstrip(':')
+        upper = bare.upper()
+        if upper in self.dialogues:
+            return self.dialogues[upper]
+        if upper in ('*RST', '*CLS'):
+            if upper == '*RST':
+                self.reset()
+            else:
+                self.errors.clear()
+            return None
+        if upper in ('SYST:ERR?', 'SYST:ERR:NEXT?'):
+            return self.errors.popleft() if self.errors else '+0,"No error"'
+        if upper == '*OPC?':
+            return '1'
+        for pattern, func in self.handlers:
+            m = pattern.fullmatch(bare)
+            if m:
+                return func(self, m)
+        header, _, value = bare.partition(' ')
+        header = header.upper()
+        if header.endswith('?'):
+            return str(self.properties.get(header[:-1], '0'))
+        if not header.startswith('*'):
+            self.properties[header] = value
+        return None
+
+    def handle(self, message):
+        """process one message, return the reply (str/bytes) or None"""
+        if isinstance(message, (bytes, bytearray)):
+            message = bytes(message).decode('latin-1')
+        replies = []
+        with self.lock:
+            for command in _split(message.strip()):
+                ret = self._command(command)
+                if ret is not None:
+                    replies.append(ret)
+            if not replies:
+                reply = None
+            elif len(replies) == 1:
+                reply = replies[0]
+            else:
+                reply = ';'.join(r if isinstance(r, str) else r.decode('latin-1') for r in replies)
+            self.messages += 1
+            self.nbytes += len(message) + (0 if reply is None else len(reply))
+        return reply
+
+
+def _split(message):
+    # 按 ';' 拆分, 引号内的不拆
+    parts, cur, quote = [], [], None
+    for ch in message:
+        if quote:
+            quote = None if ch == quote else quote
+        elif ch in '"\'':
+            quote = ch
+        elif ch == ';':
+            parts.append(''.join(cur))
+            cur = []
+            continue
+        cur.append(ch)
+    parts.append(''.join(cur))
+    return parts
+
+
+def _encode(reply, eol=b''):
+    if isinstance(reply, str):
+        reply = reply.encode('latin-1')
+    return bytes(reply) + eol
+
+
+# vxi11.Instrument 替身
+class FakeVxi11():
+    """duck-typed vxi11.Instrument talking to a SimDevice"""
+
+    def __init__(self, device, host='sim') -> None:
+        self.device = device
+        self.host = host
+        self.timeout = 10
+        self.lock_timeout = 10
+        self._out = deque()
+
+    def write_raw(self, data):
+        self.device.latency_for(bytes(data).decode('latin-1')).wait(len(data))
+        reply = self.device.handle(data)
+        if reply is not None:
+            self._out.append(_encode(reply, b'\n'))
+
+    def read_raw(self, num=-1):
+        if not self._out:
+            _sleep(self.timeout)
+            raise TimeoutError('%s: read with no pending reply' % self.device.name)
+        data = self._out.popleft()
+        self.device.latency.wait(len(data))
+        return data
+
+    def ask_raw(self, data, num=-1):
+        self.write_raw(data)
+        return self.read_raw(num)
+
+    def write(self, message, encoding='utf-8'):
+        if isinstance(message, (list, tuple)):
+            for m in message:
+                self.write(m, encoding)
+            return
+        self.write_raw(str(message).encode(encoding))
+
+    def read(self, num=-1, encoding='utf-8'):
+        return self.read_raw(num).decode(encoding).rstrip('\r\n')
+
+    def ask(self, message, num=-1, encoding='utf-8'):
+        if isinstance(message, (list, tuple)):
+            return [self.ask(m, num, encoding) for m in message]
+        self.write(message, encoding)
+        return self.read(num, encoding)
+
+    def read_stb(self):
+        return 0
+
+    def clear(self):
+        self._out.clear()
+
+    def open(self):
+        pass
+
+    def close(self):
+        pass
+
+
+# pyvisa 资源替身
+class FakeVisaResource():
+    """duck-typed pyvisa MessageBasedResource talking to a SimDevice"""
+
+    def __init__(self, device, resource_name='SIM') -> None:
+        self.device = device
+        self.resource_name = resource_name
+        self.timeout = 2000
+        self._vxi = FakeVxi11(device, resource_name)
+
+    def write(self, message):
+        self._vxi.write(message)
+
+    def read(self):
+        return self._vxi.read_raw().decode('latin-1')
+
+    def query(self, message, delay=None):
+        self.write(message)
+        return self.read()
+
+    def read_raw(self, size=None):
+        return self._vxi.read_raw()
+
+    def query_binary_values(self, message, datatype='f', is_big_endian=False, container=list, **kwargs):
+        from .BinBlock import parse_block
+        self.write(message)
+        block = parse_block(self._vxi.read_raw())
+        values = np.frombuffer(block, ('>' if is_big_endian else '<') + datatype)
+        return values if container is np.ndarray else container(values)
+
+    def read_stb(self):
+        return 0
+
+    def enable_event(self, *args, **kwargs):
+        pass
+
+    def disable_event(self, *args, **kwargs):
+        pass
+
+    def wait_on_event(self, *args, **kwargs):
+        pass
+
+    def close(self):
+        pass
+
+
+class SimResourceManager():
+    """stand-in for visa.ResourceManager, resources = {resource name: SimDevice}
+
+        from . import Instruments
+        Instruments._rm = SimResourceManager({'TCPIP0::10.0.0.5::inst0::INSTR': make('B2902B')})
+        smu = Instruments.B2902B('IP:10.0.0.5')
+    """
+
+    def __init__(self, resources=None) -> None:
+        self.resources = dict(resources or {})
+
+    def list_resources(self, query='?*::INSTR'):
+        return tuple(self.resources)
+
+    def open_resource(self, resource_name, **kwargs):
+        return FakeVisaResource(self.resources[resource_name], resource_name)
+
+
+# 基于 pty 的串口替身
+class SerialSim():
+    """serve a SimDevice on a pseudo terminal, open .port with serial.Serial
+
+    per_byte of the device latency emulates the baud rate (9600 baud ~ 1.04 ms per byte).
+    POSIX only.
+    """
+
+    def __init__(self, device, eol=b'\r\n', encoding='ascii') -> None:
+        import tty
+        self.device = device
+        self.eol = eol
+        self.encoding = encoding
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.port = os.ttyname(slave)
+        self._slave = slave
+        self._running = True
+        self._busy = False
+        self._thread = threading.Thread(target=self._serve, name='serial-sim', daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        buf = b''
+        while self._running:
+            try:
+                chunk = os.read(self.master, 1024)
+            except OSError:
+                break
+            self._busy = True
+            buf += chunk
+            # 以 \n 分行, 兼容 \r\n
+            while b'\n' in buf:
+                line, buf = buf.split(b'\n', 1)
+                message = line.rstrip(b'\r').decode(self.encoding)
+                latency = self.device.latency_for(message)
+                reply = self.device.handle(message)
+                if reply is None:
+                    continue
+                data = _encode(reply.encode(self.encoding) if isinstance(reply, str) else reply, self.eol)
+                latency.wait(len(data))
+                os.write(self.master, data)
+            self._busy = False
+
+    def drain(self, timeout=1.0):
+        """wait until every line written to the port has been processed"""
+        import select
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self._busy and not select.select([self.master], [], [], 0)[0]:
+                return True
+            _sleep(0.0002)
+        return False
+
+    def close(self):
+        self._running = False
+        for fd in (self.master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+# 网口仪器替身: SCPI 原始套接字 / HiSLIP
+class ScpiServer():
+    """serve a SimDevice on a local TCP port, as a LAN instrument does
+
+        server = ScpiServer(make('DP800'))                      # 端口 5025 协议
+        psu = DP800('127.0.0.1:%d' % server.port, transport='socket')
+        server = ScpiServer(make('SDS2504X'), 'hislip')
+        osc = SDS2504X(server.address)
+
+    protocol 'socket': messages end with \\n (#<n> blocks may contain it);
+    'hislip': one synchronized session over a sync and an async connection;
+    'vxi11': the VXI-11 core channel, the same port also answers portmapper
+    GETPORT (AsyncVxi11.open(host, portmapper=server.port)).
+    The device latency is spent in the server before each reply.
+    """
+
+    def __init__(self, device, protocol='socket', host='127.0.0.1', port=0) -> None:
+        self.device = device
+        self.protocol = protocol
+        self._listen = socket.create_server((host, port))
+        self.host, self.port = self._listen.getsockname()[:2]
+        self._conns = []
+        self._busy = 0
+        self._running = True
+        self.max_recv = 1 << 20     # vxi11 create_link 返回的单次写入上限
+        self._thread = threading.Thread(target=self._accept, name='scpi-server', daemon=True)
+        self._thread.start()
+
+    @property
+    def address(self):
+        """VISA style address for VxiInstrument drivers"""
+        if self.protocol == 'hislip':
+            return 'TCPIP0::%s::hislip0,%d::INSTR' % (self.host, self.port)
+        if self.protocol == 'vxi11':
+            return 'TCPIP0::%s::inst0::INSTR' % self.host
+        return 'TCPIP0::%s::%d::SOCKET' % (self.host, self.port)
+
+    def _accept(self):
+        while self._running:
+            try:
+                conn, _ = self._listen.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._conns.append(conn)
+            serve = {'hislip': self._serve_hislip, 'vxi11': self._serve_vxi11}.get(self.protocol, self._serve_socket)
+            threading.Thread(target=serve, args=(conn,), name='scpi-conn', daemon=True).start()
+
+    def _reply(self, message):
+        # 处理一条消息, 返回应答字节或 None
+        latency = self.device.latency_for(bytes(message).decode('latin-1'))
+        reply = self.device.handle(bytes(message))
+        if reply is None:
+            latency.wait(len(message))
+            return None
+        data = _encode(reply)
+        latency.wait(len(message) + len(data))
+        return data
+
+    def _serve_socket(self, conn):
+        from .LanTransport import frame_end
+        buf = bytearray()
+        pos = 0
+        try:
+            while self._running:
+                end, pos = frame_end(buf, pos)
+                if end is None:
+                    chunk = conn.recv(max(65536, pos - len(buf)))
+                    if not chunk:
+                        break
+                    buf += chunk
+                    continue
+                self._busy += 1
+                try:
+                    data = self._reply(buf[:end - 1])
+                    if data is not None:
+                        conn.sendall(data + b'\n')
+                finally:
+                    self._busy -= 1
+                del buf[:end]
+                pos = 0
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def _serve_hislip(self, conn):
+        from . import LanTransport as lt
+        parts = []
+        try:
+            while self._running:
+                kind, control, param, payload = lt.recv_message(conn)
+                if kind == lt.INITIALIZE:
+                    lt.send_message(conn, lt.INITIALIZE_RESPONSE, 0, (0x0100 << 16) | 1)
+                elif kind == lt.ASYNC_INITIALIZE:
+                    lt.send_message(conn, lt.ASYNC_INITIALIZE_RESPONSE, 0, 0x5349)
+                elif kind == lt.ASYNC_MAXIMUM_MESSAGE_SIZE:
+                    lt.send_message(conn, lt.ASYNC_MAXIMUM_MESSAGE_SIZE_RESPONSE, 0, 0, struct.pack('>Q', 1 << 20))
+                elif kind == lt.DATA:
+                    parts.append(payload)
+                elif kind == lt.DATA_END:
+                    parts.append(payload)
+                    message, parts = b''.join(parts), []
+                    self._busy += 1
+                    try:
+                        data = self._reply(message)
+                        if data is not None:
+                            lt.send_message(conn, lt.DATA_END, 0, param, data)
+                    finally:
+                        self._busy -= 1
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def _vxi11_call(self, state, prog, proc, args):
+        # 一次 RPC 调用的结果 (XDR)
+        if prog == 100000:                          # portmapper GETPORT
+            return struct.pack('>I', self.port if proc == 3 else 0)
+        if proc == 10:                              # create_link
+            return struct.pack('>iiII', 0, 1, 0, self.max_recv)
+        if proc == 11:                              # device_write
+            flags, length = struct.unpack_from('>iI', args, 12)
+            state['parts'].append(args[20:20 + length])
+            if flags & 0x08:
+                message, state['parts'] = b''.join(state['parts']), []
+                self._busy += 1
+                try:
+                    data = self._reply(message)
+                finally:
+                    self._busy -= 1
+                if data is not None:
+                    state['pending'] += data + b'\n'
+            return struct.pack('>iI', 0, length)
+        if proc == 12:                              # device_read
+            size, io_timeout = struct.unpack_from('>II', args, 4)
+            pending = state['pending']
+            if not pending:
+                _sleep(io_timeout / 1000)
+                return struct.pack('>iiI', 15, 0, 0)
+            chunk, state['pending'] = pending[:size], pending[size:]
+            reason = 0 if state['pending'] else 4
+            return struct.pack('>iiI', 0, reason, len(chunk)) + chunk + b'\0' * (-len(chunk) % 4)
+        return struct.pack('>i', 0)                 # destroy_link 等
+
+    def _serve_vxi11(self, conn):
+        from .LanTransport import _recv_exact
+        state = {'parts': [], 'pending': b''}
+        try:
+            while self._running:
+                record = b''
+                while True:
+                    header = struct.unpack('>I', _recv_exact(conn, 4))[0]
+                    record += _recv_exact(conn, header & 0x7FFFFFFF)
+                    if header & 0x80000000:
+                        break
+                xid, _, _, prog, _, proc, _, length = struct.unpack_from('>8I', record)
+                pos = 32 + length + (-length % 4)
+                length = struct.unpack_from('>I', record, pos + 4)[0]
+                args = record[pos + 8 + length + (-length % 4):]
+                reply = struct.pack('>6I', xid, 1, 0, 0, 0, 0) + self._vxi11_call(state, prog, proc, args)
+                conn.sendall(struct.pack('>I', 0x80000000 | len(reply)) + reply)
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def drain(self, timeout=1.0):
+        """wait until every message sent to the server has been processed"""
+        import select
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            conns = [c for c in self._conns if c.fileno() >= 0]
+            if not self._busy and not (conns and select.select(conns, [], [], 0)[0]):
+                return True
+            _sleep(0.0002)
+        return False
+
+    def close(self):
+        self._running = False
+        self._listen.close()
+        for conn in self._conns:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+
+# I2C 从机替身
+class I2cSlaveSim():
+    """register file behind a USB2IIC, behaves like a pyftdi I2cPort
+
+    auto-increment on multi-byte access; volatile registers are produced by
+    on_read(addr) when given. latency applies per transaction (~1 ms on FTDI).
+    """
+
+    _format = 'B'
+
+    def __init__(self, size=256, latency=None, on_read=None, volatile=()) -> None:
+        self.regs = bytearray(size)
+        self.latency = latency or NO_LATENCY
+        self.on_read = on_read
+        self.volatile = set(volatile)
+        self.transactions = 0
+        self.nbytes = 0
+        self.pointer = 0
+
+    def reset_stats(self):
+        self.transactions = 0
+        self.nbytes = 0
+
+    def _tx(self, nbytes):
+        self.transactions += 1
+        self.nbytes += nbytes
+        self.latency.wait(nbytes)
+
+    def _get(self, addr, length):
+        out = bytearray()
+        for a in range(addr, addr + length):
+            a %= len(self.regs)
+            if self.on_read is not None and a in self.volatile:
+                self.regs[a] = self.on_read(a) & 0xFF
+            out.append(self.regs[a])
+        self.pointer = (addr + length) % len(self.regs)
+        return bytes(out)
+
+    def configure_register(self, bigendian=False, width=1):
+        pass
+
+    def read_from(self, regaddr, readlen=0, relax=True, start=True):
+        self._tx(readlen + 2)
+        return self._get(regaddr, readlen)
+
+    def write_to(self, regaddr, out, relax=True, start=True):
+        self._tx(len(out) + 2)
+        for i, val in enumerate(out):
+            self.regs[(regaddr + i) % len(self.regs)] = val & 0xFF
+        self.pointer = (regaddr + len(out)) % len(self.regs)
+
+    def read(self, readlen=0, relax=True, start=True):
+        self._tx(readlen + 1)
+        return self._get(self.pointer, readlen)
+
+    def write(self, out, relax=True, start=True):
+        out = bytes(out)
+        if out:
+            self.write_to(out[0], out[1:])
+
+    # 带前缀的快速读写 (readBytes1/writeBytes1), 前缀长度与 USB2IIC.readBytes1 一致
+    def _prefix(self):
+        return bytes(3 + 'BHI'.index(self._format))
+
+    def read_from1(self, regaddr, readlen=0):
+        return self._prefix() + self.read_from(regaddr, readlen)
+
+    def write_to1(self, regaddr, out):
+        self.write_to(regaddr, out)
+
+    def read1(self, readlen=0):
+        return self._prefix() + self.read(readlen)
+
+    def write1(self, out):
+        self.write(out)
+
+
+class I2cControllerSim():
+    """I2cController stand-in serving I2cSlaveSim ports by 7 bit address"""
+
+    def __init__(self, slaves=None) -> None:
+        self.slaves = dict(slaves or {})
+
+    def configure(self, url, **kwargs):
+        pass
+
+    def get_port(self, address):
+        if address not in self.slaves:
+            self.slaves[address] = I2cSlaveSim()
+        return self.slaves[address]
+
+    def _do_prolog1(self, sla):
+        if (sla >> 1) not in self.slaves:
+            raise IOError('NACK from 0x%02X' % sla)
+
+
+def usb2iic(sla=0x5C, slave=None):
+    """USB2IIC with an emulated slave at sla (8 bit address)"""
+    from .FtdiUsbI2c import USB2IIC
+    slave = slave or I2cSlaveSim(latency=Latency(0.001, 0.0002))
+    return USB2IIC(url='ftdi://sim/1', sla=sla, controller=I2cControllerSim({sla >> 1: slave}))
+
+
+# ---------------------------------------------------------------- profiles
+
+def _ch(dev, ch):
+    return dev.state.setdefault('ch%s' % ch, {'volt': 0.0, 'curr': 1.0, 'out': 'OFF'})
+
+
+def _noise(dev, value, rel=1e-4):
+    return value * (1 + dev.state.setdefault('rand', random.Random(0)).gauss(0.0, rel))
+
+
+def _dp800():
+    def appl(dev, m):
+        c = _ch(dev, m.group(1))
+        c['volt'] = float(m.group(2))
+        if m.group(3):
+            c['curr'] = float(m.group(3))
+
+    def appl_q(dev, m):
+        c = _ch(dev, m.group(1))
+        return 'CH%s:30V/3A,%.3f,%.4f' % (m.group(1), c['volt'], c['curr'])
+
+    def meas(dev, m):
+        c = _ch(dev, m.group(2))
+        v = c['volt'] if c['out'] == 'ON' else 0.0
+        i = 0.1 if c['out'] == 'ON' else 0.0
+        kind = (m.group(1) or ':VOLT').upper()
+        if kind.startswith(':ALL'):
+            return '%.4f,%.4f,%.4f' % (v, i, v * i)
+        if kind.startswith(':CURR'):
+            return '%.4f' % i
+        if kind.startswith(':POWE'):
+            return '%.4f' % (v * i)
+        return '%.4f' % v
+
+    def outp(dev, m):
+        _ch(dev, m.group(1))['out'] = m.group(2).upper()
+
+    return dict(dialogues={'*IDN?': 'RIGOL TECHNOLOGIES,DP832A,DP8B000000001,00.01.16'},
+                properties={'INST': 'CH1'},
+                handlers=[(r'APPL CH(\d),([^,]+)(?:,(.+))?', appl),
+                          (r'APPL\? CH(\d)', appl_q),
+                          (r'MEAS(:ALL|:VOLT|:CURR|:POWE)?\? CH(\d)', meas),
+                          (r'OUTP CH(\d),(ON|OFF)', outp),
+                          (r'OUTP\? CH(\d)', lambda dev, m: _ch(dev, m.group(1))['out']),
+                          (r'INST CH(\d)', lambda dev, m: dev.properties.__setitem__('INST', 'CH' + m.group(1)))])
+
+
+_FUNC = {'CUR': 'CC', 'VOL': 'CV', 'RES': 'CR', 'POW': 'CP'}
+
+
+def _dl3000():
+    def meas(dev, m):
+        on = dev.properties.get('SOUR:INP:STAT', '0') in ('1', 'ON')
+        v, i = 5.0, float(dev.properties.get('SOUR:CURR:LEV:IMM', 0)) if on else 0.0
+        return '%.4f' % {'VOL': v, 'CUR': i, 'RES': v / i if i else 9e9, 'POW': v * i}[m.group(1).upper()[:3]]
+
+    return dict(dialogues={'*IDN?': 'RIGOL TECHNOLOGIES,DL3021A,DL3A000000001,00.01.02'},
+                properties={'SOUR:FUNC': 'CURR', 'SOUR:INP:STAT': '0'},
+                handlers=[(r'MEAS(?:ure)?:(VOLT|CURR|RES|POW)\w*:DC\?', meas),
+                          (r'SOUR:FUNC\?', lambda dev, m: _FUNC.get(dev.properties['SOUR:FUNC'].upper()[:3], 'CC'))])
+
+
+def _dmm(idn, binary=False, stats=True):
+    def samples(dev):
+        n = int(float(dev.properties.get('SAMP:COUN', 1)))
+        rand = dev.state.setdefault('rand', random.Random(0))
+        return np.array([1.0 + rand.gauss(0.0, 1e-5) for _ in range(n)])
+
+    def init(dev, m):
+        dev.state['readings'] = samples(dev)
+
+    def read(dev, m):
+        if m.group(1).upper() == 'FETC' and 'readings' in dev.state:
+            vals = dev.state['readings']
+        else:
+            vals = samples(dev)
+        if binary and dev.properties.get('FORM:DATA', 'ASC').upper().startswith('REAL'):
+            fmt = '>d' if dev.properties['FORM:DATA'].upper().endswith('64') else '>f'
+            return make_block(vals.astype(fmt).tobytes())
+        return ','.join('%+.8E' % v for v in vals)
+
+    def meas(dev, m):
+        return '%+.8E' % _noise(dev, 1.0 if m.group(1).upper().startswith('VOLT') else 1e-3)
+
+    def aver_all(dev, m):
+        vals = dev.state.get('readings', np.zeros(1))
+        sdev = vals.std(ddof=1) if len(vals) > 1 else 0.0
+        return '%+.8E,%+.8E,%+.8E,%+.8E' % (vals.mean(), sdev, vals.min(), vals.max())
+
+    def hist_all(dev, m):
+        vals = dev.state.get('readings', np.zeros(1))
+        bins = int(dev.properties.get('CALC:TRAN:HIST:POIN', 10))
+        lower, upper = vals.min(), vals.max()
+        inner = np.histogram(vals, bins=np.linspace(lower, upper, bins + 1))[0]
+        return ','.join(['%+.8E' % lower, '%+.8E' % upper, '%d' % len(vals), '0'] +
+                        ['%d' % c for c in inner] + ['0'])
+
+    handlers = [(r'(READ|FETC)\?', read),
+                (r'MEAS(?:ure)?:(VOLT\w*|CURR\w*):(?:DC|AC)\?(?: .*)?', meas),
+                (r'CALC\w*:AVER\w*:AVER\w*\?', lambda dev, m: '%+.8E' % _noise(dev, 1.0)),
+                (r'INIT', init),
+                (r'(\*TRG|SYST\w*:REM\w*)', lambda dev, m: None)]
+    if stats:
+        handlers += [(r'CALC:AVER:ALL\?', aver_all), (r'CALC:TRAN:HIST:ALL\?', hist_all)]
+    else:
+        # 不支持的查询: 记 -113, 不应答
+        handlers += [(r'CALC:(AVER|TRAN:HIST):ALL\?', lambda dev, m: dev.errors.append('-113,"Undefined header"'))]
+    return dict(dialogues={'*IDN?': idn},
+                properties={'SAMP:COUN': '1', 'FORM:DATA': 'ASC', 'TRIG:SOUR': 'IMM'},
+                handlers=handlers)
+
+
+def _wavedesc(n, gain, offset, dt, hoff, word=False, probe=1.0, code_per_div=25.0):
+    d = bytearray(346)
+    d[0:8] = b'WAVEDESC'
+    struct.pack_into('<h', d, 32, 1 if word else 0)
+    struct.pack_into('<h', d, 34, 1)
+    struct.pack_into('<l', d, 36, 346)
+    struct.pack_into('<l', d, 60, n * (2 if word else 1))
+    struct.pack_into('<l', d, 116, n)
+    struct.pack_into('<f', d, 156, gain)
+    struct.pack_into('<f', d, 160, offset)
+    struct.pack_into('<f', d, 164, code_per_div)
+    struct.pack_into('<h', d, 172, 16 if word else 8)
+    struct.pack_into('<f', d, 176, dt)
+    struct.pack_into('<d', d, 180, hoff)
+    struct.pack_into('<d', d, 328, probe)
+    return bytes(d)
+
+
+def _sine_codes(n, dtype, amp):
+    return (amp * np.sin(np.linspace(0, 20 * np.pi, n, endpoint=False))).astype(dtype)
+
+
+def _sds2504x(points=1000000):
+    def data(dev, m):
+        word = dev.properties.get('WAV:WIDT', 'BYTE').upper().startswith('WORD')
+        codes = dev.state.get(word)
+        if codes is None:
+            codes = dev.state[word] = _sine_codes(points, '<i2' if word else np.int8, 8000 if word else 100)
+        start = int(dev.properties.get('WAV:STAR', 0))
+        count = int(dev.properties.get('WAV:POIN', points))
+        return make_block(codes[start:start+count].tobytes())
+
+    def pava(dev, m):
+        return 'C%s:PAVA %s,%.3EV' % (m.group(1), m.group(2), _noise(dev, 1.0, 1e-3))
+
+    return dict(dialogues={'*IDN?': 'Siglent Technologies,SDS2504X Plus,SDS2PBAX000001,1.5.2',
+                           'TIM:SCAL?': '1.00E-03', 'WAV:MAXP?': '5000000', 'TRIG:STAT?': 'Stop'},
+                properties={'WAV:WIDT': 'BYTE', 'WAV:STAR': '0'},
+                handlers=[(r'WAV:PRE\?', lambda dev, m: b'DESC,' + make_block(
+                              _wavedesc(points, 1.0, 0.0, 1e-8, 0.0))),
+                          (r'WAV:DATA\?', data),
+                          (r'C(\d):PAVA\? (\w+)', pava),
+                          (r'MEAS:SIMP:VAL\? \w+', lambda dev, m: '%.6E' % _noise(dev, 1e3, 1e-4))])
+
+
+def _lecroy(points=1000000):
+    def wf(dev, m):
+        word = dev.properties.get('COMM_FORMAT', 'DEF9,WORD,BIN').upper().find('WORD') >= 0
+        n = points
+        if m.group(2).upper() == 'DESC':
+            return b'DESC,' + make_block(_wavedesc(n, 1e-4, 0.0, 1e-9, -5e-4, word))
+        codes = dev.state.get(word)
+        if codes is None:
+            codes = dev.state[word] = _sine_codes(n, '<i2' if word else np.int8, 8000 if word else 100)
+        return b'DAT1,' + make_block(codes.tobytes())
+
+    def inr(dev, m):
+        # 屏幕拷贝在下一次查询时完成
+        done = dev.state.pop('scdp', False)
+        return 'INR %d' % (2 if done else 0)
+
+    return dict(dialogues={'*IDN?': 'LECROY,HDO9404,LCRY0000N00001,9.8.0'},
+                properties={'TRIG_MODE': 'AUTO'},
+                handlers=[(r'C(\d):WF\? (DESC|DAT1)', wf),
+                          (r'INR\?', inr),
+                          (r'SCDP', lambda dev, m: dev.state.__setitem__('scdp', True)),
+                          (r'C(\d):PAVA\? (\w+)', lambda dev, m: 'C%s:PAVA %s,%.4E V,OK' % (
+                              m.group(1), m.group(2), _noise(dev, 1.0, 1e-3)))])
+
+
+def _sdg(idn):
+    def bswv(dev, m):
+        wave = dev.state.setdefault('C' + m.group(1), {'WVTP': 'SINE', 'FRQ': '1000HZ', 'AMP': '4V', 'OFST': '0V'})
+        items = [p.strip() for p in m.group(2).split(',')]
+        for name, value in zip(items[0::2], items[1::2]):
+            wave[name.upper()] = value
+
+    def bswv_q(dev, m):
+        wave = dev.state.setdefault('C' + m.group(1), {'WVTP': 'SINE', 'FRQ': '1000HZ', 'AMP': '4V', 'OFST': '0V'})
+        return 'C%s:BSWV %s' % (m.group(1), ','.join('%s,%s' % kv for kv in wave.items()))
+
+    return dict(dialogues={'*IDN?': idn, 'STL? USER': 'STL WVNM,wave650mv800mv30ms,ramp1'},
+                handlers=[(r'C(\d):BSWV ([^?]+)', bswv),
+                          (r'C(\d):BSWV\?', bswv_q)])
+
+
+def _b2902b():
+    def meas(dev, m):
+        ch = m.group(1)
+        if m.group(2).upper().startswith('VOLT'):
+            return '%+.6E' % float(dev.properties.get('SOUR%s:VOLT' % ch, 0))
+        return '%+.6E' % _noise(dev, 1e-3)
+
+    return dict(dialogues={'*IDN?': 'Keysight Technologies,B2902B,MY00000001,5.0.2041.3'},
+                handlers=[(r'MEAS(\d):(VOLT|CURR)\?', meas),
+                          (r'SOUR(\d):VOLT (RANG:AUTO \w+)',
+                           lambda dev, m: dev.properties.__setitem__('SOUR%s:VOLT:RANG:AUTO' % m.group(1), m.group(2)))])
+
+
+def _chamber(plant, eol_reply='%s:%s'):
+    def temp(dev, m):
+        return eol_reply % ('t', '%.2f' % plant.temp())
+
+    def setp(dev, m):
+        plant.set(float(m.group(1)))
+
+    return dict(dialogues={'*VER': 'ver:ZCTB-400L sim 1.0'},
+                handlers=[(r't', temp),
+                          (r's=(-?[\d.]+)', setp),
+                          (r's', lambda dev, m: 's:%g' % plant.setpoint),
+                          (r'st', lambda dev, m: 'st:%d' % plant.stable()),
+                          (r'sr=(\d+)', lambda dev, m: setattr(plant, 'tau', max(1.0, 600.0 / max(1, int(m.group(1)))))),
+                          (r'co', lambda dev, m: 'co:%s' % dev.properties.get('CO', 'auto')),
+                          (r'co=(\w+)', lambda dev, m: dev.properties.__setitem__('CO', m.group(1))),
+                          (r'po', lambda dev, m: 'po:%d' % min(100, int(abs(plant.setpoint - plant.temp()) * 10))),
+                          (r'pt', lambda dev, m: 'pt:0')])
+
+
+def _ats5xx(plant):
+    return dict(handlers=[(r'TEMP\?', lambda dev, m: '%.1f' % plant.temp()),
+                          (r'SETP ([-\d.]+)', lambda dev, m: plant.set(float(m.group(1)))),
+                          # '%RM' 不带结束符, 与下一条命令同行到达
+                          (r'(?:%RM)?SETN \d+', lambda dev, m: None)])
+
+
+def _gpd():
+    def vset(dev, m):
+        dev.state[m.group(1).upper() + m.group(2)] = float(m.group(3))
+
+    def get(dev, m):
+        kind, ch = m.group(1).upper(), m.group(2)
+        val = dev.state.get(('V' if kind[0] == 'V' else 'I') + 'SET' + ch, 0.0)
+        if kind.endswith('OUT') and not dev.state.get('out'):
+            val = 0.0
+        return '%.3f%s' % (val, 'V' if kind[0] == 'V' else 'A')
+
+    return dict(dialogues={'*IDN?': 'GW INSTEK,GPD-3303D,GEO000001,V2.0'},
+                handlers=[(r'(VSET|ISET)(\d):([\d.]+)', vset),
+                          (r'(VSET|ISET|VOUT|IOUT)(\d)\?', get),
+                          (r'OUT([01])', lambda dev, m: dev.state.__setitem__('out', m.group(1) == '1'))])
+
+
+def _gds():
+    return dict(dialogues={'*IDN?': 'GW,GDS-2104E,GES000001,V1.00', 'TRIGGER:STATE?': '3'})
+
+
+_IDN_GENERIC = 'UIM,SIM,0,1.0'
+
+# 驱动类名 -> profile; 串口设备的 plant 在 make() 中创建
+PROFILES = {
+    # vxi11
+    'DP800': _dp800,
+    'DL3000': _dl3000,
+    'KEYSIGHT_344X': lambda: _dmm('Keysight Technologies,34461A,MY00000001,A.03.01', binary=True),
+    'SDM3065': lambda: _dmm('Siglent Technologies,SDM3065X,SDM36FAX000001,1.01.01.25'),
+    'SDS2504X': _sds2504x,
+    'LECROY_HD9000': _lecroy,
+    'SDG6000X_E': lambda: _sdg('Siglent Technologies,SDG6052X-E,SDG6XEAX000001,6.01.01.35'),
+    # VISA
+    'DigitalMultimeterSDM3065X': lambda: _dmm('Siglent Technologies,SDM3065X,SDM36FAX000002,1.01.01.25'),
+    'Keysight34461A': lambda: _dmm('Keysight Technologies,34461A,MY00000002,A.03.01', binary=True),
+    'SDG7102A': lambda: _sdg('Siglent Technologies,SDG7102A,SDG7AAAX000001,7.01.01.10'),
+    'OscilloscopeSDS2504X': _sds2504x,
+    'DP832A': _dp800,
+    'SPD3303X': lambda: dict(dialogues={'*IDN?': 'Siglent Technologies,SPD3303X,SPD3XIDX000001,1.01.01.02.07'}),
+    'GPO_2303S': lambda: dict(dialogues={'*IDN?': 'GW INSTEK,GPD-2303S,GEO000002,V1.00'}),
+    'B2902B': _b2902b,
+    'DL3021A': _dl3000,
+    # serial
+    'ZCTB_400L': None,
+    'ZCTB': None,
+    'TEMP_BOX': None,
+    'ATS5XX': None,
+    'GPD_X303X': _gpd,
+    'AGILENT_344X': lambda: _dmm('HEWLETT-PACKARD,34401A,0,11-5-2'),
+    'GDS_2000x': _gds,
+}
+
+
+def make(driver, latency=None, overrides=None, plant=None):
+    """SimDevice for a driver class name, e.g. make('DP800', Latency(0.002, 0.0005))
+
+    :plant: ThermalPlant for the chamber / bath profiles
+    """
+    if driver in ('ZCTB_400L', 'ZCTB', 'TEMP_BOX'):
+        profile = _chamber(plant or ThermalPlant())
+    elif driver == 'ATS5XX':
+        profile = _ats5xx(plant or ThermalPlant())
+    else:
+        profile = PROFILES[driver]()
+    profile.setdefault('dialogues', {}).setdefault('*IDN?', _IDN_GENERIC)
+    return SimDevice(driver, latency=latency, overrides=overrides, **profile)
+
+
+def attach(driver_obj, device=None, latency=None):
+    """replace the session of a constructed vxi11 driver with a FakeVxi11
+
+        psu = attach(DP800('sim'), latency=Latency(0.002, 0.0005))
+    """
+    device = device or make(type(driver_obj).__name__, latency)
+    driver_obj.session = FakeVxi11(device)
+    return driver_obj
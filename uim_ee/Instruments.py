@@ -9,48 +9,231 @@
 
 # here put the import lib
 
-import pyvisa as visa
+# 平铺脚本 (python Instruments.py / 在本目录 from Instruments import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
+
+import contextlib
+import threading
 import time
-import numpy as np
-import serial
-import see  
-
-
-# debug 信息
-DEBUG = 1
-def debugPrint(msg):
-    if DEBUG:
-        print(msg)
+from . import InstrProfile
+from .LazyImport import lazy_import
+from .SerialLink import SerialLink
+from .StateShadow import StateShadow
+from .VxiInstr import VxiInstrument
+from .OpcWait import poll_until
+from .ScpiBatch import ScpiBatch
+from .MeterStats import MeterStats
+from .AsyncInstr import instrument_lock
+from .LinkPool import pool
+from .Trace import debugPrint, TracedAttr
+
+# 首次使用时导入
+visa = lazy_import('pyvisa', 'pyvisa')
+np = lazy_import('numpy')
+serial = lazy_import('serial', 'pyserial')
+
+
+# 进程内共享的 VISA ResourceManager 及资源列表缓存
+RESOURCE_TTL = 30.0     # s, 资源列表缓存有效期
+_rm = None
+_rm_lock = threading.Lock()
+_resources = ()
+_resources_time = None
+
+
+def resource_manager():
+    """the process-wide visa.ResourceManager, created on first use"""
+    global _rm
+    with _rm_lock:
+        if _rm is None:
+            _rm = visa.ResourceManager()
+        return _rm
+
+
+def list_resources(refresh=False, ttl=None):
+    """cached rm.list_resources()
+
+    :refresh: True to rescan the buses now
+    :ttl: cache lifetime in s, default RESOURCE_TTL
+    """
+    global _resources, _resources_time
+    ttl = RESOURCE_TTL if ttl is None else ttl
+    rm = resource_manager()
+    with _rm_lock:
+        now = time.monotonic()
+        if refresh or _resources_time is None or now - _resources_time > ttl:
+            _resources = rm.list_resources()
+            _resources_time = now
+        return _resources
 
 
 # 仪器初始化
 class InstrumentInitial(object):
+    # 支持 FORM:DATA REAL 二进制传输的仪器置为 True
+    binary_format = False
+    batch_max_len = 256     # 单条消息最大长度
+    inst = TracedAttr('visa')
+
     def __init__(self, instr_id):
         self.instr_id = instr_id
-        self.rm = visa.ResourceManager()
+        self.rm = resource_manager()
         self.dev_connect_visa = False
-        self.dev_list = self.rm.list_resources()
+        self.dev_list = ()
         self.inst = None
+        self.shadow = StateShadow()
+        self._batch = None
         self.list_connected_devices()
 
     def instr_initial(self):
         try:
-            self.inst = self.rm.open_resource('{}'.format(self.instr_id))
+            # 同一资源的驱动对象共用一条连接
+            self.inst = pool.visa(self.rm, '{}'.format(self.instr_id))
         except(visa.errors.Error, visa.errors.VisaIOError) as e:
             print("\033[0;31mERROR: {} UNCONNECT\033[0m".format(self.instr_id))     # 30-37
 
+    @property
+    def profile(self):
+        """identity and capabilities (InstrProfile.Profile), *IDN? is queried once per address"""
+        return InstrProfile.profile(self.instr_id, self.query_command)
+
+    def capability(self, name, default=None):
+        # 型号能力表 / 运行中学到的能力, 未知或查询失败时用 default
+        try:
+            return self.profile.get(name, default)
+        except Exception as e:
+            debugPrint('%s profile: %s' % (self.instr_id, e))
+            return default
+
+    def learn(self, name, value):
+        # 记下运行中发现的型号能力 (如不支持的命令), 以后不再尝试
+        try:
+            InstrProfile.learn(self.profile, name, value)
+        except Exception as e:
+            debugPrint('%s profile: %s' % (self.instr_id, e))
+
     @property
     def dev_info(self):
-        return self.inst.query("*IDN?")
+        return self.profile.idn
 
     def write_command(self, command):
-        self.inst.write(command)
+        if command.lstrip().upper().startswith(('*RST', '*CLS')):
+            self.shadow.invalidate()
+        if self._batch is not None:
+            self._batch.add(command)
+            return
+        self._write(command)
+
+    def _write(self, command):
+        try:
+            self.inst.write(command)
+        except visa.errors.Error:
+            self.shadow.invalidate()
+            raise
 
     def query_command(self, command):
-        return self.inst.query(command)
+        if self._batch is not None:
+            self._batch.flush()
+        try:
+            return self.inst.query(command)
+        except visa.errors.Error:
+            self.shadow.invalidate()
+            raise
+
+    @contextlib.contextmanager
+    def batch(self):
+        """send the write_command calls made inside the block as one ';' joined message
+
+            with smu.batch():
+                smu.set_voltage(1, 3.3)
+                smu.set_state(1, 'ON')
+        """
+        if self._batch is not None:
+            yield self._batch
+            return
+        self._batch = ScpiBatch(self._write, self.batch_max_len)
+        try:
+            yield self._batch
+            batch, self._batch = self._batch, None
+            batch.flush()
+        except Exception:
+            self.shadow.invalidate()
+            raise
+        finally:
+            self._batch = None
+
+    def wait_complete(self, timeout=10.0, srq=False):
+        """block until all pending operations are complete
+
+        :timeout: s, upper bound for the operation
+        :srq: False: *OPC? query; True: *OPC sets ESB, wait for the service request event
+        """
+        if self._batch is not None:
+            self._batch.flush()
+        # 连接共享时, 修改 timeout 到恢复之间不让其他线程插入
+        with instrument_lock(self):
+            old = self.inst.timeout
+            self.inst.timeout = timeout * 1000
+            try:
+                if srq:
+                    event = visa.constants.EventType.service_request
+                    self.inst.enable_event(event, visa.constants.EventMechanism.queue)
+                    try:
+                        self.inst.write('*ESE 1;*SRE 32;*OPC')
+                        self.inst.wait_on_event(event, int(timeout * 1000))
+                        self.inst.read_stb()
+                    finally:
+                        self.inst.disable_event(event, visa.constants.EventMechanism.queue)
+                else:
+                    self.inst.query('*OPC?')
+            except visa.errors.Error:
+                self.shadow.invalidate()
+                raise
+            finally:
+                self.inst.timeout = old
+
+    def write_setting(self, command, key=None, resets=False):
+        """write a configuration command unless it is already in effect
+
+        :command: e.g. 'VOLT:DC:NPLC 0.05'
+        :key: shadow key, default the command header ('VOLT:DC:NPLC')
+        :resets: the command resets other settings (CONF), forget them when it is sent
+        :return: True if the command was sent
+        """
+        key = command.split(' ', 1)[0] if key is None else key
+        if resets and not self.shadow.same(key, command):
+            self.shadow.invalidate()
+        return self.shadow.write(self.write_command, command, key, command)
+
+    def query_binary(self, command, datatype='d', big_endian=True):
+        # IEEE 488.2 定长数据块, 由 np.frombuffer 直接解析
+        return self.inst.query_binary_values(command, datatype=datatype, is_big_endian=big_endian,
+                                             container=np.ndarray)
+
+    def query_array(self, command):
+        # 逗号分隔的 ASCII 数据, 一次解析为 np.ndarray
+        return np.fromstring(self.query_command(command), sep=',')
+
+    def read_burst(self, command, real=64):
+        """read a multi-sample reply (READ?, FETC?) as np.ndarray
+
+        :real: 64 or 32, FORM:DATA REAL width when binary_format is supported,
+               otherwise the ASCII reply is parsed
+        """
+        if not self.capability('binary_format', self.binary_format):
+            return self.query_array(command)
+        self.write_command('FORM:DATA REAL,{}'.format(real))
+        try:
+            return self.query_binary(command, 'd' if real == 64 else 'f')
+        finally:
+            self.write_command('FORM:DATA ASC')
 
-    def list_connected_devices(self):
-        self.dev_list = self.rm.list_resources()
+    def list_connected_devices(self, refresh=False):
+        # refresh=True 时重新扫描总线, 否则使用缓存的资源列表
+        self.dev_list = list_resources(refresh)
         self.dev_connect_visa = False
         # 'IP:169.254.174.89'   # 'TCPIP0::169.254.174.89::inst0::INSTR'
         # 'GPIB:2'      # 'GPIB0::12::INSTR'
@@ -74,7 +257,10 @@ class InstrumentInitial(object):
 
 
 """数字万用表"""
-class DigitalMultimeterSDM3065X(InstrumentInitial):
+class DigitalMultimeterSDM3065X(MeterStats, InstrumentInitial):
+    # 统计在 CALC:FUNC AVER 下累计
+    stats_enable = ('CALC:FUNC AVER', 'CALC:STAT ON')
+
     def __init__(self, dev_id):
         InstrumentInitial.__init__(self, dev_id)
         self.instr_initial()
@@ -89,25 +275,30 @@ class DigitalMultimeterSDM3065X(InstrumentInitial):
 
     def dc_voltage(self, counts=1, plc=0.005):
         # 等待 测量完成并将所有可用的测量结果复制到仪器的输出缓冲区
-        self.write_command('CONF:VOLT:DC')
+        self.write_setting('CONF:VOLT:DC', key='CONF', resets=True)
         # self.write_command('TRIG:SOUR IMM')  # 设置触发源为立即触发
-        self.write_command('VOLT:DC:NPLC {}'.format(plc))
+        self.write_setting('VOLT:DC:NPLC {}'.format(plc))
 
-        self.write_command('SAMP:COUN {}'.format(counts))  # 设置采样次数
+        self.write_setting('SAMP:COUN {}'.format(counts))  # 设置采样次数
+
+        return self.query_array('READ?').tolist()  # 读取本次测量生成的测量值
 
-        voltage_str = self.query_command('READ?')[:-1]  # 读取本次测量生成的测量值
-        voltage_out = []
-        for voltage in voltage_str.split(','):
-            voltage_out.append(float(voltage))
-        return voltage_out
+    def dc_voltage_burst(self, counts=1000, plc=0.005):
+        # 多次采样, 返回 np.ndarray
+        self.write_setting('CONF:VOLT:DC', key='CONF', resets=True)
+        self.write_setting('VOLT:DC:NPLC {}'.format(plc))
+        self.write_setting('SAMP:COUN {}'.format(counts))  # 设置采样次数
+        return self.read_burst('READ?')
 
     def measure_dc_current(self, plc=0.05, RANG=20e-3):
         # Measure Current
         # PLC: 0.005,0.05,0.5,1,10,100
         # RANG: Auto,200e-6,2e-3,20e-3,200e-3
-        self.write_command('CONF:CURR:DC')
-        self.write_command('CURR:DC:NPLC {}'.format(plc))
-        self.write_command('CURR:DC:RANG {}'.format(RANG))
+        # 配置未变化时只发送 READ?
+        self.write_setting('CONF:CURR:DC', key='CONF', resets=True)
+        self.write_setting('CURR:DC:NPLC {}'.format(plc))
+        self.write_setting('CURR:DC:RANG {}'.format(RANG))
+        self.write_setting('SAMP:COUN 1')
         ret = self.query_command('READ?')[:-1]
         # ret = self.query_command('MEAS:CURR:DC?')
         # time.sleep(wait_time)
@@ -118,9 +309,10 @@ class DigitalMultimeterSDM3065X(InstrumentInitial):
         # Measure Voltage
         # PLC: 0.005,0.05,0.5,1,10,100
         # RANG: Auto,200e-3,2,20,200,1000
-        self.write_command('CONF:VOLT:DC')
-        self.write_command('VOLT:DC:NPLC {}'.format(plc))
-        self.write_command('VOLT:DC:RANG {}'.format(RANG))
+        self.write_setting('CONF:VOLT:DC', key='CONF', resets=True)
+        self.write_setting('VOLT:DC:NPLC {}'.format(plc))
+        self.write_setting('VOLT:DC:RANG {}'.format(RANG))
+        self.write_setting('SAMP:COUN 1')
         ret = self.query_command('READ?')[:-1]
         voltage = float(ret.replace('\n', ''))
         return voltage
@@ -128,14 +320,17 @@ class DigitalMultimeterSDM3065X(InstrumentInitial):
     def measure_resistence(self, plc=0.05, RANG=200):
         # Rang: 200 Ω|2 kΩ|20 kΩ|200 kΩ|1 MΩ|10 MΩ|100 MΩ
         # PLC: 0.005,0.05,0.5,1,10,100
-        self.write_command('CONF:RES')
-        self.write_command('RES:RANG {}'.format(RANG))
-        self.write_command('RES:NPLC {}'.format(plc))
+        self.write_setting('CONF:RES', key='CONF', resets=True)
+        self.write_setting('RES:RANG {}'.format(RANG))
+        self.write_setting('RES:NPLC {}'.format(plc))
+        self.write_setting('SAMP:COUN 1')
         ret = self.query_command('READ?')[:-1]
         resistence = float(ret.replace('\n', ''))
         return resistence
 
-class Keysight34461A(InstrumentInitial):
+class Keysight34461A(MeterStats, InstrumentInitial):
+    binary_format = True
+
     def __init__(self, dev_id):
         InstrumentInitial.__init__(self, dev_id)
         self.instr_initial()
@@ -154,34 +349,31 @@ class Keysight34461A(InstrumentInitial):
         self.write_command('TRIG:SOUR IMM')  # 设置触发源为立即触发
         self.write_command('VOLT:DC:RANG:AUTO ON')  # 设置电压量程自动调整
         self.write_command('SAMP:COUN {}'.format(counts))  # 设置采样次数
-        voltage_str = self.query_command('READ?')[:-1]  # 读取本次测量生成的测量值
-        voltage_out = []
-        for voltage in voltage_str.split(','):
-            voltage_out.append(float(voltage))
-        return voltage_out
+        return self.query_array('READ?').tolist()  # 读取本次测量生成的测量值
 
-    def dc_voltage_counts(self, counts=10, plc=0.02):
-        # 等待 测量完成并将所有可用的测量结果复制到仪器的输出缓冲区
-        self.write_command('CONF:VOLT:DC {},0.003'.format(plc))
+    def dc_voltage_burst(self, counts=1000, plc=0.02, real=64):
+        # 多次采样, 以 FORM REAL 二进制块读回, 返回 np.ndarray
+        self.write_command('CONF:VOLT:DC {}, 0.003'.format(plc))
+        self.write_command('TRIG:SOUR IMM')  # 设置触发源为立即触发
         self.write_command('VOLT:DC:RANG:AUTO ON')  # 设置电压量程自动调整
-        # self.write_command('VOLT:DC:RANG:MAX')  # 设置电压量程自动调整
-        self.write_command('TRIG:SOUR BUS')  # 设置触发源为等待触发
         self.write_command('SAMP:COUN {}'.format(counts))  # 设置采样次数
-        self.write_command('INIT')
-        self.write_command('*TRG')
-        time.sleep(0.1)
-        voltage_str = self.query_command('FETC?')[:-1]  # 读取本次测量生成的测量值
-        # vol = voltage_str.split(',')[0]
-        voltage_float = []
-        for vol in voltage_str.split(','):
-            voltage_float.append(float(vol))
-        print(np.mean(voltage_float))
-        return np.mean(voltage_float)
+        return self.read_burst('READ?', real)
+
+    def dc_voltage_counts(self, counts=10, plc=0.02):
+        # 仪器内部求平均, 只读回统计值; CONF 后量程为自动
+        mean = self.statistics(counts, conf='VOLT:DC', plc=plc).mean
+        debugPrint(mean)
+        return mean
 
     def measure_dc_current(self, wait_time=2):
-        # counts = 1
-        ret = self.query_command('MEAS:CURR:DC?')
-        time.sleep(wait_time)
+        # wait_time: 测量时间上限 s, 查询在测量完成时即返回
+        with instrument_lock(self):
+            old = self.inst.timeout
+            self.inst.timeout = max(old, wait_time * 1000)
+            try:
+                ret = self.query_command('MEAS:CURR:DC?')
+            finally:
+                self.inst.timeout = old
         current = float(ret.replace('\n', ''))
         return current
 
@@ -196,9 +388,11 @@ class SDG7102A(InstrumentInitial):
         self.write_command('C{}:BSWV WVTP,{}'.format(channel, wvtp))
 
     def set_freq(self, channel, freq, amp=3.3, offset=2):
-        self.write_command('C{}:BSWV FRQ,{}'.format(channel, freq))
-        self.write_command('C{}:BSWV AMP,{}'.format(channel, amp))
-        self.write_command('C{}:BSWV OFST,{}'.format(channel, offset))
+        # 合并为一条 C1:BSWV FRQ,..,AMP,..,OFST,..
+        with self.batch():
+            self.write_command('C{}:BSWV FRQ,{}'.format(channel, freq))
+            self.write_command('C{}:BSWV AMP,{}'.format(channel, amp))
+            self.write_command('C{}:BSWV OFST,{}'.format(channel, offset))
 
 
 """示波器"""
@@ -223,17 +417,18 @@ class OscilloscopeSDS2504X(InstrumentInitial):
         :return:
         """
         self.write_command('MEAS:SIMP:SOUR C{}'.format(ch))
-        time.sleep(2)
-        value = float(self.query_command('MEAS:SIMP:VAL? {}'.format(type)).split('\n')[0])
-        return value
+        self.wait_complete()
+
+        # 切换信源后测量值为 **** 直到新的采集完成
+        def value():
+            ret = self.query_command('MEAS:SIMP:VAL? {}'.format(type)).split('\n')[0]
+            return None if '*' in ret else ret
+        return float(poll_until(value, timeout=2))
 
     def trigger_state(self, mode='STOP'):
         self.write_command('TRIG:{}'.format(mode))
 
-class LECROY_HD9000():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
-
+class LECROY_HD9000(VxiInstrument):
     def getIDN(self):
         ret = self.session.ask('*IDN?')
         debugPrint(ret)
@@ -353,9 +548,10 @@ class LECROY_HD9000():
         <portname>:= {GPIB, NET}
         """
         self.session.write('HCSU DEV,PNG,FORMAT,PORTRAIT,BCKG,BLACK,DEST,FILE,DIR,"%s",AREA,GRIDAREAONLY,FILE,"%s"' % (dirpath, filename))
-        self.session.ask('INR?')
-        time.sleep(0.1)
+        self.session.ask('INR?')    # 读取即清零
         self.session.write('SCDP')
+        # INR bit1: 屏幕拷贝完成
+        poll_until(lambda: int(self.session.ask('INR?').split()[-1]) & 2)
 
 """电源"""
 class DP832A(InstrumentInitial):
@@ -376,8 +572,9 @@ class SPD3303X(InstrumentInitial):
         self.instr_initial()
 
     def set_voltage_current(self, channel, voltage, current=1):
-        self.write_command('CH{}:VOLTage {}'.format(channel, voltage))
-        self.write_command('CH{}:CURRent {}'.format(channel, current))
+        with self.batch():
+            self.write_command('CH{}:VOLTage {}'.format(channel, voltage))
+            self.write_command('CH{}:CURRent {}'.format(channel, current))
 
     def channel_state(self, channel, state):
         self.write_command('OUTP CH{},{}'.format(channel, state.upper()))
@@ -411,15 +608,16 @@ class B2902B(InstrumentInitial):
         self.write_command('*RST')
 
     def set_voltage(self, channel, voltage, curr_lim=1e3):
-        self.write_command(':SOUR{}:FUNC:MODE VOLT'.format(channel))
-        self.write_command(':SOUR{}:VOLT {}'.format(channel, voltage))
-        self.write_command(':SOUR{}:VOLT RANG:AUTO ON'.format(channel))
+        # 扫描时只有电压值变化, 其余设置不重复发送
+        self.write_setting(':SOUR{}:FUNC:MODE VOLT'.format(channel))
+        self.write_setting(':SOUR{}:VOLT {}'.format(channel, voltage))
+        self.write_setting(':SOUR{}:VOLT RANG:AUTO ON'.format(channel), key=':SOUR{}:VOLT:RANG:AUTO'.format(channel))
         # self.write_command(':SOUR{}:VOLT:RANG:AUTO:LLIM {}'.format(channel, volt_range))
-        self.write_command(':SENS{}:CURR:PROT {}'.format(channel, curr_lim))
+        self.write_setting(':SENS{}:CURR:PROT {}'.format(channel, curr_lim))
 
     def set_current(self, channel, current, curr_range=10):
-        self.write_command(':SOUR{}:FUNC:MODE CURR'.format(channel))
-        self.write_command(':SOUR{}:CURR {}'.format(channel, current))
+        self.write_setting(':SOUR{}:FUNC:MODE CURR'.format(channel))
+        self.write_setting(':SOUR{}:CURR {}'.format(channel, current))
         # self.write_command(':SOUR{}:CURR RANG:AUTO ON'.format(channel))
         # self.write_command(':SOUR{}:CURR:RANG:AUTO:LLIM {}'.format(channel, curr_range))
 
@@ -427,13 +625,14 @@ class B2902B(InstrumentInitial):
         self.write_command(':OUTP{} {}'.format(channel, state.upper()))
 
     def meas_set(self, channel, nplc=0.1, curr_lim=1, volt_lim=20):
-        self.write_command(":SENS{}:FUNC 'CURR','VOLT'".format(channel))
-        self.write_command(":SENS{}:CURR:RANG:AUTO ON".format(channel))
-        self.write_command(":SENS{}:CURR:NPLC {}".format(channel, nplc))
-        self.write_command(":SENS{}:CURR:PROT {}".format(channel, curr_lim))
-        self.write_command(":SENS{}:VOLT:RANG:AUTO ON".format(channel))
-        self.write_command(":SENS{}:VOLT:NPLC {}".format(channel, nplc))
-        self.write_command(":SENS{}:VOLT:PROT {}".format(channel, volt_lim))
+        with self.batch():
+            self.write_setting(":SENS{}:FUNC 'CURR','VOLT'".format(channel))
+            self.write_setting(":SENS{}:CURR:RANG:AUTO ON".format(channel))
+            self.write_setting(":SENS{}:CURR:NPLC {}".format(channel, nplc))
+            self.write_setting(":SENS{}:CURR:PROT {}".format(channel, curr_lim))
+            self.write_setting(":SENS{}:VOLT:RANG:AUTO ON".format(channel))
+            self.write_setting(":SENS{}:VOLT:NPLC {}".format(channel, nplc))
+            self.write_setting(":SENS{}:VOLT:PROT {}".format(channel, volt_lim))
 
     def get_curr(self, channel):
         ret = self.query_command(':MEAS{}:CURR?'.format(channel))
@@ -461,8 +660,9 @@ class DL3021A(InstrumentInitial):
     def turn_off(self):
         self.write_command(":SOUR:INP:STAT 0")
     def cur_keep(self, current=3):
-        self.write_command(":SOUR:FUNC CURR")
-        self.write_command(":SOUR:CURR:LEV:IMM {}".format(current))
+        with self.batch():
+            self.write_command(":SOUR:FUNC CURR")
+            self.write_command(":SOUR:CURR:LEV:IMM {}".format(current))
 
 
 """"油槽"""
@@ -471,69 +671,55 @@ class ZCTB(InstrumentInitial):
         InstrumentInitial.__init__(self, dev_id)
         # self.instr_initial()
         self.session = serial.Serial(dev_id, 9600, timeout=0.5)
+        self.link = SerialLink(self.session, eol=b'\n', name=type(self).__name__)
+
+    def write_command(self, command):
+        self.link.write(command)
+
+    def query_command(self, command):
+        return self.link.query(command)
 
     def getID(self):
-        self.write_command('*ver\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt)
+        ret = self.query_command('*ver')
         debugPrint(ret)
 
     def set_temp(self,temp):
-        self.write_command('s={}\n'.format(temp))
+        self.write_command('s={}'.format(temp))
 
     def set_sr(self,scanrate):
-        self.write_command('sr={}\n'.format(scanrate))
+        self.write_command('sr={}'.format(scanrate))
 
     def read_state(self):
         # 0 不稳定 1稳定
-        self.write_command('st\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('st').split(':')[1]
         debugPrint(ret)
         return ret
 
     def read_set_temp(self):
-        self.write_command('s\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('s').split(':')[1]
         debugPrint(ret)
         return ret
 
     def coolstate(self):
-        self.write_command('co\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('co').split(':')[1]
         debugPrint(ret)
 
     def set_cool(self,state : str):
         #on off outo
-        self.write_command(('co={}\n'.format(state)).encode())
+        self.write_command('co={}'.format(state))
 
     def read_current_temp(self):
-        self.write_command('t\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('t').split(':')[1]
         debugPrint(ret)
         return ret
 
     def heatpower(self):
-        self.write_command('po\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('po').split(':')[1]
         debugPrint(ret)
         return ret
 
     def read_holdtime(self):
-        self.write_command('pt\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('pt').split(':')[1]
         debugPrint(ret)
         return ret
 
@@ -547,69 +733,55 @@ class TEMP_BOX(InstrumentInitial):
         InstrumentInitial.__init__(self, dev_id)
         # self.instr_initial()
         self.session = serial.Serial(dev_id, 9600, timeout=0.5)
+        self.link = SerialLink(self.session, eol=b'\n', name=type(self).__name__)
+
+    def write_command(self, command):
+        self.link.write(command)
+
+    def query_command(self, command):
+        return self.link.query(command)
 
     def getID(self):
-        self.write_command('*ver\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt)
+        ret = self.query_command('*ver')
         debugPrint(ret)
 
     def set_temp(self,temp):
-        self.write_command('s={}\n'.format(temp))
+        self.write_command('s={}'.format(temp))
 
     def set_sr(self,scanrate):
-        self.write_command('sr={}\n'.format(scanrate))
+        self.write_command('sr={}'.format(scanrate))
 
     def read_state(self):
         # 0 不稳定 1稳定
-        self.write_command('st\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('st').split(':')[1]
         debugPrint(ret)
         return ret
 
     def read_set_temp(self):
-        self.write_command('s\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('s').split(':')[1]
         debugPrint(ret)
         return ret
 
     def coolstate(self):
-        self.write_command('co\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('co').split(':')[1]
         debugPrint(ret)
 
     def set_cool(self,state : str):
         #on off outo
-        self.write_command(('co={}\n'.format(state)).encode())
+        self.write_command('co={}'.format(state))
 
     def read_current_temp(self):
-        self.write_command('t\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('t').split(':')[1]
         debugPrint(ret)
         return ret
 
     def heatpower(self):
-        self.write_command('po\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('po').split(':')[1]
         debugPrint(ret)
         return ret
 
     def read_holdtime(self):
-        self.write_command('pt\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.query_command('pt').split(':')[1]
         debugPrint(ret)
         return ret
 
@@ -620,6 +792,7 @@ class ATS5XX(InstrumentInitial):
         InstrumentInitial.__init__(self, dev_id)
         # self.instr_initial()
         self.session = serial.Serial(dev_id, 9600, timeout=0.5)
+        self.link = SerialLink(self.session, eol=b'\n', name=type(self).__name__)
 
     def set_temp(self,state, temp):
         """
@@ -630,84 +803,61 @@ class ATS5XX(InstrumentInitial):
         """
 
         # self.session.write(b'*RST')
-        self.session.write(b'%RM')
-        self.session.write(b'SETN %d\n' % state)
-        self.session.write(b'SETP %f\n' % temp)
+        self.link.write_raw(b'%RM')
+        self.link.write(b'SETN %d' % state)
+        self.link.write(b'SETP %f' % temp)
 
     def read_current_temp(self):
-        self.session.write(b'TEMP?\n')
-        time.sleep(0.5)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode()  # .split(':')
-        print(ret)
+        ret = self.link.query('TEMP?')  # .split(':')
+        debugPrint(ret)
         return ret
 
 class ZCTB_400L():  
     def __init__(self, comport) -> None:
         self.session = serial.Serial(comport,9600,timeout=0.5)
+        self.link = SerialLink(self.session, eol=b'\r\n', timeout=1.5, name=type(self).__name__)
 
     def getID(self):
-        self.session.write(b'*ver\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt)
+        ret = self.link.query('*ver')
         debugPrint(ret)
 
     def set_temp(self,temp):
-        self.session.write(b's=%d\r\n'%temp)
+        self.link.write(b's=%d'%temp)
 
     def set_sr(self,scanrate):
-        self.session.write(b'sr=%d\r\n'%scanrate)
+        self.link.write(b'sr=%d'%scanrate)
 
     def read_state(self):
         # 0 不稳定 1稳定
-        self.session.write(b'st\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('st').split(':')[1]
         debugPrint(ret)
         return ret
 
     def read_set_temp(self):
-        self.session.write(b's\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('s').split(':')[1]
         debugPrint(ret)
         return ret
 
     def coolstate(self):
-        self.session.write(b'co\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('co').split(':')[1]
         debugPrint(ret)
 
     def set_cool(self,state : str):
         #on off outo
-        self.session.write(('co=%s\r\n'%state).encode())
+        self.link.write('co=%s'%state)
 
     def read_current_temp(self):
-        self.session.write(b't\r\n')
-        time.sleep(1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('t').split(':')[1]
         debugPrint(ret)
         return ret
 
     def heatpower(self):
-        self.session.write(b'po\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('po').split(':')[1]
         debugPrint(ret)
         return ret
 
     def read_holdtime(self):
-        self.session.write(b'pt\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('pt').split(':')[1]
         debugPrint(ret)
         return ret
 
@@ -717,8 +867,7 @@ class ZCTB_400L():
 if __name__ == '__main__':
 
     print("dedededed")
-    rm = visa.ResourceManager()
-    print(rm.list_resources())
+    print(list_resources())
 
     ## 串口通信
     # ser = serial.Serial('COM6',115200,timeout=0.5)
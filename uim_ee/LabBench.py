@@ -0,0 +1,212 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   LabBench.py
+@Time    :   2026/10/19 01:15:03
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import os
+import threading
+import time
+from .Registry import driver
+from .Trace import debugPrint
+
+
+# 台架上的一台仪器
+class Station():
+    __slots__ = ('role', 'driver', 'address', 'kwargs', 'find', 'lazy', 'timeout',
+                 'obj', 'error', 'import_s', 'connect_s', '_lock', '_thread')
+
+    def __init__(self, role, driver, address=None, kwargs=None, find=None, lazy=False, timeout=10.0) -> None:
+        self.role = role
+        self.driver = driver        # 'DP800' 或 '模块.类'
+        self.address = address
+        self.kwargs = kwargs or {}
+        self.find = find            # 按 Discovery 缓存查找地址 (序列号/型号)
+        self.lazy = lazy
+        self.timeout = timeout
+        self.obj = None
+        self.error = None
+        self.import_s = None        # 导入驱动模块用时
+        self.connect_s = None       # 构造 (连接) 用时
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _resolve(self):
+        if self.find is None:
+            return self.address
+        from . import Discovery
+        hits = [f for f in Discovery.find(self.find) if f.driver is not None]
+        if not hits:
+            raise LookupError('%s: %r not in the discovery cache, run Discovery.discover()' % (self.role, self.find))
+        return hits[0].address
+
+    def _open(self):
+        try:
+            t0 = time.perf_counter()
+            cls = driver(self.driver)
+            t1 = time.perf_counter()
+            self.import_s = t1 - t0
+            address = self._resolve()
+            args = () if address is None else (address,)
+            obj = cls(*args, **self.kwargs)
+            self.connect_s = time.perf_counter() - t1
+            self.error = None
+            self.obj = obj
+        except Exception as e:
+            self.error = e
+            debugPrint('bench %s: %s' % (self.role, e))
+
+    def start(self):
+        """begin connecting in a background thread"""
+        with self._lock:
+            if self._thread is None and self.obj is None:
+                self.error = None
+                self._thread = threading.Thread(target=self._open, name='bench-' + self.role, daemon=True)
+                self._thread.start()
+
+    def join(self, timeout=None):
+        """wait for the connection, return the driver object or raise its error"""
+        self.start()
+        thread = self._thread
+        if thread is not None:
+            thread.join(self.timeout if timeout is None else timeout)
+            if thread.is_alive():
+                raise TimeoutError('%s (%s %s) not connected within %.1f s' % (
+                    self.role, self.driver, self.address or self.find, self.timeout))
+            with self._lock:
+                self._thread = None
+        # 超时后在后台连上的仪器, 之后的访问照常取用
+        if self.obj is not None:
+            return self.obj
+        if self.error is not None:
+            raise self.error
+        return self.obj
+
+
+# 声明式台架
+class LabBench():
+    """instruments of a test bench, described in a TOML / YAML file
+
+        # bench.toml
+        timeout = 10                # 每台默认连接超时 s
+        [instruments.psu]
+        driver = "DP800"
+        address = "192.168.12.119"
+        [instruments.dmm]
+        driver = "Instruments.Keysight34461A"
+        find = "MY00000002"         # 地址取自 Discovery 缓存
+        [instruments.iic]
+        driver = "USB2IIC"
+        kwargs = {sla = 0x5C}
+        lazy = true                 # 首次使用时才连接
+
+        bench = LabBench.load('bench.toml')
+        bench.connect()             # 非 lazy 的仪器并行连接
+        bench.psu.voltSet(1, 3.3)
+        print(bench.report())
+
+    driver is a registry name (Registry.DRIVERS) or 'Module.Class'. A role
+    is an attribute of the bench; using a lazy one connects it then.
+    """
+
+    def __init__(self, config) -> None:
+        """
+        :config: dict as read from a bench file
+        """
+        timeout = float(config.get('timeout', 10.0))
+        lazy = bool(config.get('lazy', False))
+        self.stations = {}
+        for role, spec in config.get('instruments', {}).items():
+            spec = dict(spec)
+            self.stations[role] = Station(role, spec.pop('driver'), spec.pop('address', None),
+                                          spec.pop('kwargs', None), spec.pop('find', None),
+                                          bool(spec.pop('lazy', lazy)), float(spec.pop('timeout', timeout)))
+            if spec:
+                raise ValueError('%s: unknown keys %s' % (role, sorted(spec)))
+        self.connect_s = None
+
+    @classmethod
+    def load(cls, path):
+        """LabBench from a .toml, .yaml or .yml file"""
+        ext = os.path.splitext(path)[1].lower()
+        if ext == '.toml':
+            try:
+                import tomllib
+            except ImportError:         # Python < 3.11
+                import tomli as tomllib
+            with open(path, 'rb') as f:
+                return cls(tomllib.load(f))
+        if ext in ('.yaml', '.yml'):
+            import yaml
+            with open(path, encoding='utf-8') as f:
+                return cls(yaml.safe_load(f))
+        raise ValueError('bench file must be .toml or .yaml: %s' % path)
+
+    def __getattr__(self, role):
+        stations = self.__dict__.get('stations', {})
+        if role not in stations:
+            raise AttributeError(role)
+        return stations[role].join()
+
+    def __getitem__(self, role):
+        return self.stations[role].join()
+
+    def __dir__(self):
+        return sorted(list(super().__dir__()) + list(self.stations))
+
+    def connect(self, roles=None, raise_errors=True):
+        """connect instruments in parallel, each within its timeout
+
+        :roles: roles to connect, default every non-lazy one
+        :raise_errors: False: leave failures in station.error instead of raising
+        :return: {role: error} of the instruments that failed
+        """
+        if roles is None:
+            roles = [r for r, s in self.stations.items() if not s.lazy]
+        t0 = time.perf_counter()
+        for role in roles:
+            self.stations[role].start()
+        errors = {}
+        for role in roles:
+            station = self.stations[role]
+            try:
+                # 并行连接, 各自的超时从同一时刻算起
+                station.join(max(0.0, station.timeout - (time.perf_counter() - t0)))
+            except Exception as e:
+                errors[role] = e
+        self.connect_s = time.perf_counter() - t0
+        if errors and raise_errors:
+            raise ConnectionError('bench: ' + '; '.join('%s: %s' % (r, e) for r, e in errors.items()))
+        return errors
+
+    def connected(self):
+        return {r: s.obj for r, s in self.stations.items() if s.obj is not None}
+
+    def timings(self):
+        """{role: {'import_s', 'connect_s', 'status'}}"""
+        out = {}
+        for role, s in self.stations.items():
+            status = 'ok' if s.obj is not None else 'error' if s.error is not None else \
+                'pending' if s._thread is not None else 'lazy' if s.lazy else 'idle'
+            out[role] = {'import_s': s.import_s, 'connect_s': s.connect_s, 'status': status}
+        return out
+
+    def report(self):
+        """startup timing table, one line per instrument"""
+        width = max([len(r) for r in self.stations] + [4])
+        lines = ['%-*s %-32s %10s %10s  %s' % (width, 'role', 'driver', 'import ms', 'connect ms', 'status')]
+        for role, t in self.timings().items():
+            s = self.stations[role]
+            ms = lambda v: '-' if v is None else '%.1f' % (v * 1e3)
+            status = t['status'] if s.error is None else '%s: %s' % (t['status'], s.error)
+            lines.append('%-*s %-32s %10s %10s  %s' % (width, role, s.driver, ms(t['import_s']), ms(t['connect_s']), status))
+        if self.connect_s is not None:
+            serial = sum(s.connect_s or 0.0 for s in self.stations.values()) + \
+                sum(s.import_s or 0.0 for s in self.stations.values())
+            lines.append('bring-up %.1f ms (%.1f ms one by one)' % (self.connect_s * 1e3, serial * 1e3))
+        return '\n'.join(lines)
@@ -0,0 +1,330 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   LanTransport.py
+@Time    :   2026/10/19 02:31:08
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import re
+import socket
+import struct
+
+
+SOCKET_PORT = 5025
+HISLIP_PORT = 4880
+
+# 应答中需要特别处理的字符: 数据块头 '#', 字符串引号, 结束符
+_SPECIAL = {term: re.compile(b'[#"' + re.escape(term) + b']') for term in (b'\n', b'\r')}
+
+
+def frame_end(buf, pos=0, term=b'\n'):
+    """end of the first complete message in buf, skipping over #<n> blocks and quoted strings
+
+    :pos: where an earlier call stopped scanning
+    :return: (end, pos): end is the index after the terminator or None if
+             more data is needed, pos where to resume scanning then
+    """
+    special = _SPECIAL.get(term) or re.compile(b'[#"' + re.escape(term) + b']')
+    n = len(buf)
+    while True:
+        if pos > n:
+            return None, pos    # 还在数据块内
+        m = special.search(buf, pos)
+        if m is None:
+            return None, n
+        i = m.start()
+        c = buf[i:i+1]
+        if c == term:
+            return i + 1, i + 1
+        if c == b'"':
+            # 引号只在结束符之前配对, 单个引号按普通字符
+            j = buf.find(b'"', i + 1)
+            t = buf.find(term, i + 1)
+            if t >= 0 and (j < 0 or t < j):
+                pos = i + 1
+            elif j < 0:
+                return None, i
+            else:
+                pos = j + 1
+            continue
+        # '#': 定长数据块 #<位数><长度><数据>, 数据中可能含结束符
+        if i + 1 >= n:
+            return None, i
+        digits = buf[i+1] - 0x30
+        if not 1 <= digits <= 9:
+            pos = i + 1         # #0 不定长块或 #H 等非十进制数, 按普通字符
+            continue
+        if i + 2 + digits > n:
+            return None, i
+        length = bytes(buf[i+2:i+2+digits])
+        if not length.isdigit():
+            pos = i + 1         # 长度不是十进制数 (如 'CH#1A'), 按普通字符
+            continue
+        pos = i + 2 + digits + int(length)
+
+
+def parse_address(address, transport=None):
+    """(transport, host, port or HiSLIP sub-address) of a LAN instrument address
+
+        '192.168.12.119'                        vxi11 (or transport)
+        'TCPIP0::192.168.12.119::inst0::INSTR'  vxi11
+        'TCPIP0::192.168.12.119::5025::SOCKET'  socket
+        'TCPIP0::192.168.12.119::hislip0::INSTR' hislip, 'hislip0,4881' for another port
+    """
+    m = re.match(r'TCPIP\d*::([^:]+)::([^:]+)::(SOCKET|INSTR)$', address.strip(), re.I)
+    if m:
+        host, name, kind = m.groups()
+        if kind.upper() == 'SOCKET':
+            return 'socket', host, int(name)
+        if name.lower().startswith('hislip'):
+            return 'hislip', host, name
+        return 'vxi11', host, name
+    transport = (transport or 'vxi11').lower()
+    if transport not in ('vxi11', 'socket', 'hislip'):
+        raise ValueError('unknown LAN transport %r, use vxi11, socket or hislip' % transport)
+    host = address.strip()
+    if transport == 'socket':
+        host, _, port = host.partition(':')
+        return 'socket', host, int(port or SOCKET_PORT)
+    return transport, host, 'hislip0' if transport == 'hislip' else 'inst0'
+
+
+# vxi11.Instrument 的公共接口
+class _LanInstrument():
+    def write(self, message, encoding='utf-8'):
+        if isinstance(message, (list, tuple)):
+            for m in message:
+                self.write(m, encoding)
+            return
+        if isinstance(message, str):
+            message = message.encode(encoding)
+        self.write_raw(message)
+
+    def read(self, num=-1, encoding='utf-8'):
+        return self.read_raw(num).decode(encoding).rstrip('\r\n')
+
+    def ask_raw(self, data, num=-1):
+        self.write_raw(data)
+        return self.read_raw(num)
+
+    def ask(self, message, num=-1, encoding='utf-8'):
+        if isinstance(message, (list, tuple)):
+            return [self.ask(m, num, encoding) for m in message]
+        self.write(message, encoding)
+        return self.read(num, encoding)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _connect(host, port, timeout):
+    s = socket.create_connection((host, port), timeout)
+    # 短命令不等 Nagle 合并
+    s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return s
+
+
+# 原始套接字 SCPI (端口 5025)
+class ScpiSocket(_LanInstrument):
+    """SCPI over a plain TCP connection, duck-typed as vxi11.Instrument
+
+        dmm = ScpiSocket('192.168.12.50')
+        dmm.ask('*IDN?')
+
+    A message is one write terminated by term; a reply ends at term, with
+    #<n> definite-length blocks read by their length, so binary data may
+    contain the terminator. timeout is in s as for vxi11.
+    """
+
+    def __init__(self, host, port=SOCKET_PORT, timeout=10.0, term=b'\n') -> None:
+        self.host = host
+        self.port = port
+        self.term = term
+        self._timeout = timeout
+        self._buf = bytearray()
+        self._sock = _connect(host, port, timeout)
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+        self._sock.settimeout(value)
+
+    def write_raw(self, data):
+        data = bytes(data)
+        if not data.endswith(self.term):
+            data += self.term
+        self._sock.sendall(data)
+
+    def read_raw(self, num=-1):
+        """one reply including its terminator (num is ignored, the reply is always read whole)"""
+        buf = self._buf
+        pos = 0
+        while True:
+            end, pos = frame_end(buf, pos, self.term)
+            if end is not None:
+                data = bytes(buf[:end])
+                del buf[:end]
+                return data
+            # 数据块未收全时按剩余长度一次多收
+            chunk = self._sock.recv(max(65536, pos - len(buf)))
+            if not chunk:
+                raise ConnectionError('%s:%d closed the connection' % (self.host, self.port))
+            buf += chunk
+
+    def close(self):
+        self._buf.clear()
+        self._sock.close()
+
+
+# ---------------------------------------------------------------- HiSLIP
+
+# HiSLIP (IVI-6.1) 消息类型
+INITIALIZE = 0
+INITIALIZE_RESPONSE = 1
+FATAL_ERROR = 2
+ERROR = 3
+DATA = 6
+DATA_END = 7
+ASYNC_MAXIMUM_MESSAGE_SIZE = 15
+ASYNC_MAXIMUM_MESSAGE_SIZE_RESPONSE = 16
+ASYNC_INITIALIZE = 17
+ASYNC_INITIALIZE_RESPONSE = 18
+
+_HEADER = struct.Struct('>2sBBIQ')     # 'HS', 类型, 控制码, 参数, 负载长度
+VENDOR_ID = b'UI'
+
+
+def send_message(sock, kind, control=0, param=0, payload=b''):
+    sock.sendall(_HEADER.pack(b'HS', kind, control, param, len(payload)) + bytes(payload))
+
+
+def _recv_exact(sock, n):
+    out = bytearray(n)
+    view = memoryview(out)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            raise ConnectionError('HiSLIP connection closed')
+        got += k
+    return out
+
+
+def recv_message(sock):
+    """(type, control code, parameter, payload) of the next HiSLIP message"""
+    prologue, kind, control, param, length = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    if prologue != b'HS':
+        raise ConnectionError('not a HiSLIP message: %r' % prologue)
+    return kind, control, param, _recv_exact(sock, length) if length else bytearray()
+
+
+class HiSLIP(_LanInstrument):
+    """SCPI over HiSLIP (IVI-6.1), duck-typed as vxi11.Instrument
+
+        osc = HiSLIP('192.168.12.253')              # hislip0 on port 4880
+        osc.ask('*IDN?')
+
+    Synchronized mode on the synchronous channel; the asynchronous channel
+    is opened as the protocol requires. Messages are framed by length, so
+    binary replies need no terminator scanning.
+    """
+
+    def __init__(self, host, sub_address='hislip0', port=HISLIP_PORT, timeout=10.0) -> None:
+        self.host = host
+        self.sub_address = sub_address
+        self.port = port
+        self._timeout = timeout
+        self.message_id = 0xFFFFFF00
+        self._rmt = False           # 已收到完整应答, 下一条消息带 RMT-delivered
+        self._sync = _connect(host, port, timeout)
+        self._async = None
+        try:
+            send_message(self._sync, INITIALIZE, 0, (0x0100 << 16) | struct.unpack('>H', VENDOR_ID)[0],
+                         sub_address.encode('ascii'))
+            kind, control, param, _ = self._expect(self._sync, INITIALIZE_RESPONSE)
+            self.session_id = param & 0xFFFF
+            self._async = _connect(host, port, timeout)
+            send_message(self._async, ASYNC_INITIALIZE, 0, self.session_id)
+            self._expect(self._async, ASYNC_INITIALIZE_RESPONSE)
+            send_message(self._async, ASYNC_MAXIMUM_MESSAGE_SIZE, 0, 0, struct.pack('>Q', 1 << 20))
+            payload = self._expect(self._async, ASYNC_MAXIMUM_MESSAGE_SIZE_RESPONSE)[3]
+            self.max_message = struct.unpack('>Q', bytes(payload))[0]
+        except Exception:
+            self.close()
+            raise
+
+    def _expect(self, sock, kind):
+        msg = recv_message(sock)
+        if msg[0] in (ERROR, FATAL_ERROR):
+            raise ConnectionError('%s: HiSLIP error %d: %s' % (self.host, msg[1], bytes(msg[3]).decode('latin-1')))
+        if msg[0] != kind:
+            raise ConnectionError('%s: HiSLIP message %d while waiting for %d' % (self.host, msg[0], kind))
+        return msg
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+        for s in (self._sync, self._async):
+            if s is not None:
+                s.settimeout(value)
+
+    def write_raw(self, data):
+        data = memoryview(bytes(data))
+        size = max(1, self.max_message)
+        for start in range(0, max(len(data), 1), size):
+            last = start + size >= len(data)
+            send_message(self._sync, DATA_END if last else DATA, int(self._rmt), self.message_id,
+                         data[start:start+size])
+            self._rmt = False
+            self.message_id = (self.message_id + 2) & 0xFFFFFFFF
+
+    def read_raw(self, num=-1):
+        """one whole reply (num is ignored)"""
+        parts = []
+        while True:
+            kind, control, param, payload = recv_message(self._sync)
+            if kind == DATA:
+                parts.append(payload)
+            elif kind == DATA_END:
+                parts.append(payload)
+                self._rmt = True
+                return b''.join(parts)
+            elif kind == FATAL_ERROR:
+                raise ConnectionError('%s: HiSLIP fatal error %d: %s' % (
+                    self.host, control, bytes(payload).decode('latin-1')))
+            elif kind == ERROR:
+                raise IOError('%s: HiSLIP error %d: %s' % (self.host, control, bytes(payload).decode('latin-1')))
+
+    def close(self):
+        for s in (self._sync, self._async):
+            if s is not None:
+                s.close()
+
+
+def open_lan(address, transport=None, timeout=10.0):
+    """connection for a LAN instrument address (see parse_address)"""
+    transport, host, where = parse_address(address, transport)
+    if transport == 'socket':
+        return ScpiSocket(host, where, timeout)
+    if transport == 'hislip':
+        sub_address, _, port = where.partition(',')
+        return HiSLIP(host, sub_address, int(port or HISLIP_PORT), timeout)
+    import vxi11
+    inst = vxi11.Instrument(address.strip())    # vxi11 自行解析 TCPIP::...::INSTR 各种写法
+    inst.timeout = timeout
+    return inst
@@ -0,0 +1,69 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   LazyImport.py
+@Time    :   2026/10/18 23:52:10
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import importlib
+import sys
+import threading
+
+
+_lock = threading.RLock()
+
+
+# 首次使用时才导入的模块
+class LazyModule():
+    """stand-in for a module, imported on the first attribute access
+
+        np = lazy_import('numpy')
+        np.mean(x)          # numpy 在此时导入
+
+    After loading, the module's attributes are copied onto the stand-in, so
+    later accesses cost the same as on the module itself.
+    """
+
+    def __init__(self, name, hint=None) -> None:
+        self.__dict__['_name'] = name
+        self.__dict__['_hint'] = hint
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        with _lock:
+            module = self._module
+            if module is None:
+                try:
+                    module = importlib.import_module(self._name)
+                except ImportError as e:
+                    raise ImportError('%s is needed here, install it with: pip install %s' % (
+                        self._name, self._hint or self._name)) from e
+                self.__dict__.update((k, v) for k, v in module.__dict__.items()
+                                     if k not in ('_name', '_hint', '_module'))
+                self.__dict__['_module'] = module
+            return module
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __repr__(self):
+        state = 'loaded' if self._module is not None else 'not loaded'
+        return '<lazy module %r, %s>' % (self._name, state)
+
+
+def lazy_import(name, hint=None, package=None):
+    """the module if already imported, otherwise a LazyModule for it
+
+    :hint: pip package name shown when the module is missing, e.g. 'pyserial'
+    :package: package of a relative name, lazy_import('.LanTransport', package=__package__)
+    """
+    if name.startswith('.'):
+        name = package + name
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name, hint)
@@ -0,0 +1,231 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   LinkPool.py
+@Time    :   2026/10/18 23:18:36
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import functools
+import re
+import threading
+import time
+from .Trace import debugPrint
+
+
+# 连接断开的错误; VISA: VI_ERROR_CONN_LOST, VI_ERROR_IO
+_BROKEN = (ConnectionError, EOFError)
+_VISA_BROKEN = {-1073807194, -1073807298}
+
+
+def host_of(address):
+    """the instrument host of 'IP:x.x.x.x', 'TCPIP0::x.x.x.x::inst0::INSTR' or a bare host"""
+    m = re.match(r'TCPIP\d*::([^:]+)::', address, re.I)
+    if m:
+        return m.group(1).lower()
+    if address.upper().startswith('IP:'):
+        return address[3:].strip().lower()
+    return address.strip().lower()
+
+
+# 多个驱动对象共享的一条连接
+class SharedLink():
+    """one connection to an instrument, shared by every driver object using it
+
+    Duck-typed as the connection it wraps (vxi11.Instrument or a pyvisa
+    resource): every method call takes the link lock, so threads never
+    interleave a write and its reply. A dropped connection is closed and
+    the error raised, the next call reopens it; nothing is sent twice
+    behind the caller's back (INIT, *TRG, OUTP ON), only idempotent()
+    resends. Attributes set on the link (timeout) are kept and applied to
+    every reopened connection.
+    """
+
+    def __init__(self, key, opener, lock) -> None:
+        object.__setattr__(self, 'key', key)
+        object.__setattr__(self, 'link_lock', lock)     # 同一主机的所有连接共用
+        object.__setattr__(self, '_opener', opener)
+        object.__setattr__(self, '_conn', None)
+        object.__setattr__(self, '_settings', {})
+        object.__setattr__(self, 'last_used', time.monotonic())
+        object.__setattr__(self, 'reconnects', 0)
+
+    def _connect(self):
+        conn = self._opener()
+        for name, value in self._settings.items():
+            setattr(conn, name, value)
+        object.__setattr__(self, '_conn', conn)
+        return conn
+
+    def connect(self):
+        """open the connection now instead of on first use"""
+        with self.link_lock:
+            if self._conn is None:
+                self._connect()
+
+    def close(self):
+        """close the connection, the next call reopens it"""
+        with self.link_lock:
+            conn = self._conn
+            object.__setattr__(self, '_conn', None)
+        if conn is not None:
+            try:
+                conn.close()
+            except Exception as e:
+                debugPrint('close %s: %s' % (self.label, e))
+
+    @property
+    def label(self):
+        """the address part of key, for messages"""
+        if self.key[0] == 'visa':
+            return self.key[-1]
+        return ':'.join(str(k) for k in self.key[1:])
+
+    @property
+    def connected(self):
+        return self._conn is not None
+
+    def _broken(self, e):
+        return isinstance(e, _BROKEN) or getattr(e, 'error_code', None) in _VISA_BROKEN
+
+    def _call(self, name, *args, **kwargs):
+        with self.link_lock:
+            object.__setattr__(self, 'last_used', time.monotonic())
+            conn = self._conn or self._connect()
+            try:
+                return getattr(conn, name)(*args, **kwargs)
+            except Exception as e:
+                # 超时等 socket 错误后应答可能错位, 也关闭, 下次调用时重连
+                if self._broken(e) or isinstance(e, OSError):
+                    debugPrint('%s: %s, reconnecting' % (self.label, e))
+                    self.close()
+                    object.__setattr__(self, 'reconnects', self.reconnects + 1)
+                raise
+
+    def idempotent(self, name, *args, **kwargs):
+        """call method name, sent once more on a new connection if the link was dropped
+
+        Only for calls that may safely run twice, e.g. queries with no side
+        effect: link.idempotent('ask', 'MEAS:VOLT?')
+        """
+        with self.link_lock:
+            try:
+                return self._call(name, *args, **kwargs)
+            except Exception as e:
+                if not self._broken(e):
+                    raise
+            return self._call(name, *args, **kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in self._settings:
+            return self._settings[name]
+        with self.link_lock:
+            attr = getattr(self._conn or self._connect(), name)
+        if not callable(attr):
+            return attr
+        return functools.partial(self._call, name)
+
+    def __setattr__(self, name, value):
+        with self.link_lock:
+            self._settings[name] = value
+            if self._conn is not None:
+                setattr(self._conn, name, value)
+
+
+# 按地址共享连接
+class LinkPool():
+    """hand out one SharedLink per instrument address
+
+        session = pool.vxi11('192.168.12.119')          # VxiInstrument
+        session = pool.lan('192.168.12.119', 'socket')  # 端口 5025
+        inst = pool.visa(rm, 'TCPIP0::192.168.12.119::inst0::INSTR')
+
+    Every link to one host shares one lock, so a vxi11 driver and a VISA
+    driver on the same box are serialized too. Links unused for idle
+    seconds are closed by a background thread and reopen on their next use.
+    """
+
+    def __init__(self, idle=300.0) -> None:
+        self.idle = idle
+        self._links = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+        self._reaper = None
+
+    def get(self, key, host, opener):
+        """the link for key, created with opener() on first use"""
+        with self._guard:
+            link = self._links.get(key)
+            if link is None:
+                lock = self._locks.setdefault(host, threading.RLock())
+                link = self._links[key] = SharedLink(key, opener, lock)
+            if self.idle and self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap, name='link-pool', daemon=True)
+                self._reaper.start()
+        return link
+
+    def vxi11(self, address):
+        """link to one vxi11 device; gateway devices on one host (gpib0,5 / gpib0,7) get their own"""
+        from . import LanTransport
+        host = host_of(address)
+        name = LanTransport.parse_address(address, 'vxi11')[2].lower()
+        return self.get(('vxi11', host, name), host, lambda: LanTransport.open_lan(address, 'vxi11'))
+
+    def lan(self, address, transport=None):
+        """link over vxi11, a raw SCPI socket or HiSLIP (LanTransport.parse_address)"""
+        from . import LanTransport
+        kind, host, where = LanTransport.parse_address(address, transport)
+        if kind == 'vxi11':
+            return self.vxi11(address)
+        return self.get((kind, host.lower(), where), host.lower(),
+                        lambda: LanTransport.open_lan(address, transport))
+
+    def visa(self, rm, resource_name):
+        """shared rm.open_resource(resource_name), opened now so that errors show at once"""
+        link = self.get(('visa', rm, resource_name), host_of(resource_name),
+                        lambda: rm.open_resource(resource_name))
+        link.connect()
+        return link
+
+    def links(self):
+        with self._guard:
+            return list(self._links.values())
+
+    def close_idle(self, idle=None):
+        """close the connections unused for idle seconds (default self.idle), return how many"""
+        idle = self.idle if idle is None else idle
+        now = time.monotonic()
+        closed = 0
+        for link in self.links():
+            if not link.connected or now - link.last_used < idle:
+                continue
+            # 正在使用的连接跳过
+            if link.link_lock.acquire(blocking=False):
+                try:
+                    link.close()
+                    closed += 1
+                finally:
+                    link.link_lock.release()
+        return closed
+
+    def close_all(self):
+        for link in self.links():
+            link.close()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(1.0, min(self.idle / 2, 30.0)))
+            if not self.idle:
+                continue
+            try:
+                self.close_idle()
+            except Exception as e:
+                debugPrint('link pool: %s' % e)
+
+
+pool = LinkPool()
@@ -0,0 +1,178 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   MeterStats.py
+@Time    :   2026/10/18 22:41:17
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+from .Trace import debugPrint
+from .LazyImport import lazy_import
+
+np = lazy_import('numpy')
+
+
+# 统计结果
+class Stats():
+    __slots__ = ('count', 'mean', 'sdev', 'min', 'max', 'edges', 'hist', 'source')
+
+    def __init__(self, count, mean, sdev, min, max, edges=None, hist=None, source='meter') -> None:
+        self.count = count
+        self.mean = mean
+        self.sdev = sdev
+        self.min = min
+        self.max = max
+        self.edges = edges      # 直方图 bins+1 个边界, 不含两端的溢出格
+        self.hist = hist        # 每格计数, 依次为 低于下限, bins 格, 高于上限
+        self.source = source    # 'meter' 仪器内部统计, 'host' 主机计算
+
+    @property
+    def ptp(self):
+        return self.max - self.min
+
+    def __repr__(self):
+        return 'Stats(count=%d, mean=%.9g, sdev=%.3g, min=%.9g, max=%.9g, source=%r)' % (
+            self.count, self.mean, self.sdev, self.min, self.max, self.source)
+
+
+def host_stats(samples, bins=0, lower=None, upper=None):
+    """Stats of samples computed here, same layout as the meter's
+
+    :bins: histogram bins, 0 for none
+    :lower, upper: histogram range, default min / max of the samples
+    """
+    samples = np.asarray(samples, dtype=float)
+    edges = hist = None
+    if bins:
+        lower = samples.min() if lower is None else lower
+        upper = samples.max() if upper is None else upper
+        edges = np.linspace(lower, upper, bins + 1)
+        inner = np.histogram(samples, bins=edges)[0]
+        hist = np.concatenate(([np.count_nonzero(samples < lower)], inner,
+                               [np.count_nonzero(samples > upper)]))
+    # 与仪器一致: 样本标准差
+    sdev = float(samples.std(ddof=1)) if len(samples) > 1 else 0.0
+    return Stats(len(samples), float(samples.mean()), sdev, float(samples.min()), float(samples.max()),
+                 edges, hist, 'host')
+
+
+def parse_stats(reply, count, bins=0):
+    """Stats from the reply to CALC:AVER:ALL?[;:CALC:TRAN:HIST:ALL?]
+
+    AVER:ALL? gives mean, sdev, min, max; HIST:ALL? gives lower, upper,
+    count, then bins + 2 counts (below lower, bins, above upper).
+    """
+    values = np.fromstring(reply.replace(';', ','), sep=',')
+    if len(values) < 4 + (3 + bins + 2 if bins else 0):
+        raise ValueError('statistics reply too short: %r' % reply[:80])
+    mean, sdev, lo, hi = (float(v) for v in values[:4])
+    edges = hist = None
+    if bins:
+        lower, upper, n = values[4:7]
+        count = int(n)
+        edges = np.linspace(lower, upper, bins + 1)
+        hist = values[7:7 + bins + 2].astype(np.int64)
+    return Stats(count, mean, sdev, lo, hi, edges, hist)
+
+
+def undefined_header(ask, depth=10):
+    """True if the error queue (SYST:ERR?) holds -113 Undefined header
+
+    Reads the queue until it is empty; a failing SYST:ERR? counts as False.
+    """
+    found = False
+    for _ in range(depth):
+        try:
+            code = int(ask('SYST:ERR?').split(',')[0])
+        except Exception:
+            break
+        if code == 0:
+            break
+        found = found or code == -113
+    return found
+
+
+# 仪器内部统计, 不支持时退回主机计算
+class MeterStats():
+    """statistics of N readings computed by the meter's CALC subsystem
+
+        s = dmm.statistics(10000, bins=20)
+        s.mean, s.sdev, s.min, s.max, s.hist
+
+    The meter takes count readings, keeps the running average / min / max /
+    standard deviation (and a histogram) and returns only those: one short
+    reply instead of count values. Meters without it (onboard_stats = False
+    in the class or the model profile) take the readings with FETC? and the
+    same Stats are computed here. A failing statistics query falls back for
+    that call only; it is remembered for the model when the meter reports
+    -113 Undefined header.
+    """
+    onboard_stats = True
+    # 打开统计功能的命令, 各型号不同; 统计只累计读数, 用完不必关闭
+    stats_enable = ('CALC:AVER:STAT ON',)
+    hist_enable = ('CALC:TRAN:HIST:RANG:AUTO ON', 'CALC:TRAN:HIST:STAT ON')
+
+    def _stats_io(self):
+        # (write, ask, wait(timeout)): InstrumentInitial 或 VxiInstrument
+        if hasattr(self, 'query_command'):
+            return self.write_command, self.query_command, self.wait_complete
+        # batch() 期间 session 被替换, 调用时再取
+        return (lambda command: self.session.write(command),
+                lambda command: self.session.ask(command), self.waitOpc)
+
+    def _stats_fetch(self):
+        if hasattr(self, 'read_burst'):
+            return self.read_burst('FETC?')
+        return np.fromstring(self.session.ask('FETC?'), sep=',')
+
+    def statistics(self, count=1000, bins=0, conf='VOLT:DC', plc=None, timeout=None):
+        """take count readings and return their Stats
+
+        :conf: measurement for CONF, e.g. 'VOLT:DC', 'CURR:DC', 'RES'; None keeps the current one
+        :plc: integration time in power line cycles, None keeps the current one
+        :bins: histogram bins (34461A: 10, 20, 40, 100, 200 or 400), 0 for none
+        :timeout: s for the readings, default estimated from count and plc at 50 Hz
+        """
+        write, ask, wait = self._stats_io()
+        if timeout is None:
+            timeout = 2 + 2 * count * (plc or 10) / 50
+        # 型号能力在 batch 之前取得, 首次使用时查询 *IDN?
+        onboard = self.onboard_stats and self.capability('onboard_stats', True)
+        memory = self.capability('reading_memory')
+        if not onboard and memory is not None and count > memory:
+            raise ValueError('%d readings do not fit the %d reading memory of %s' % (
+                count, memory, type(self).__name__))
+        with self.batch():
+            if conf is not None:
+                write('CONF:%s' % conf)
+                if plc is not None:
+                    write('%s:NPLC %s' % (conf, plc))
+            write('TRIG:SOUR IMM')
+            write('SAMP:COUN %d' % count)
+            if onboard:
+                for command in self.stats_enable:
+                    write(command)
+                write('CALC:AVER:CLE')
+                if bins:
+                    write('CALC:TRAN:HIST:POIN %d' % bins)
+                    for command in self.hist_enable:
+                        write(command)
+                    write('CALC:TRAN:HIST:CLE')
+            write('INIT')
+        # 配置已改变, 影子中的设置作废
+        self.shadow.invalidate()
+        wait(timeout)
+        if not onboard:
+            return host_stats(self._stats_fetch(), bins)
+        try:
+            return parse_stats(ask('CALC:AVER:ALL?' + (';:CALC:TRAN:HIST:ALL?' if bins else '')), count, bins)
+        except Exception as e:
+            # 读数仍在仪器中, 本次在主机计算; 仅当仪器明确不认识该命令时记入型号 profile
+            debugPrint('statistics on %s failed (%s), computing on host' % (type(self).__name__, e))
+            if undefined_header(ask):
+                self.onboard_stats = False
+                self.learn('onboard_stats', False)
+            return host_stats(self._stats_fetch(), bins)
@@ -10,22 +10,25 @@
 # here put the import lib
 
 
-import vxi11
-import serial
+# 平铺脚本 (python MultiMeter.py / 在本目录 from MultiMeter import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
+
+from .VxiInstr import VxiInstrument
 import time
+from .SerialLink import SerialLink
+from .MeterStats import MeterStats
+from .Trace import debugPrint
+from .LazyImport import lazy_import
 
-
-DEBUG = 1
-def debugPrint(msg):
-    if DEBUG:
-        print(msg)
+serial = lazy_import('serial', 'pyserial')
 
 
 #  kesysight 的仪器仪表
-class KEYSIGHT_344X():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
-
+class KEYSIGHT_344X(MeterStats, VxiInstrument):
     def getIDN(self):
         ret = self.session.ask('*IDN?')
         debugPrint(ret)
@@ -46,34 +49,28 @@ class AGILENT_344X():
         self.session = serial.Serial(comport,9600,timeout=0.5)
         self.session.flushInput()
         self.session.flushOutput()
-        self.session.write(b'SYSTem:REMote\r\n')
+        # 自动量程下 MEAS? 可能超过 1 s
+        self.link = SerialLink(self.session, eol=b'\r\n', timeout=3.0, encoding='gbk', name=type(self).__name__)
+        self.link.write(b'SYSTem:REMote')
 
     def getIDN(self):
-        self.session.write(b'*IDN?\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('*IDN?')
         debugPrint(ret)
+        return ret
 
     def measureVolt(self, dcac='DC'):
-        self.session.write(('MEASure:VOLTage:%s? DEF,DEF' % dcac).encode())
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('MEASure:VOLTage:%s? DEF,DEF' % dcac)
         debugPrint(ret)
         return ret
 
     def measureCurrent(self, dcac='DC'):
-        self.session.write(('MEAS:CURR:%s? DEF,DEF' % dcac).encode())
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('MEAS:CURR:%s? DEF,DEF' % dcac)
         debugPrint(ret)
         return ret
 
-class SDM3065():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
+class SDM3065(MeterStats, VxiInstrument):
+    # 统计在 CALC:FUNC AVER 下累计
+    stats_enable = ('CALC:FUNC AVER', 'CALC:STAT ON')
 
     def getIDN(self):
         ret = self.session.ask('*IDN?')
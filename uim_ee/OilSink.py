@@ -10,97 +10,81 @@
 # here put the import lib
 
 
-import serial
-import time
-
+# 平铺脚本 (python OilSink.py / 在本目录 from OilSink import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
 
-DEBUG = 1
-def debugPrint(msg):
-    if DEBUG:
-        print(msg)
+import time
+from .SerialLink import SerialLink
+from .Trace import debugPrint
+from .LazyImport import lazy_import
 
+serial = lazy_import('serial', 'pyserial')
 
 
 class ZCTB_400L():
     def __init__(self, comport) -> None:
         self.session = serial.Serial(comport,9600,timeout=0.5)
+        self.link = SerialLink(self.session, eol=b'\r\n', name=type(self).__name__)
 
     def getID(self):
-        self.session.write(b'*ver\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt)
+        ret = self.link.query('*ver')
         debugPrint(ret)
+        return ret
 
     def set_temp(self,temp):
-        self.session.write(b's=%d\r\n'%temp)
+        self.link.write(b's=%d'%temp)
 
     def set_sr(self,scanrate):
-        self.session.write(b'sr=%d\r\n'%scanrate)
+        self.link.write(b'sr=%d'%scanrate)
 
     def read_state(self):
         # 0 不稳定 1稳定
-        self.session.write(b'st\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('st').split(':')[1]
         debugPrint(ret)
         return ret
 
     def read_set_temp(self):
-        self.session.write(b's\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('s').split(':')[1]
         debugPrint(ret)
         return ret
 
     def coolstate(self):
-        self.session.write(b'co\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('co').split(':')[1]
         debugPrint(ret)
 
     def set_cool(self,state : str):
         #on off outo
-        self.session.write(('co=%s\r\n'%state).encode())
+        self.link.write('co=%s'%state)
 
     def read_current_temp(self):
-        self.session.write(b't\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('t').split(':')[1]
         debugPrint(ret)
         return ret
 
 
     def heatpower(self):
-        self.session.write(b'po\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('po').split(':')[1]
         debugPrint(ret)
         return ret      
 
     def read_holdtime(self):
-        self.session.write(b'pt\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode().split(':')[1].rstrip('\n')
+        ret = self.link.query('pt').split(':')[1]
         debugPrint(ret)
         return ret
 
 
-
 if __name__ == "__main__":
+    from .TempMonitor import TempMonitor
     zctb = ZCTB_400L('COM11')
-    # zctb.set_temp(16)
-    while True:
-        state = zctb.read_state()
-        if state=='1':
-            print('ok')
-            break
-        time.sleep(5)
+    # 后台采样, 温度进入带内并稳定后立即返回
+    with TempMonitor(zctb, band=0.1, hold=60) as mon:
+        # mon.set_temp(16)
+        while not mon.wait(timeout=30):
+            print(mon.temp, mon.predict())
+        print('ok')
 
     
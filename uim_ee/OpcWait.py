@@ -0,0 +1,33 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   OpcWait.py
+@Time    :   2026/10/18 13:05:31
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import time
+
+
+# 指数退避轮询, 条件满足立即返回
+def poll_until(check, timeout=10.0, first=0.001, longest=0.1, factor=2.0):
+    """call check() until it returns a true value, and return that value
+
+    :check: callable without arguments, e.g. lambda: int(ask('INR?')) & 2
+    :timeout: s, raises TimeoutError when exceeded
+    :first: s, first poll interval, doubled after every miss up to longest
+    """
+    deadline = time.monotonic() + timeout
+    interval = first
+    while True:
+        ret = check()
+        if ret:
+            return ret
+        remain = deadline - time.monotonic()
+        if remain <= 0:
+            raise TimeoutError('condition not met within %.3f s' % timeout)
+        time.sleep(min(interval, remain))
+        interval = min(interval * factor, longest)
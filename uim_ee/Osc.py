@@ -9,17 +9,81 @@
 
 # here put the import lib
 
+# 平铺脚本 (python Osc.py / 在本目录 from Osc import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
+
 import re
-from tkinter import OFF
-import serial
+import struct
 import time
-import vxi11
-
+from .VxiInstr import VxiInstrument
+from .SerialLink import SerialLink
+from .BinBlock import parse_block
+from .OpcWait import poll_until
+from .Trace import debugPrint
+from .LazyImport import lazy_import
+
+# 首次使用时导入
+np = lazy_import('numpy')
+serial = lazy_import('serial', 'pyserial')
+
+
+# 波形数据, 保留原始码值, 需要时再换算为电压
+class Waveform():
+    """one channel trace as ADC codes plus the scaling to volts
+
+    volts = codes * gain - offset, time = t0 + index * dt
+    """
+    __slots__ = ('codes', 'gain', 'offset', 'dt', 't0')
+
+    def __init__(self, codes, gain, offset, dt, t0) -> None:
+        self.codes = codes      # np.int8 / np.int16, view on the received block
+        self.gain = gain        # V per code
+        self.offset = offset    # V
+        self.dt = dt            # s per point
+        self.t0 = t0            # s, time of the first point relative to trigger
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def volts(self):
+        """scaled trace, np.float32"""
+        out = self.codes.astype(np.float32)
+        out *= np.float32(self.gain)
+        out -= np.float32(self.offset)
+        return out
+
+    @property
+    def time(self):
+        """time axis, np.float64"""
+        return self.t0 + np.arange(len(self.codes)) * self.dt
+
+
+# LeCroy WAVEDESC 描述块, 鼎阳 :WAV:PRE? 使用相同的布局
+def parse_wavedesc(desc):
+    """decode the WAVEDESC fields needed to scale a trace
+
+    :desc: block payload starting at 'WAVEDESC'
+    """
+    order = '<' if struct.unpack_from('<h', desc, 34)[0] else '>'    # COMM_ORDER
+    def get(fmt, ofs):
+        return struct.unpack_from(order + fmt, desc, ofs)[0]
+    return {
+        'order': order,
+        'comm_type': get('h', 32),          # 0 byte, 1 word
+        'wave_array_count': get('l', 116),
+        'vertical_gain': get('f', 156),
+        'vertical_offset': get('f', 160),
+        'code_per_div': get('f', 164),      # 鼎阳; LeCroy 此处为 MAX_VALUE
+        'nominal_bits': get('h', 172),
+        'horiz_interval': get('f', 176),
+        'horiz_offset': get('d', 180),
+    }
 
-DEBUG = 1
-def debugPrint(msg):
-    if DEBUG:
-        print(msg)
 
 
 # 苏州固纬电子的示波器
@@ -28,12 +92,10 @@ class GDS_2000x():
         self.session = serial.Serial(comport,9600,timeout=0.5)
         self.session.flushInput()
         self.session.flushOutput()
+        self.link = SerialLink(self.session, eol=b'\r\n', name=type(self).__name__)
 
     def getIDN(self):
-        self.session.write(b'*IDN?\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode()
+        ret = self.link.query('*IDN?')
         debugPrint(ret)
         return ret
 
@@ -69,10 +131,7 @@ class GDS_2000x():
     def getTrigStat(self):
         """Returns the current state of the triggering system.
         """
-        self.session.write(b':TRIGger:STATe?\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode()
+        ret = self.link.query(':TRIGger:STATe?')
         debugPrint(ret)
         return ret
 
@@ -141,10 +200,7 @@ class GDS_2000x():
 
 
 # LECROY的示波器
-class LECROY_HD9000():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
-
+class LECROY_HD9000(VxiInstrument):
     def getIDN(self):
         ret = self.session.ask('*IDN?')
         debugPrint(ret)
@@ -266,17 +322,32 @@ class LECROY_HD9000():
         <portname>:= {GPIB, NET}
         """
         self.session.write('HCSU DEV,PNG,FORMAT,PORTRAIT,BCKG,BLACK,DEST,FILE,DIR,"%s",AREA,GRIDAREAONLY,FILE,"%s"' % (dirpath, filename))
-        self.session.ask('INR?')
-        time.sleep(1)
+        self.session.ask('INR?')    # 读取即清零
         self.session.write('SCDP')
-        print('saved!')
+        # INR bit1: 屏幕拷贝完成
+        poll_until(lambda: int(self.session.ask('INR?').split()[-1]) & 2)
+        debugPrint('saved!')
 
+    def getWaveform(self, chnn, word=True):
+        """read one channel trace as a binary block
+
+        :chnn: 1 to n
+        :word: True for 16 bit codes, False for 8 bit
+        :return: Waveform
+        """
+        self.session.write('COMM_HEADER OFF')
+        self.session.write('COMM_ORDER LO')
+        self.session.write('COMM_FORMAT DEF9,%s,BIN' % ('WORD' if word else 'BYTE'))
+        self.session.write('WAVEFORM_SETUP SP,0,NP,0,FP,0,SN,0')
+        desc = parse_wavedesc(parse_block(self.session.ask_raw(b'C%d:WF? DESC' % chnn)))
+        data = parse_block(self.session.ask_raw(b'C%d:WF? DAT1' % chnn))
+        codes = np.frombuffer(data, dtype='<i2' if word else np.int8)
+        return Waveform(codes, desc['vertical_gain'], desc['vertical_offset'],
+                        desc['horiz_interval'], desc['horiz_offset'])
 
-# 鼎阳的示波器
-class SDS2504X():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
 
+# 鼎阳的示波器
+class SDS2504X(VxiInstrument):
     def getIDN(self):
         ret = self.session.ask('*IDN?')
         debugPrint(ret)
@@ -294,6 +365,10 @@ class SDS2504X():
         '''
         Frequency, Duty cycle:DUTY, Mean:MEAN
         '''
+        # 型号表未列出的参数只记录, 仍然发送 (固件可能比表新)
+        pava = self.capability('pava')
+        if pava is not None and meastyp.upper() not in pava:
+            debugPrint('PAVA %s is not in the %s list' % (meastyp, self.profile.model))
         ret = self.session.ask('C%s:PAVA? %s' % (chnn, meastyp))
         debugPrint(ret)
         if '****' in ret.split(',')[1]:
@@ -364,6 +439,52 @@ class SDS2504X():
         '''
         self.session.write(':SAVE:IMAGe "%s",%s,%s'%(path,format,reverse))
 
+    def getWaveform(self, chnn, word=None):
+        """read one channel trace as binary blocks
+
+        :chnn: 1 2 3 4
+        :word: True for 16 bit codes (models with >8 bit ADC), False for 8 bit,
+               None to follow the model profile
+        :return: Waveform
+        """
+        if word is None:
+            word = self.capability('adc_bits', 8) > 8
+        dtype = '<i2' if word else np.int8
+        self.session.write(':WAV:SOUR C%s' % chnn)
+        self.session.write(':WAV:WIDT %s' % ('WORD' if word else 'BYTE'))
+        pre = parse_block(self.session.ask_raw(b':WAV:PRE?'))
+        desc = parse_wavedesc(pre)
+        probe = struct.unpack_from(desc['order'] + 'd', pre, 328)[0]
+        tdiv = float(self.session.ask(':TIM:SCAL?'))
+        total = desc['wave_array_count']
+        # 单次读取的最大点数是型号常数, 查询一次后记入 profile
+        maxpt = self.capability('wave_max_points')
+        if maxpt is None:
+            maxpt = int(float(self.session.ask(':WAV:MAXP?')))
+            self.learn('wave_max_points', maxpt)
+
+        # 单次读取的点数受 :WAV:MAXP? 限制, 超过时分段读取
+        self.session.write(':WAV:STAR 0')
+        if total <= maxpt:
+            self.session.write(':WAV:POIN %d' % total)
+            codes = np.frombuffer(parse_block(self.session.ask_raw(b':WAV:DATA?')), dtype=dtype)
+        else:
+            codes = np.empty(total, dtype=dtype)
+            for start in range(0, total, maxpt):
+                self.session.write(':WAV:STAR %d' % start)
+                count = min(maxpt, total - start)
+                self.session.write(':WAV:POIN %d' % count)
+                chunk = np.frombuffer(parse_block(self.session.ask_raw(b':WAV:DATA?')), dtype=dtype)
+                # 短段会在 codes 中留下未初始化的点
+                if len(chunk) != count:
+                    raise IOError('C%s: %d points at %d, expected %d' % (chnn, len(chunk), start, count))
+                codes[start:start+count] = chunk
+
+        gain = desc['vertical_gain'] * probe / desc['code_per_div']
+        offset = desc['vertical_offset'] * probe
+        t0 = -desc['horiz_offset'] - tdiv * 10 / 2
+        return Waveform(codes, gain, offset, desc['horiz_interval'], t0)
+
 
 
 # main函数
@@ -9,14 +9,20 @@
 
 # here put the import lib
 
-import serial
+# 平铺脚本 (python PwrSupply.py / 在本目录 from PwrSupply import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
+
 import time
-import vxi11
+from .VxiInstr import VxiInstrument
+from .SerialLink import SerialLink
+from .Trace import debugPrint
+from .LazyImport import lazy_import
 
-DEBUG = 1
-def debugPrint(msg):
-    if DEBUG:
-        print(msg)
+serial = lazy_import('serial', 'pyserial')
 
 
 # 苏州固纬电子的电源
@@ -25,59 +31,53 @@ class GPD_X303X():
         self.session = serial.Serial(comport,9600,timeout=0.5)
         self.session.flushInput()
         self.session.flushOutput()
+        self.link = SerialLink(self.session, eol=b'\r\n', encoding='gbk', name=type(self).__name__)
 
     def getIDN(self):
-        self.session.write(b'*IDN?\r\n')
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('*IDN?')
         debugPrint(ret)
+        return ret
 
     def outputOn(self):
-        self.session.write(b'OUT1\r\n')
+        self.link.write(b'OUT1')
 
     def outputOff(self):
-        self.session.write(b'OUT0\r\n')
+        self.link.write(b'OUT0')
 
     def voltSet(self, chnn, volt):
-        self.session.write(('VSET%s:%.3f\r\n' % (chnn, volt)).encode())
+        self.link.write('VSET%s:%.3f' % (chnn, volt))
 
     def voltRead(self, chnn):
-        self.session.write(('VOUT%s?\r\n' % chnn).encode())
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('VOUT%s?' % chnn)
         debugPrint(ret)
+        return ret
 
     def voltSetGet(self, chnn):
-        self.session.write(('VSET%s?\r\n' % chnn).encode())
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('VSET%s?' % chnn)
         debugPrint(ret)
+        return ret
 
     def currentSet(self, chnn, current):
-        self.session.write(('ISET%s:%.3f\r\n' % (chnn, current)).encode())
+        self.link.write('ISET%s:%.3f' % (chnn, current))
 
     def currentRead(self, chnn):
-        self.session.write(('IOUT%s?\r\n' % chnn).encode())
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('IOUT%s?' % chnn)
         debugPrint(ret)
+        return ret
 
     def currentSetGet(self, chnn):
-        self.session.write(('ISET%s?\r\n' % chnn).encode())
-        time.sleep(0.1)
-        cnt = self.session.in_waiting
-        ret = self.session.read(cnt).decode("gbk")
+        ret = self.link.query('ISET%s?' % chnn)
         debugPrint(ret)
+        return ret
 
-# RIGOL的电源
-class DP800():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
+# 设定值统一为 '3.300' 的格式, 缓存与仪器应答的格式一致
+def _setting(value):
+    return '%.3f' % float(value)
 
+
+# RIGOL的电源
+class DP800(VxiInstrument):
+    # 各通道的设定值缓存在 self.shadow, voltSetGet/currentSetGet 优先从缓存应答
     def getIDN(self):
         ret = self.session.ask('*IDN?')
         debugPrint(ret)
@@ -129,7 +129,8 @@ class DP800():
         return ret
 
     def voltage_cuurent_Set(self,chnnl:int,vol:int,current:int):
-        self.session.write(':APPL CH%s,%s,%s'%(chnnl,vol,current))
+        self.shadow.write(self.session.write, ':APPL CH%s,%s,%s'%(chnnl,vol,current),
+                          ['VOLT CH%s'%chnnl, 'CURR CH%s'%chnnl], [_setting(vol), _setting(current)])
 
 
     # def currentSet(self,chnnl,current):
@@ -137,15 +138,21 @@ class DP800():
 
     
     def voltSet(self,chnnl,volt):
-        self.session.write(':APPL CH%s,%s'%(chnnl,volt))
+        self.shadow.write(self.session.write, ':APPL CH%s,%s'%(chnnl,volt), 'VOLT CH%s'%chnnl, _setting(volt))
 
     def voltSetGet(self,chnnl):
-        ret = self.session.ask(':APPL? CH%s'%chnnl).split(',')[1]
+        ret = self.shadow.get('VOLT CH%s'%chnnl)
+        if ret is None:
+            ret = _setting(self.session.ask(':APPL? CH%s'%chnnl).split(',')[1])
+            self.shadow.set('VOLT CH%s'%chnnl, ret)
         debugPrint(ret)
         return ret       
 
     def currentSetGet(self,chnnl):
-        ret = self.session.ask(':APPL? CH%s'%chnnl).split(',')[2]
+        ret = self.shadow.get('CURR CH%s'%chnnl)
+        if ret is None:
+            ret = _setting(self.session.ask(':APPL? CH%s'%chnnl).split(',')[2])
+            self.shadow.set('CURR CH%s'%chnnl, ret)
         debugPrint(ret)
         return ret 
 
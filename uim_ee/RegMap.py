@@ -0,0 +1,251 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   RegMap.py
+@Time    :   2026/10/18 15:21:06
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import csv
+import functools
+import os
+import re
+from .LazyImport import lazy_import
+
+np = lazy_import('numpy')
+
+
+# 寄存器位域描述, 掩码与移位预先计算
+class RegField():
+    """bit field addr[msb:lsb] of an 8 bit register"""
+    __slots__ = ('name', 'addr', 'msb', 'lsb', 'shift', 'width', 'mask')
+
+    def __init__(self, addr, msb, lsb, name=None) -> None:
+        if not 7 >= msb >= lsb >= 0:
+            raise ValueError('bad bit range [%s:%s]' % (msb, lsb))
+        self.name = name
+        self.addr = addr
+        self.msb = msb
+        self.lsb = lsb
+        self.shift = lsb
+        self.width = msb - lsb + 1
+        self.mask = ((1 << self.width) - 1) << lsb      # 寄存器内的掩码
+
+    def __repr__(self):
+        return 'RegField(0x%02X[%d:%d]%s)' % (self.addr, self.msb, self.lsb,
+                                              '' if self.name is None else ', %r' % self.name)
+
+    def get(self, regval):
+        """field value from a register value"""
+        return (regval & self.mask) >> self.shift
+
+    def put(self, regval, val):
+        """register value with the field replaced by val"""
+        return (regval & ~self.mask & 0xFF) | ((val << self.shift) & self.mask)
+
+
+_FIELD_RE = re.compile(r'^\s*(\w+)\s*\[\s*(\d+)\s*(?::\s*(\d+)\s*)?\]\s*$')
+
+
+@functools.lru_cache(maxsize=None)
+def parse_field(regparts: str):
+    """"0x10[7:6]" -> RegField, "0x10[3]" for a single bit; cached per string"""
+    m = _FIELD_RE.match(regparts)
+    if m is None:
+        raise ValueError('bad register field %r, expected e.g. "0x10[7:6]"' % regparts)
+    msb = int(m.group(2))
+    lsb = msb if m.group(3) is None else int(m.group(3))
+    return RegField(int(m.group(1), 16), msb, lsb)
+
+
+def field(regparts):
+    """RegField from a RegField or a "0x10[7:6]" string"""
+    if isinstance(regparts, RegField):
+        return regparts
+    return parse_field(regparts)
+
+
+def _field_from(name, spec):
+    # "0x10[7:6]" 或 {addr, msb, lsb}
+    if isinstance(spec, str):
+        f = parse_field(spec)
+        return RegField(f.addr, f.msb, f.lsb, name)
+    addr = spec['addr']
+    addr = int(addr, 0) if isinstance(addr, str) else addr
+    msb = int(spec['msb'])
+    return RegField(addr, msb, int(spec.get('lsb', msb)), name)
+
+
+def load_fields(path):
+    """load named fields from a register map file
+
+    csv:  header name,field (0x10[7:6]) or name,addr,msb,lsb
+    yaml: {name: "0x10[7:6]"} or {name: {addr: 0x10, msb: 7, lsb: 6}}
+    :return: {name: RegField}
+    """
+    ext = os.path.splitext(path)[1].lower()
+    fields = {}
+    if ext in ('.yaml', '.yml'):
+        import yaml
+        with open(path, encoding='utf-8') as f:
+            for name, spec in yaml.safe_load(f).items():
+                fields[name] = _field_from(name, spec)
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                name = row['name'].strip()
+                fields[name] = _field_from(name, row['field'] if row.get('field') else row)
+    return fields
+
+
+def decode_fields(block, fields, base=0):
+    """decode many fields from one block read at once
+
+    :block: register values read from address base, list/bytes/np.ndarray
+    :fields: iterable of RegField (or "0x10[7:6]" strings)
+    :return: np.ndarray of field values, in the order of fields
+    """
+    fields = [field(f) for f in fields]
+    regs = np.asarray(block, dtype=np.uint8)
+    addrs = np.fromiter((f.addr - base for f in fields), dtype=np.intp, count=len(fields))
+    masks = np.fromiter((f.mask for f in fields), dtype=np.uint8, count=len(fields))
+    shifts = np.fromiter((f.shift for f in fields), dtype=np.uint8, count=len(fields))
+    return (regs[addrs] & masks) >> shifts
+
+
+# 寄存器影子, 批量写入/块读取
+class RegMap():
+    """shadow copy of the DUT registers behind a USB2IIC
+
+        regs = iic.registerMap(volatile=[0x00, 0x01])
+        with regs:                      # flushed on exit
+            regs.setBits('0x10[7:6]', 2)
+            regs.setBits('0x10[1:0]', 1)
+            regs.setBits('0x11[3:0]', 5)
+        regs.getBits('0x12[5:4]')       # served from the shadow once known
+
+    Staged writes are flushed as contiguous auto-increment bursts. Reads of
+    unknown registers fetch a whole block at once. Volatile registers
+    (status, clear-on-read, ...) are always read from the device on their
+    own: block reads stop short of them and they are never written as gap
+    filler.
+    """
+
+    def __init__(self, i2c, size=256, volatile=(), block=16, gap=2, fast=False) -> None:
+        """
+        :i2c: USB2IIC
+        :size: number of register addresses
+        :volatile: addresses that bypass the shadow
+        :block: registers fetched by one read of an unknown register
+        :gap: known registers between two dirty runs rewritten to merge them into one burst
+        :fast: use readBytes1/writeBytes1
+        """
+        self.i2c = i2c
+        self.size = size
+        self.volatile = set(volatile)
+        self.block = block
+        self.gap = gap
+        self.fast = fast
+        self.values = [None] * size     # None: 未知
+        self.dirty = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.invalidate()
+
+    def _read(self, addr, length):
+        if self.fast:
+            ret = self.i2c.readBytes1(addr, length)
+        else:
+            ret = self.i2c.readBytes(addr, length)
+        return [ret] if length == 1 else ret
+
+    def _write(self, addr, vals):
+        if self.fast:
+            self.i2c.writeBytes1(addr, vals)
+        else:
+            self.i2c.writeBytes(addr, vals)
+
+    def load(self, addr, length=1):
+        """read length registers from addr in one transaction into the shadow"""
+        length = min(length, self.size - addr)
+        vals = self._read(addr, length)
+        for i, val in enumerate(vals):
+            if addr + i not in self.dirty and addr + i not in self.volatile:
+                self.values[addr + i] = val
+        return vals
+
+    def read(self, addr):
+        """register value, from the shadow when known"""
+        if addr in self.volatile:
+            return self._read(addr, 1)[0]
+        if self.values[addr] is None:
+            # 块读取在易失寄存器前截止, 以免读清状态/中断寄存器
+            start = addr - addr % self.block
+            end = min(start + self.block, self.size)
+            start = max([start] + [a + 1 for a in self.volatile if start <= a < addr])
+            end = min([end] + [a for a in self.volatile if addr < a < end])
+            self.load(start, end - start)
+            if self.values[addr] is None:
+                self.load(addr)
+        return self.values[addr]
+
+    def write(self, addr, val):
+        """stage a register write"""
+        self.values[addr] = val & 0xFF
+        self.dirty.add(addr)
+
+    def setBits(self, regparts, val):
+        """stage a field write, e.g. setBits("0x10[7:6]", 2)
+
+            :regparts: RegField or "0x10[7:6]"
+        """
+        f = field(regparts)
+        self.write(f.addr, f.put(self.read(f.addr), val))
+
+    def getBits(self, regparts):
+        f = field(regparts)
+        return f.get(self.read(f.addr))
+
+    def runs(self):
+        """dirty addresses grouped into (start, length) bursts"""
+        runs = []
+        for addr in sorted(self.dirty):
+            if runs:
+                start, length = runs[-1]
+                end = start + length
+                fill = range(end, addr)
+                if len(fill) <= self.gap and all(
+                        a not in self.volatile and self.values[a] is not None for a in fill):
+                    runs[-1] = (start, addr - start + 1)
+                    continue
+            runs.append((addr, 1))
+        return runs
+
+    def flush(self):
+        """write all staged registers, one burst per run
+
+        :return: number of I2C transactions
+        """
+        runs = self.runs()
+        for start, length in runs:
+            self._write(start, self.values[start:start+length])
+        self.dirty.clear()
+        return len(runs)
+
+    def invalidate(self, addr=None):
+        """forget the shadow (and staged writes) of addr, or of everything"""
+        if addr is None:
+            self.values = [None] * self.size
+            self.dirty.clear()
+        else:
+            self.values[addr] = None
+            self.dirty.discard(addr)
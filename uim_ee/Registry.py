@@ -0,0 +1,87 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   Registry.py
+@Time    :   2026/10/19 01:08:52
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import importlib
+
+
+# 驱动类 -> 模块; 同名类以专用模块的为准, 其他用 '模块.类' 取得
+DRIVERS = {
+    'DP800': 'PwrSupply',
+    'GPD_X303X': 'PwrSupply',
+    'DL3000': 'ElecLoad',
+    'KEYSIGHT_344X': 'MultiMeter',
+    'AGILENT_344X': 'MultiMeter',
+    'SDM3065': 'MultiMeter',
+    'GDS_2000x': 'Osc',
+    'LECROY_HD9000': 'Osc',
+    'SDS2504X': 'Osc',
+    'SDG6000X_E': 'WaveGen',
+    'ZCTB_400L': 'OilSink',
+    'USB2IIC': 'FtdiUsbI2c',
+    'DigitalMultimeterSDM3065X': 'Instruments',
+    'Keysight34461A': 'Instruments',
+    'SDG7102A': 'Instruments',
+    'OscilloscopeSDS2504X': 'Instruments',
+    'DP832A': 'Instruments',
+    'SPD3303X': 'Instruments',
+    'GPO_2303S': 'Instruments',
+    'B2902B': 'Instruments',
+    'DL3021A': 'Instruments',
+    'ZCTB': 'Instruments',
+    'TEMP_BOX': 'Instruments',
+    'ATS5XX': 'Instruments',
+}
+
+# 工具类 -> 模块
+TOOLS = {
+    'AsyncInstrument': 'AsyncInstr',
+    'open_lan_async': 'AsyncInstr',
+    'AsyncSerial': 'AsyncInstr',
+    'AsyncDP800': 'AsyncDrivers',
+    'AsyncDL3000': 'AsyncDrivers',
+    'AsyncKEYSIGHT_344X': 'AsyncDrivers',
+    'AsyncSDS2504X': 'AsyncDrivers',
+    'AsyncZCTB_400L': 'AsyncDrivers',
+    'AsyncUSB2IIC': 'AsyncDrivers',
+    'Sweep': 'SweepEngine',
+    'SweepError': 'SweepEngine',
+    'TempMonitor': 'TempMonitor',
+    'Campaign': 'TempCampaign',
+    'StreamLog': 'StreamLog',
+    'RegMap': 'RegMap',
+    'tracer': 'Trace',
+    'pool': 'LinkPool',
+    'discover': 'Discovery',
+    'LabBench': 'LabBench',
+    'Recorder': 'Replay',
+    'Replayer': 'Replay',
+}
+
+
+def driver(name):
+    """the driver class for 'DP800' or 'Instruments.ZCTB_400L', importing its module
+
+    Other 'module.Class' names (a project's own drivers) are imported as given.
+    """
+    module, _, cls = name.rpartition('.')
+    if not module:
+        module = DRIVERS.get(name)
+        if module is None:
+            raise KeyError('unknown driver %r' % name)
+    # 本包的驱动模块相对导入
+    if module in DRIVERS.values():
+        module = '.' + module
+    return getattr(importlib.import_module(module, __package__), cls)
+
+
+def drivers():
+    """names of the registered drivers"""
+    return sorted(DRIVERS)
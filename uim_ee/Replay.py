@@ -0,0 +1,553 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   Replay.py
+@Time    :   2026/10/19 03:20:46
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import base64
+import builtins
+import difflib
+import functools
+import gzip
+import importlib
+import json
+import re
+import sys
+import threading
+import time
+from .LazyImport import LazyModule
+from .Trace import debugPrint
+
+
+# 整条消息的写入与问答, 比较命令流时按 ';' 拆成单条命令
+WRITE_OPS = {'write', 'write_raw'}
+QUERY_OPS = {'ask', 'ask_raw', 'query', 'query_binary_values', 'query_ascii_values'}
+
+# 返回子连接的方法: 方法名 -> 子通道名
+CHILDREN = {
+    'open_resource': lambda channel, args: 'visa:%s' % args[0],      # ResourceManager
+    'get_port': lambda channel, args: '%s#%s' % (channel, args[0]),  # I2cController
+}
+
+
+class ReplayMismatch(Exception):
+    """a replayed call that is not in the recording"""
+
+
+class RecordedError(Exception):
+    """an error recorded on the bench whose type cannot be rebuilt here"""
+
+
+# ---------------------------------------------------------------- 编码
+
+def encode(value):
+    """value as JSON data: bytes, tuples and numpy arrays are tagged"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'b64': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, list):
+        return [encode(v) for v in value]
+    if isinstance(value, tuple):
+        return {'tuple': [encode(v) for v in value]}
+    if isinstance(value, dict):
+        return {'dict': [[k, encode(v)] for k, v in value.items()]}
+    if type(value).__module__ == 'numpy':
+        if hasattr(value, 'shape') and value.shape != ():
+            return {'nd': value.dtype.str, 'shape': list(value.shape),
+                    'b64': base64.b64encode(value.tobytes()).decode('ascii')}
+        return value.item()
+    return {'repr': repr(value)}
+
+
+def decode(data):
+    if isinstance(data, list):
+        return [decode(v) for v in data]
+    if not isinstance(data, dict):
+        return data
+    if 'b64' in data and 'nd' not in data:
+        return base64.b64decode(data['b64'])
+    if 'tuple' in data:
+        return tuple(decode(v) for v in data['tuple'])
+    if 'dict' in data:
+        return {k: decode(v) for k, v in data['dict']}
+    if 'nd' in data:
+        import numpy as np
+        return np.frombuffer(base64.b64decode(data['b64']), dtype=data['nd']).reshape(data['shape']).copy()
+    return None         # repr: 无法还原的对象
+
+
+def _error_spec(e):
+    cls = type(e)
+    return [cls.__module__, cls.__qualname__, str(e), getattr(e, 'error_code', None)]
+
+
+def _rebuild_error(spec):
+    module, name, message, code = spec
+    try:
+        cls = getattr(builtins if module == 'builtins' else importlib.import_module(module), name)
+        # pyvisa 的 VisaIOError 由错误码构造
+        return cls(code) if code is not None else cls(message)
+    except Exception:
+        return RecordedError('%s.%s: %s' % (module, name, message))
+
+
+# ---------------------------------------------------------------- 录音
+
+class Recording():
+    """the calls made on every instrument connection of a session, in order
+
+    An event is a dict: ch (channel, e.g. 'lan:192.168.12.119',
+    'visa:TCPIP0::...', 'serial:COM3', 'i2c#46'), op (method name, 'get'
+    for an attribute read, 'open' for the connection itself), args, kw,
+    t (s since the start), dt (s spent in the call), and ret or err.
+    """
+
+    def __init__(self, events=None, meta=None) -> None:
+        self.events = events if events is not None else []
+        self.meta = meta or {}
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+
+    def add(self, channel, op, args, kw, start, end, ret=None, error=None):
+        event = {'ch': channel, 'op': op, 'args': encode(list(args)), 'kw': encode(dict(kw)),
+                 't': start - self._t0, 'dt': end - start}
+        if error is not None:
+            event['err'] = _error_spec(error)
+        else:
+            event['ret'] = encode(ret)
+        with self._lock:
+            self.events.append(event)
+        return event
+
+    def channels(self):
+        return sorted(set(e['ch'] for e in self.events))
+
+    def of(self, channel):
+        return [e for e in self.events if e['ch'] == channel]
+
+    def __len__(self):
+        return len(self.events)
+
+    def save(self, path):
+        """JSON lines, gzip compressed if path ends with .gz"""
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps(dict(self.meta, recording=1)) + '\n')
+            for e in self.events:
+                f.write(json.dumps(e) + '\n')
+
+    @classmethod
+    def load(cls, path):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rt', encoding='utf-8') as f:
+            meta = json.loads(f.readline())
+            return cls([json.loads(line) for line in f if line.strip()], meta)
+
+
+# 录制代理: 调用透传给真实连接并记录
+class RecordingProxy():
+    def __init__(self, target, channel, recording) -> None:
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_channel', channel)
+        object.__setattr__(self, '_recording', recording)
+        object.__setattr__(self, '_settings', set())    # 本端设置过的属性, 读取不记录
+
+    def _call(self, name, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            ret = func(*args, **kwargs)
+        except Exception as e:
+            self._recording.add(self._channel, name, args, kwargs, start, time.perf_counter(), error=e)
+            raise
+        self._recording.add(self._channel, name, args, kwargs, start, time.perf_counter(), ret)
+        child = CHILDREN.get(name)
+        if child is not None:
+            return RecordingProxy(ret, child(self._channel, args), self._recording)
+        return ret
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        start = time.perf_counter()
+        attr = getattr(self._target, name)
+        if callable(attr):
+            return functools.partial(self._call, name, attr)
+        if name not in self._settings:
+            self._recording.add(self._channel, 'get', (name,), {}, start, time.perf_counter(), attr)
+        return attr
+
+    def __setattr__(self, name, value):
+        self._settings.add(name)
+        setattr(self._target, name, value)
+
+
+# ---------------------------------------------------------------- 回放
+
+class _Cursor():
+    # 一个通道的录音及回放进度
+    def __init__(self, events) -> None:
+        self.events = events
+        self.used = [False] * len(events)
+        self.pos = 0
+        self.attrs = set(e['args'][0] for e in events if e['op'] == 'get')
+        self.ops = set(e['op'] for e in events)
+
+    def take(self, op, args, kw, strict):
+        while self.pos < len(self.events) and self.used[self.pos]:
+            self.pos += 1
+        if strict:
+            if self.pos < len(self.events):
+                e = self.events[self.pos]
+                if e['op'] == op and e['args'] == args and e['kw'] == kw:
+                    self.used[self.pos] = True
+                    return e
+            return None
+        for i in range(self.pos, len(self.events)):
+            e = self.events[i]
+            if not self.used[i] and e['op'] == op and e['args'] == args and e['kw'] == kw:
+                self.used[i] = True
+                return e
+        return None
+
+    def next(self):
+        return self.events[self.pos] if self.pos < len(self.events) else None
+
+
+# 回放会话: 按录音应答, 代替真实连接
+class ReplaySession():
+    def __init__(self, channel, replayer) -> None:
+        object.__setattr__(self, '_channel', channel)
+        object.__setattr__(self, '_replayer', replayer)
+        object.__setattr__(self, '_settings', {})
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if name in self._settings:
+            return self._settings[name]
+        cursor = self._replayer._cursor(self._channel)
+        if name in cursor.attrs:
+            return self._replayer._play(self._channel, 'get', name)
+        if name in cursor.ops:
+            return functools.partial(self._replayer._play, self._channel, name)
+        raise AttributeError('%s: %s is not in the recording' % (self._channel, name))
+
+    def __setattr__(self, name, value):
+        self._settings[name] = value
+
+
+def _set_module_attr(module_name, name, value):
+    # 模块属性及各 LazyModule 替身中已复制的同名属性
+    module = importlib.import_module(module_name)
+    old = getattr(module, name)
+    setattr(module, name, value)
+    for mod in list(sys.modules.values()):
+        for v in list(getattr(mod, '__dict__', {}).values()):
+            if isinstance(v, LazyModule) and v._name == module_name and v._module is not None:
+                v.__dict__[name] = value
+    return old
+
+
+# 录制 / 回放共用: 替换各类连接的打开函数
+class _Session():
+    def __init__(self) -> None:
+        self._undo = []
+
+    def _patch(self, module_name, name, value, lazy=False):
+        # module_name: '.LanTransport' 为本包模块
+        if lazy:
+            old = _set_module_attr(module_name, name, value)
+            self._undo.append(lambda: _set_module_attr(module_name, name, old))
+            return old
+        module = importlib.import_module(module_name, __package__)
+        old = getattr(module, name)
+        setattr(module, name, value)
+        self._undo.append(lambda: setattr(module, name, old))
+        return old
+
+    def _isolate(self):
+        # 仪器 profile 缓存会省去 *IDN?, 录制与回放时都从空缓存开始
+        from . import InstrProfile
+        from . import Instruments
+        from .LinkPool import pool
+        saved = (InstrProfile.CACHE, InstrProfile._data, dict(InstrProfile._profiles))
+        InstrProfile.CACHE, InstrProfile._data = None, None
+        InstrProfile._profiles.clear()
+        Instruments._resources_time = None
+        pool.close_all()
+
+        def restore():
+            InstrProfile.CACHE, InstrProfile._data = saved[:2]
+            InstrProfile._profiles.clear()
+            InstrProfile._profiles.update(saved[2])
+            Instruments._resources_time = None
+            pool.close_all()
+        self._undo.append(restore)
+
+    def stop(self):
+        while self._undo:
+            self._undo.pop()()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+# 首次使用时才创建的对象
+class _Deferred():
+    def __init__(self, create) -> None:
+        object.__setattr__(self, '_create', create)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self._create(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._create(), name, value)
+
+
+class Recorder(_Session):
+    """record every command and reply of the drivers created inside the block
+
+        with Recorder('line3.rec.gz'):
+            run_production_test()
+
+    Covers VISA resources, LAN links (vxi11, socket, HiSLIP), serial.Serial
+    ports and USB2IIC controllers opened while recording; drivers created
+    before are not recorded.
+    """
+
+    def __init__(self, path=None, meta=None) -> None:
+        _Session.__init__(self)
+        self.path = path
+        self.recording = Recording(meta=meta)
+
+    def _open(self, channel, opener, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            target = opener(*args, **kwargs)
+        except Exception as e:
+            self.recording.add(channel, 'open', args, kwargs, start, time.perf_counter(), error=e)
+            raise
+        self.recording.add(channel, 'open', args, kwargs, start, time.perf_counter())
+        return RecordingProxy(target, channel, self.recording)
+
+    def start(self):
+        from . import Instruments
+        rec = self.recording
+        rec.meta.setdefault('time', time.time())
+        rec._t0 = time.perf_counter()
+        self._isolate()
+        orig = {}
+
+        def default_url():
+            start = time.perf_counter()
+            url = orig['url']()
+            rec.add('i2c', 'default_url', (), {}, start, time.perf_counter(), url)
+            return url
+
+        def open_serial(*args, **kwargs):
+            port = args[0] if args else kwargs.get('port')
+            return self._open('serial:%s' % port, orig['serial'], *args, **kwargs)
+
+        # 录制已有的 ResourceManager, 没有时在首次使用才创建, 不用 VISA 时不需要 pyvisa
+        rm = [Instruments._rm] if Instruments._rm is not None else []
+
+        def create_rm():
+            if not rm:
+                rm.append(Instruments.visa.ResourceManager())
+            return rm[0]
+        self._undo.append(lambda old=Instruments._rm: setattr(Instruments, '_rm', old))
+        Instruments._rm = RecordingProxy(_Deferred(create_rm), 'visa', rec)
+        orig['lan'] = self._patch('.LanTransport', 'open_lan', lambda address, transport=None, timeout=10.0:
+                                  self._open('lan:%s' % address, orig['lan'], address, transport, timeout))
+        orig['controller'] = self._patch('.FtdiUsbI2c', 'open_controller',
+                                         lambda: self._open('i2c', orig['controller']))
+        orig['url'] = self._patch('.FtdiUsbI2c', 'default_url', default_url)
+        try:
+            orig['serial'] = self._patch('serial', 'Serial', open_serial, lazy=True)
+        except ImportError:
+            debugPrint('pyserial is not installed, serial ports are not recorded')
+
+    def stop(self):
+        _Session.stop(self)
+        if self.path:
+            self.recording.save(self.path)
+
+
+class Replayer(_Session):
+    """answer the drivers created inside the block from a recording, no instrument needed
+
+        with Replayer('line3.rec.gz', scale=None) as rp:     # 不等待, CI 上全速运行
+            run_production_test()
+        print(rp.report())
+
+    :scale: None: no waiting; 1.0: each call takes its recorded time; 0.5 half of it
+    :strict: True: every connection must see exactly the recorded calls in
+             order, the first difference raises ReplayMismatch. False: each
+             call takes the next unused recorded call with the same method
+             and arguments; unrecorded writes are accepted and listed in
+             extra, unrecorded queries raise. Use compare() on .recording
+             afterwards to check that the command stream means the same.
+    """
+
+    def __init__(self, recording, scale=None, strict=True) -> None:
+        _Session.__init__(self)
+        self.source = Recording.load(recording) if isinstance(recording, str) else recording
+        self.scale = scale
+        self.strict = strict
+        self.recording = Recording(meta={'replay_of': self.source.meta})   # 本次回放中的调用
+        self.extra = []
+        self._cursors = {}
+        self._lock = threading.RLock()
+
+    def _cursor(self, channel):
+        with self._lock:
+            cursor = self._cursors.get(channel)
+            if cursor is None:
+                cursor = self._cursors[channel] = _Cursor(self.source.of(channel))
+            return cursor
+
+    def _play(self, channel, op, *args, **kwargs):
+        start = time.perf_counter()
+        with self._lock:
+            cursor = self._cursor(channel)
+            event = cursor.take(op, encode(list(args)), encode(dict(kwargs)), self.strict)
+        if event is None:
+            if self.strict or (op not in WRITE_OPS and op != 'open'):
+                expected = cursor.next()
+                raise ReplayMismatch('%s: %s%r is not in the recording, expected %s' % (
+                    channel, op, args, 'nothing' if expected is None else '%s%r' % (
+                        expected['op'], tuple(decode(expected['args'])))))
+            self.extra.append((channel, op, args))
+            self.recording.add(channel, op, args, kwargs, start, time.perf_counter())
+            return None
+        if self.scale:
+            time.sleep(event['dt'] * self.scale)
+        if 'err' in event:
+            error = _rebuild_error(event['err'])
+            self.recording.add(channel, op, args, kwargs, start, time.perf_counter(), error=error)
+            raise error
+        ret = decode(event['ret'])
+        self.recording.add(channel, op, args, kwargs, start, time.perf_counter(), ret)
+        child = CHILDREN.get(op)
+        if child is not None:
+            return ReplaySession(child(channel, args), self)
+        return ret
+
+    def _open(self, channel, *args, **kwargs):
+        self._play(channel, 'open', *args, **kwargs)
+        return ReplaySession(channel, self)
+
+    def start(self):
+        from . import Instruments
+        self._isolate()
+        self._undo.append(lambda old=Instruments._rm: setattr(Instruments, '_rm', old))
+        Instruments._rm = ReplaySession('visa', self)
+        self._patch('.LanTransport', 'open_lan', lambda address, transport=None, timeout=10.0:
+                    self._open('lan:%s' % address, address, transport, timeout))
+        self._patch('.FtdiUsbI2c', 'open_controller', lambda: self._open('i2c'))
+        self._patch('.FtdiUsbI2c', 'default_url', lambda: self._play('i2c', 'default_url'))
+        self._patch('serial', 'Serial', lambda *args, **kwargs: self._open(
+            'serial:%s' % (args[0] if args else kwargs.get('port')), *args, **kwargs), lazy=True)
+
+    def unused(self):
+        """recorded calls that were not replayed"""
+        out = []
+        for channel, cursor in self._cursors.items():
+            out += [e for e, used in zip(cursor.events, cursor.used) if not used]
+        for channel in self.source.channels():
+            if channel not in self._cursors:
+                out += self.source.of(channel)
+        return out
+
+    def report(self):
+        """replayed / recorded calls per channel, then the unused and extra ones"""
+        lines = []
+        for channel in self.source.channels():
+            cursor = self._cursors.get(channel)
+            used = sum(cursor.used) if cursor else 0
+            lines.append('%-40s %6d / %d' % (channel, used, len(self.source.of(channel))))
+        for e in self.unused()[:20]:
+            lines.append('unused %s %s%r' % (e['ch'], e['op'], tuple(decode(e['args']))))
+        for channel, op, args in self.extra[:20]:
+            lines.append('extra  %s %s%r' % (channel, op, args))
+        return '\n'.join(lines)
+
+
+# ---------------------------------------------------------------- 命令流比较
+
+def _split(text):
+    # 按 ';' 拆分, 引号内的不拆
+    return [p for p in re.split(r';(?=(?:[^"]*"[^"]*")*[^"]*$)', text)]
+
+
+def _normalize(command):
+    command = ' '.join(command.strip().lstrip(':').split())
+    header, _, value = command.partition(' ')
+    return (header.upper() + ' ' + value).strip()
+
+
+def command_stream(events, dedupe=False):
+    """[(channel, command)] of a recording, batched messages split into single commands
+
+    :dedupe: drop writes repeating the setting already in effect (what the
+             driver shadows skip), reset by *RST / *CLS
+    """
+    out = []
+    last = {}
+    for e in events:
+        op, args = e['op'], decode(e['args'])
+        if op == 'get' or op == 'open':
+            continue
+        text = args[0] if args else None
+        if isinstance(text, bytes) and not re.search(rb'#[1-9]', text):
+            text = text.decode('latin-1')
+        if (op in WRITE_OPS or op in QUERY_OPS) and isinstance(text, str):
+            for command in _split(text):
+                command = _normalize(command)
+                if not command:
+                    continue
+                if command.startswith(('*RST', '*CLS')):
+                    last.clear()
+                header = command.split(' ', 1)[0]
+                if dedupe and not header.endswith('?') and not header.startswith('*'):
+                    key = (e['ch'], header)
+                    if last.get(key) == command:
+                        continue
+                    last[key] = command
+                out.append((e['ch'], command))
+        else:
+            out.append((e['ch'], '%s%r' % (op, tuple(args))))
+    return out
+
+
+def compare(a, b, dedupe=False, context=3):
+    """differences between the command streams of two recordings, [] if they mean the same
+
+        rp = Replayer('before.rec.gz', strict=False)
+        with rp:
+            run_production_test()
+        assert not compare(rp.source, rp.recording, dedupe=True)
+
+    :a, b: Recording or path
+    """
+    a = Recording.load(a) if isinstance(a, str) else a
+    b = Recording.load(b) if isinstance(b, str) else b
+    out = []
+    for channel in sorted(set(a.channels()) | set(b.channels())):
+        sa = [c for ch, c in command_stream(a.of(channel), dedupe)]
+        sb = [c for ch, c in command_stream(b.of(channel), dedupe)]
+        if sa != sb:
+            out += [channel] + list(difflib.unified_diff(sa, sb, 'a', 'b', n=context, lineterm=''))
+    return out
@@ -0,0 +1,111 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   ScpiBatch.py
+@Time    :   2026/10/18 16:08:37
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+
+# 合并多条 SCPI 设置命令, 一次发送
+class ScpiBatch():
+    """collect commands and send them as few ';' joined messages
+
+    Commands whose header ends with one of merge (Siglent 'C1:BSWV') are
+    combined into one command carrying all their NAME,value pairs, a later
+    value of the same NAME replacing the earlier one.
+    """
+
+    def __init__(self, send, max_len=256, merge=('BSWV',)) -> None:
+        """
+        :send: callable(message) writing one message to the instrument
+        :max_len: instrument input buffer limit, characters per message
+        :merge: header suffixes whose parameters are merged
+        """
+        self.send = send
+        self.max_len = max_len
+        self.merge = tuple(merge)
+        self.commands = []
+        self._merged = {}       # header -> 参数字典 (在 commands 中的同一对象)
+
+    def __len__(self):
+        return len(self.commands)
+
+    def add(self, command):
+        command = command.strip()
+        header, _, params = command.partition(' ')
+        if params and header.upper().endswith(self.merge):
+            pairs = self._merged.get(header.upper())
+            if pairs is None:
+                pairs = self._merged[header.upper()] = {}
+                self.commands.append((header, pairs))
+            items = [p.strip() for p in params.split(',')]
+            for name, value in zip(items[0::2], items[1::2]):
+                pairs[name.upper()] = (name, value)
+            return
+        self.commands.append(command)
+
+    def _render(self, command):
+        if isinstance(command, tuple):
+            header, pairs = command
+            return '%s %s' % (header, ','.join('%s,%s' % nv for nv in pairs.values()))
+        return command
+
+    def messages(self):
+        """the queued commands as messages no longer than max_len"""
+        msgs, cur = [], []
+        size = 0
+        for command in map(self._render, self.commands):
+            # 拼接后每条命令从根路径开始解析
+            rooted = command if command[0] in ':*' else ':' + command
+            if cur and size + 1 + len(rooted) > self.max_len:
+                msgs.append(cur)
+                cur, size = [], 0
+            size += len(rooted) + (1 if cur else 0)
+            cur.append((command, rooted))
+        if cur:
+            msgs.append(cur)
+        return [parts[0][0] if len(parts) == 1 else ';'.join(r for c, r in parts) for parts in msgs]
+
+    def take(self):
+        """the queued messages, the queue is cleared without sending"""
+        msgs = self.messages()
+        self.commands = []
+        self._merged = {}
+        return msgs
+
+    def flush(self):
+        """send and clear the queue, return the number of messages sent"""
+        msgs = self.take()
+        for msg in msgs:
+            self.send(msg)
+        return len(msgs)
+
+
+# vxi11 会话代理: write 进入队列, 其他操作前先发送队列
+class BatchSession():
+    trace_passthrough = True    # 实际收发由被代理的会话记录
+
+    def __init__(self, session, batch) -> None:
+        self.session = session
+        self.batch = batch
+
+    def write(self, message, encoding='utf-8'):
+        if isinstance(message, (list, tuple)):
+            for m in message:
+                self.batch.add(m)
+        else:
+            self.batch.add(message)
+
+    def __getattr__(self, name):
+        self.batch.flush()
+        return getattr(self.session, name)
+
+    def __setattr__(self, name, value):
+        if name in ('session', 'batch'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.session, name, value)
@@ -0,0 +1,98 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   SerialLink.py
+@Time    :   2026/10/18 09:12:40
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import threading
+import time
+from .Trace import tracer
+from .LazyImport import lazy_import
+
+serial = lazy_import('serial', 'pyserial')
+
+
+# 串口命令/应答收发, 按结束符分帧
+class SerialLink():
+    """write a command, then read the reply up to its terminator
+
+    Replaces the write -> time.sleep -> read(in_waiting) pattern: the reply
+    is returned as soon as the terminator arrives, and a reply that is not
+    complete by the deadline raises instead of being returned half read.
+    """
+
+    def __init__(self, session, eol=b'\r\n', term=b'\n', timeout=1.0, encoding='ascii', name=None) -> None:
+        """
+        :session: opened serial.Serial
+        :eol: terminator appended to every command
+        :term: reply terminator, b'\\n' also frames b'\\r\\n' replies
+        :timeout: default reply deadline, s
+        :encoding: reply encoding, e.g. 'gbk' for GW Instek
+        :name: instrument name for tracing, the port is appended
+        """
+        self.session = session
+        self.name = '%s@%s' % (name or 'serial', getattr(session, 'port', '?'))
+        self.eol = eol
+        self.term = term
+        self.timeout = timeout
+        self.encoding = encoding
+        self.lock = threading.RLock()
+
+    def _send(self, cmd):
+        if isinstance(cmd, str):
+            cmd = cmd.encode(self.encoding)
+        if not cmd.endswith(self.eol):
+            cmd = cmd.rstrip(b'\r\n') + self.eol
+        with self.lock:
+            self.session.write(cmd)
+
+    def write(self, cmd):
+        """send one command, the terminator is appended if missing"""
+        if not tracer.enabled:
+            return self._send(cmd)
+        start = time.perf_counter()
+        self._send(cmd)
+        tracer.record('serial', self.name, 'write', cmd, start, time.perf_counter())
+
+    def write_raw(self, data: bytes):
+        """send bytes exactly as given"""
+        start = time.perf_counter()
+        with self.lock:
+            self.session.write(data)
+        if tracer.enabled:
+            tracer.record('serial', self.name, 'write_raw', data, start, time.perf_counter())
+
+    def readline(self, timeout=None):
+        """read one reply line (terminator included) before the deadline"""
+        timeout = self.timeout if timeout is None else timeout
+        with self.lock:
+            if self.session.timeout != timeout:
+                self.session.timeout = timeout
+            # read_until 的超时是整行的截止时间, 不是单字节的
+            line = self.session.read_until(self.term)
+        if not line.endswith(self.term):
+            raise serial.SerialTimeoutException(
+                'no complete reply within %.3f s, got %r' % (timeout, line))
+        return line
+
+    def query(self, cmd, timeout=None):
+        """send a command and return its reply without the terminator"""
+        start = time.perf_counter()
+        try:
+            with self.lock:
+                # 丢弃上一条命令残留的应答
+                self.session.reset_input_buffer()
+                self._send(cmd)
+                line = self.readline(timeout)
+        except Exception as e:
+            if tracer.enabled:
+                tracer.record('serial', self.name, 'query', cmd, start, time.perf_counter(), None, type(e).__name__)
+            raise
+        if tracer.enabled:
+            tracer.record('serial', self.name, 'query', cmd, start, time.perf_counter(), len(line))
+        return line.decode(self.encoding).rstrip('\r\n')
@@ -0,0 +1,77 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   StateShadow.py
+@Time    :   2026/10/18 11:20:54
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+
+_MISSING = object()
+
+
+# 仪器配置影子, 记录最后一次写入的设置值
+class StateShadow():
+    """last written value of each instrument setting
+
+    Assumes the instrument is only configured through this object: a front
+    panel change is not seen, call invalidate() after one.
+    """
+
+    def __init__(self) -> None:
+        self.values = {}
+        self.enabled = True     # False: 不跳过任何写入, 不从缓存应答
+
+    def same(self, key, value):
+        """True if key is known to already hold value"""
+        return self.enabled and self.values.get(key, _MISSING) == value
+
+    def get(self, key, default=None):
+        if not self.enabled:
+            return default
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+    def invalidate(self, *keys):
+        """forget the given keys, or everything when called without keys"""
+        if not keys:
+            self.values.clear()
+        for key in keys:
+            self.values.pop(key, None)
+
+    def write(self, send, command, key, value):
+        """send(command) unless key already holds value
+
+        :key, value: lists of keys and values for a command setting several
+                     values at once, sent unless every key holds its value
+        :return: True if the command was sent
+        """
+        keys, values = (key, value) if isinstance(key, list) else ([key], [value])
+        if all(self.same(k, v) for k, v in zip(keys, values)):
+            return False
+        try:
+            send(command)
+        except Exception:
+            # 写入失败后仪器状态未知
+            self.invalidate()
+            raise
+        self.values.update(zip(keys, values))
+        return True
+
+    async def write_async(self, send, command, key, value):
+        """write() with a coroutine send, for the asyncio drivers"""
+        keys, values = (key, value) if isinstance(key, list) else ([key], [value])
+        if all(self.same(k, v) for k, v in zip(keys, values)):
+            return False
+        try:
+            await send(command)
+        except BaseException:
+            self.invalidate()
+            raise
+        self.values.update(zip(keys, values))
+        return True
@@ -0,0 +1,282 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   StreamLog.py
+@Time    :   2026/10/18 22:04:51
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import json
+import os
+import threading
+import time
+import numpy as np
+from .Trace import debugPrint
+
+
+class _Chunk():
+    __slots__ = ('data', 'fill', 'written')
+
+    def __init__(self, size, dtype) -> None:
+        self.data = np.zeros(size, dtype=dtype)
+        self.fill = 0           # 已填入的行
+        self.written = 0        # 已写入文件的行, 只由写线程修改
+
+
+# 流式采集记录
+class StreamLog():
+    """append samples to preallocated NumPy chunks, written to disk in the background
+
+        with StreamLog('run1', ['vout', 'iin', 'temp']) as log:
+            log.poll({'vout': dmm.measure_dc_voltage,
+                      'iin': (lambda: smu.get_curr(1), float),
+                      'temp': bath.read_current_temp}, period=1.0, count=86400)
+        data = StreamLog.load('run1')      # {'t': memmap, 'vout': memmap, ...}
+
+    Storage is one append-only raw file per column (<name>.bin) plus meta.json
+    (dtypes) and index.jsonl (first row, rows and time span of every write).
+    The writer thread also writes the partly filled chunk every interval
+    seconds, so a crash loses at most that much; on reopening, torn rows are
+    cut off. Memory is bounded by chunks * chunk rows: when every chunk is
+    waiting for the disk, append() blocks (block=True) or drops the sample.
+    """
+
+    def __init__(self, path, columns, chunk=4096, chunks=4, interval=1.0, block=True, fsync=True) -> None:
+        """
+        :path: directory, created or appended to
+        :columns: names (float64) or {name: dtype}; a float64 't' (time.time()) column is added first
+        :chunk: rows per chunk
+        :chunks: chunks in memory at most
+        :interval: s between background writes of the partial chunk
+        :block: True: append() waits for the writer when all chunks are full; False: drop
+        :fsync: fsync every write
+        """
+        if not isinstance(columns, dict):
+            columns = {name: 'f8' for name in columns}
+        self.dtype = np.dtype([('t', 'f8')] + [(n, np.dtype(d)) for n, d in columns.items() if n != 't'])
+        self.path = path
+        self.interval = interval
+        self.block = block
+        self.fsync = fsync
+        self.dropped = 0
+        self.rows = self._open(path)    # 文件中已有的行
+        self._free = [_Chunk(chunk, self.dtype) for _ in range(chunks - 1)]
+        self._full = []
+        self._cur = _Chunk(chunk, self.dtype)
+        self._cond = threading.Condition()
+        self._closing = False
+        self._error = None
+        self._thread = threading.Thread(target=self._writer, name='stream-log', daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open(self, path):
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, 'meta.json')
+        meta = {'columns': [[n, self.dtype[n].str] for n in self.dtype.names]}
+        if os.path.exists(meta_path):
+            with open(meta_path, encoding='utf-8') as f:
+                old = json.load(f)
+            if old['columns'] != meta['columns']:
+                raise ValueError('%s holds columns %s' % (path, old['columns']))
+        else:
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        rows = recover(path, self.dtype)
+        self._files = {n: open(os.path.join(path, n + '.bin'), 'ab') for n in self.dtype.names}
+        self._index = open(os.path.join(path, 'index.jsonl'), 'a', encoding='utf-8')
+        return rows
+
+    def append(self, *values, t=None, **named):
+        """add one row, values in column order (without t) or by name
+
+        :return: False if the row was dropped (block=False and no free chunk)
+        """
+        if self._error is not None:
+            raise self._error
+        with self._cond:
+            while self._cur is None:
+                if not self.block:
+                    self.dropped += 1
+                    return False
+                self._cond.wait()
+            chunk = self._cur
+            row = chunk.data[chunk.fill]
+            row['t'] = time.time() if t is None else t
+            for name, value in zip(self.dtype.names[1:], values):
+                row[name] = value
+            for name, value in named.items():
+                row[name] = value
+            chunk.fill += 1
+            if chunk.fill == len(chunk.data):
+                self._full.append(chunk)
+                self._cur = self._free.pop() if self._free else None
+                self._cond.notify_all()
+        return True
+
+    def poll(self, readers, period=1.0, count=None, stop=None):
+        """sample readers every period seconds and append a row each time
+
+        :readers: {column: callable()} or {column: (callable(), parse)}, parse default float;
+                  a tuple of columns may take a parse returning a tuple, e.g.
+                  {('v', 'i', 'p'): (lambda: psu.GetChnnlAll(1), lambda s: map(float, s.split(',')))}
+        :count: rows to take, None until stop is set
+        :stop: threading.Event ending the loop
+        """
+        readers = [(name,) + (r if isinstance(r, tuple) else (r, float)) for name, r in readers.items()]
+        n = 0
+        next_t = time.monotonic()
+        while (count is None or n < count) and not (stop is not None and stop.is_set()):
+            t = time.time()
+            row = {}
+            for name, read, parse in readers:
+                value = parse(read())
+                if isinstance(name, tuple):
+                    row.update(zip(name, value))
+                else:
+                    row[name] = value
+            self.append(t=t, **row)
+            n += 1
+            next_t += period
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                if stop is not None:
+                    stop.wait(delay)
+                else:
+                    time.sleep(delay)
+        return n
+
+    def _write(self, chunk, start, stop):
+        data = chunk.data[start:stop]
+        for name, f in self._files.items():
+            f.write(np.ascontiguousarray(data[name]).tobytes())
+        for f in self._files.values():
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        # 数据落盘后再写索引
+        self._index.write(json.dumps({'row': self.rows, 'n': stop - start,
+                                      't0': float(data['t'][0]), 't1': float(data['t'][-1])}) + '\n')
+        self._index.flush()
+        self.rows += stop - start
+        chunk.written = stop
+
+    def _writer(self):
+        while True:
+            with self._cond:
+                if not self._full and not self._closing:
+                    self._cond.wait(self.interval)
+                jobs, self._full = self._full, []
+                cur = self._cur
+                fill = cur.fill if cur is not None else 0
+                closing = self._closing
+            try:
+                for chunk in jobs:
+                    if chunk.written < chunk.fill:
+                        self._write(chunk, chunk.written, chunk.fill)
+                if cur is not None and fill > cur.written:
+                    self._write(cur, cur.written, fill)
+            except Exception as e:
+                debugPrint('stream log: %s' % e)
+                self._error = e
+            with self._cond:
+                for chunk in jobs:
+                    chunk.fill = chunk.written = 0
+                    if self._cur is None:
+                        self._cur = chunk
+                    else:
+                        self._free.append(chunk)
+                self._cond.notify_all()
+                if closing and not self._full:
+                    return
+
+    def flush(self):
+        """wait until every appended row is on disk"""
+        with self._cond:
+            target = self.rows + sum(c.fill - c.written for c in self._full)
+            if self._cur is not None:
+                target += self._cur.fill - self._cur.written
+            self._cond.notify_all()
+        while self.rows < target and self._thread.is_alive():
+            if self._error is not None:
+                raise self._error
+            time.sleep(0.001)
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        self._thread.join()
+        for f in self._files.values():
+            f.close()
+        self._index.close()
+        if self._error is not None:
+            raise self._error
+
+    @staticmethod
+    def load(path, mmap=True):
+        """{column: array} of a log directory, memory mapped by default"""
+        with open(os.path.join(path, 'meta.json'), encoding='utf-8') as f:
+            dtype = np.dtype([(n, d) for n, d in json.load(f)['columns']])
+        rows = _rows(path, dtype)
+        out = {}
+        for name in dtype.names:
+            file = os.path.join(path, name + '.bin')
+            if mmap and rows:
+                out[name] = np.memmap(file, dtype=dtype[name], mode='r', shape=(rows,))
+            else:
+                out[name] = np.fromfile(file, dtype=dtype[name], count=rows)
+        return out
+
+    @staticmethod
+    def between(path, t0, t1):
+        """{column: array} of the rows with t0 <= t < t1, located through the index"""
+        first, last, indexed = None, None, 0
+        with open(os.path.join(path, 'index.jsonl'), encoding='utf-8') as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    break       # 崩溃时写了一半的索引行
+                indexed = e['row'] + e['n']
+                if e['t1'] >= t0 and e['t0'] < t1:
+                    first = e['row'] if first is None else first
+                    last = indexed
+        data = StreamLog.load(path)
+        rows = len(data['t'])
+        if rows > indexed:
+            # 数据已落盘但索引未写入的行
+            first = indexed if first is None else first
+            last = rows
+        if first is None:
+            return {n: a[:0] for n, a in data.items()}
+        t = data['t'][first:last]
+        keep = (t >= t0) & (t < t1)
+        return {n: np.asarray(a[first:last][keep]) for n, a in data.items()}
+
+
+def _rows(path, dtype):
+    sizes = []
+    for name in dtype.names:
+        file = os.path.join(path, name + '.bin')
+        sizes.append(os.path.getsize(file) // dtype[name].itemsize if os.path.exists(file) else 0)
+    return min(sizes)
+
+
+def recover(path, dtype):
+    """cut every column file to the rows complete in all columns, return the row count"""
+    rows = _rows(path, dtype)
+    for name in dtype.names:
+        file = os.path.join(path, name + '.bin')
+        if os.path.exists(file) and os.path.getsize(file) != rows * dtype[name].itemsize:
+            with open(file, 'r+b') as f:
+                f.truncate(rows * dtype[name].itemsize)
+    return rows
@@ -0,0 +1,169 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   SweepEngine.py
+@Time    :   2026/10/18 14:40:12
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .AsyncInstr import instrument_lock
+from .Trace import debugPrint
+
+
+class SweepError(Exception):
+    """a source or settle step failed; data holds the points measured before it
+
+    :data: the structured array of run(), rows from index on are NaN
+    :index: index of the point that could not be applied
+    """
+
+    def __init__(self, message, data, index) -> None:
+        super().__init__(message)
+        self.data = data
+        self.index = index
+
+
+def _locked(func):
+    # 同一台仪器的调用不并发, 绑定方法按其仪器对象加锁
+    driver = getattr(func, '__self__', None)
+    if driver is None:
+        return func
+    lock = instrument_lock(driver)
+
+    def call(*args):
+        with lock:
+            return func(*args)
+    return call
+
+
+# 参数扫描
+class Sweep():
+    """apply a grid of setpoints and sample all meters at every point
+
+        sweep = Sweep(grid={'vin': [3.0, 3.3, 3.6], 'iload': [0.1, 0.5, 1.0]},
+                      sources={'vin': lambda v: psu.voltSet(1, v),
+                               'iload': lambda i: load.setModeValue('CURR', i)},
+                      readers={'vout': dmm.measure_dc_voltage,
+                               'iin': (load.getInCur, float)},
+                      settle=0.05)
+        data = sweep.run()      # data['vout'][data['vin'] == 3.3]
+
+    Points are the product of the grid, last key varying fastest. A source
+    is only called when its value changes. Readers run concurrently on a
+    bounded thread pool; readers bound to the same instrument object are
+    serialized. Parsing of one point's replies overlaps with the settling
+    of the next point.
+
+    A failed reader (or parse) leaves NaN in its column and is listed in
+    sweep.errors as (index, name, exception); the sweep goes on. A failed
+    source or settle stops the sweep with SweepError, whose data holds the
+    points measured so far.
+    """
+
+    def __init__(self, grid, sources, readers, settle=None, workers=None, parallel_sources=False) -> None:
+        """
+        :grid: {name: values}, or a list of {name: value} points
+        :sources: {name: callable(value)}
+        :readers: {name: callable()} or {name: (callable(), parse)}, parse default float
+        :settle: None, seconds to sleep, or callable(point) that returns once settled
+        :workers: thread pool size, default one per reader
+        :parallel_sources: apply the sources changing at one point concurrently; only for
+                           sources on different instruments (bound methods of one driver
+                           object are still serialized, lambdas are not)
+        """
+        if isinstance(grid, dict):
+            names = list(grid)
+            self.points = [dict(zip(names, vals)) for vals in itertools.product(*grid.values())]
+        else:
+            self.points = [dict(p) for p in grid]
+        self.sources = {name: _locked(source) for name, source in sources.items()}
+        self.parallel_sources = parallel_sources
+        self.errors = []        # 上次 run() 中失败的读取: (index, name, exception)
+        self.readers = {}
+        for name, reader in readers.items():
+            read, parse = reader if isinstance(reader, tuple) else (reader, float)
+            self.readers[name] = (_locked(read), parse)
+        self.settle = settle
+        self.workers = workers or max(1, len(self.readers), len(self.sources) if parallel_sources else 1)
+
+    def dtype(self):
+        names = list(self.points[0]) if self.points else list(self.sources)
+        return np.dtype([(n, np.float64) for n in names] + [(n, np.float64) for n in self.readers])
+
+    def _apply(self, pool, point, last):
+        changed = [(name, value) for name, value in point.items() if last is None or last.get(name) != value]
+        if not self.parallel_sources or len(changed) < 2:
+            for name, value in changed:
+                self.sources[name](value)
+            return
+        # 各源同时设置, 全部完成后再等待稳定; 有失败时报告第一个
+        futures = [pool.submit(self.sources[name], value) for name, value in changed]
+        for f in futures:
+            f.exception()
+        for f in futures:
+            f.result()
+
+    def _wait(self, point):
+        if self.settle is None:
+            return
+        if callable(self.settle):
+            self.settle(point)
+        else:
+            time.sleep(self.settle)
+
+    def _failed(self, idx, name, e):
+        debugPrint('sweep point %d %s: %s: %s' % (idx, name, type(e).__name__, e))
+        self.errors.append((idx, name, e))
+
+    def _store(self, data, idx, point, futures):
+        row = data[idx]
+        for name, value in point.items():
+            row[name] = value
+        for name, f in futures.items():
+            try:
+                row[name] = self.readers[name][1](f.result())
+            except Exception as e:
+                # 读取或解析失败的点留 NaN, 其他读数照常保存
+                self._failed(idx, name, e)
+
+    def run(self, progress=None):
+        """run the sweep
+
+        :progress: callable(index, point), called after each point is sampled
+        :return: np structured array, one row per point
+        """
+        data = np.full(len(self.points), np.nan, dtype=self.dtype())
+        self.errors = []
+        last = None
+        pending = None
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sweep') as pool:
+            for idx, point in enumerate(self.points):
+                try:
+                    self._apply(pool, point, last)
+                    last = point
+                    # 仪器稳定期间解析上一个点的数据
+                    if pending is not None:
+                        self._store(data, *pending)
+                        pending = None
+                    self._wait(point)
+                except Exception as e:
+                    if pending is not None:
+                        self._store(data, *pending)
+                    raise SweepError('sweep stopped at point %d %s: %s: %s' % (
+                        idx, point, type(e).__name__, e), data, idx) from e
+                futures = {name: pool.submit(read) for name, (read, parse) in self.readers.items()}
+                for f in futures.values():
+                    f.exception()       # 等待本点读取完成, 错误在 _store() 中记录
+                pending = (idx, point, futures)
+                if progress is not None:
+                    progress(idx, point)
+            if pending is not None:
+                self._store(data, *pending)
+        return data
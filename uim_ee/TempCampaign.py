@@ -0,0 +1,380 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   TempCampaign.py
+@Time    :   2026/10/18 21:26:40
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from .TempMonitor import TempMonitor
+from .Trace import debugPrint
+
+
+# 温箱/油槽的升降温模型
+class ChamberModel():
+    """ramp time between setpoints from heating / cooling rates
+
+    Heating and cooling are asymmetric. With a scan rate (set_sr, assumed degC/min)
+    both are limited to it.
+    """
+
+    def __init__(self, heat=2.0, cool=1.0, soak=300.0, scan_rate=None) -> None:
+        """
+        :heat: degC/min heating rate
+        :cool: degC/min cooling rate
+        :soak: s from reaching the setpoint until settled
+        :scan_rate: degC/min set with set_sr(), None leaves the chamber setting
+        """
+        self.heat = heat
+        self.cool = cool
+        self.soak = soak
+        self.scan_rate = scan_rate
+
+    def rate(self, heating):
+        rate = self.heat if heating else self.cool
+        return rate if self.scan_rate is None else min(rate, self.scan_rate)
+
+    def ramp_time(self, start, stop):
+        """s to ramp from start to stop, without the soak"""
+        if stop == start:
+            return 0.0
+        return abs(stop - start) / self.rate(stop > start) * 60
+
+    def move_time(self, start, stop):
+        """s from set_temp(stop) at start until settled at stop"""
+        return self.ramp_time(start, stop) + self.soak
+
+    def update(self, start, stop, seconds, weight=0.5):
+        """learn from a measured move (ramp + soak seconds) between two setpoints"""
+        ramp = seconds - self.soak
+        if stop == start or ramp <= 0:
+            return
+        measured = abs(stop - start) / ramp * 60
+        if self.scan_rate is not None and measured >= self.scan_rate * 0.95:
+            return      # 受 scan rate 限制, 看不到真实速率
+        if stop > start:
+            self.heat += weight * (measured - self.heat)
+        else:
+            self.cool += weight * (measured - self.cool)
+
+    @classmethod
+    def from_history(cls, t, temp, soak=300.0, window=60.0, scan_rate=None):
+        """rates estimated from logged temperature (e.g. TempMonitor.history())
+
+        :window: s, slope estimation window
+        """
+        t = np.asarray(t, dtype=float)
+        temp = np.asarray(temp, dtype=float)
+        slopes = []
+        start = 0
+        for i in range(len(t)):
+            while t[i] - t[start] > window:
+                start += 1
+            if i - start >= 3 and t[i] - t[start] >= window / 2:
+                slopes.append(np.polyfit(t[start:i+1], temp[start:i+1], 1)[0] * 60)
+        slopes = np.array(slopes)
+        heat = slopes[slopes > 0.1]
+        cool = -slopes[slopes < -0.1]
+        model = cls(soak=soak, scan_rate=scan_rate)
+        if len(heat):
+            model.heat = float(np.percentile(heat, 90))
+        if len(cool):
+            model.cool = float(np.percentile(cool, 90))
+        return model
+
+
+def path_time(order, start, cost, end=None):
+    total, cur = 0.0, start
+    for temp in order:
+        total += cost(cur, temp)
+        cur = temp
+    if end is not None:
+        total += cost(cur, end)
+    return total
+
+
+def order_setpoints(setpoints, start, cost, end=None, exact=10):
+    """setpoint order with the least total cost(a, b) starting at start
+
+    :cost: callable(from, to) -> s, e.g. ChamberModel.move_time
+    :end: temperature to return to after the last point, None for no return
+    :exact: up to this many points the order is optimal (Held-Karp), above it
+            the best monotonic sweep is improved by moving single points
+    """
+    points = list(dict.fromkeys(setpoints))
+    n = len(points)
+    if n <= 1:
+        return points
+    if n <= exact:
+        return _held_karp(points, start, cost, end)
+    candidates = [sorted(points), sorted(points, reverse=True)]
+    best = min(candidates, key=lambda o: path_time(o, start, cost, end))
+    best_time = path_time(best, start, cost, end)
+    improved = True
+    while improved:
+        improved = False
+        for i, j in itertools.permutations(range(n), 2):
+            trial = best[:i] + best[i+1:]
+            trial.insert(j, best[i])
+            t = path_time(trial, start, cost, end)
+            if t < best_time - 1e-9:
+                best, best_time, improved = trial, t, True
+                break
+    return best
+
+
+def _held_karp(points, start, cost, end):
+    n = len(points)
+    c = [[cost(a, b) for b in points] for a in points]
+    best = {}                   # (mask, last) -> (time, prev)
+    for k in range(n):
+        best[(1 << k, k)] = (cost(start, points[k]), None)
+    for mask in range(1, 1 << n):
+        for last in range(n):
+            entry = best.get((mask, last))
+            if entry is None:
+                continue
+            for nxt in range(n):
+                if mask & (1 << nxt):
+                    continue
+                key = (mask | (1 << nxt), nxt)
+                t = entry[0] + c[last][nxt]
+                if key not in best or t < best[key][0]:
+                    best[key] = (t, last)
+    full = (1 << n) - 1
+    last = min(range(n), key=lambda k: best[(full, k)][0] + (0 if end is None else cost(points[k], end)))
+    order, mask = [], full
+    while last is not None:
+        order.append(points[last])
+        prev = best[(mask, last)][1]
+        mask &= ~(1 << last)
+        last = prev
+    return order[::-1]
+
+
+# 测试步骤
+class Step():
+    def __init__(self, func, duration=0.0, thermal=True, name=None) -> None:
+        """
+        :func: callable(chamber name, duts, temp)
+        :duration: s, estimate for the projected timeline
+        :thermal: True: runs at temperature after settling; False: runs after the
+                  point's thermal steps, overlapped with the ramp to the next point
+        """
+        self.func = func
+        self.duration = duration
+        self.thermal = thermal
+        self.name = name or getattr(func, '__name__', 'step')
+
+
+class Chamber():
+    def __init__(self, name, driver, model, duts=(), start=25.0, set_temp=None, monitor=None) -> None:
+        self.name = name
+        self.driver = driver
+        self.model = model
+        self.duts = duts
+        self.start = start
+        self.set_temp = set_temp
+        self.monitor = monitor or {}
+
+
+# 温度计划
+class Campaign():
+    """temperature campaign over one or more chambers
+
+        camp = Campaign()
+        camp.add_chamber('bath', ZCTB_400L('COM11'), ChamberModel(heat=2, cool=0.8, soak=600),
+                         duts=['U1', 'U2'])
+        camp.add_chamber('box', TEMP_BOX('COM10'), ChamberModel(heat=3, cool=1.5, soak=900),
+                         duts=['U3', 'U4'])
+        camp.add_step(measure_all, duration=300)                    # at temperature
+        camp.add_step(save_report, duration=200, thermal=False)     # during the next ramp
+        plan = camp.plan([25, -40, 85, 0, 125, 60])
+        print(plan.report())
+        results = plan.run()
+
+    Every chamber runs all setpoints for its own DUT groups, chambers in
+    parallel. Setpoints are ordered per chamber to minimise ramp time with
+    its model; after each move the model rates are updated from the measured
+    time. Settling is detected by TempMonitor, not waited out.
+    """
+
+    def __init__(self) -> None:
+        self.chambers = []
+        self.steps = []
+
+    def add_chamber(self, name, driver, model, duts=(), start=None, set_temp=None, **monitor):
+        """
+        :model: ChamberModel
+        :duts: DUT group passed to every step
+        :start: current temperature, None to read it from the chamber
+        :set_temp: callable(TempMonitor, temp), default monitor.set_temp(temp);
+                   e.g. ATS5XX: lambda mon, t: mon.set_temp(t, 0 if t > 25 else 2)
+        :monitor: TempMonitor arguments (band, hold, slope, period)
+        """
+        if start is None:
+            start = float(driver.read_current_temp())
+        self.chambers.append(Chamber(name, driver, model, duts, start, set_temp, monitor))
+
+    def add_step(self, func, duration=0.0, thermal=True, name=None):
+        self.steps.append(Step(func, duration, thermal, name))
+
+    def plan(self, setpoints, end=None, optimize=True):
+        """
+        :setpoints: list for all chambers, or {chamber name: list}
+        :end: temperature every chamber returns to at the end, None to stay
+        :optimize: False keeps the given order
+        """
+        orders = {}
+        for ch in self.chambers:
+            points = setpoints[ch.name] if isinstance(setpoints, dict) else setpoints
+            if optimize:
+                points = order_setpoints(points, ch.start, ch.model.move_time, end)
+            orders[ch.name] = list(points)
+        return Plan(self, orders, setpoints, end)
+
+
+class Plan():
+    def __init__(self, campaign, orders, given, end) -> None:
+        self.campaign = campaign
+        self.orders = orders
+        self.given = given
+        self.end = end
+        self.actual = []        # 执行记录 (chamber, kind, label, start, end)
+
+    def timeline(self, chamber=None):
+        """projected [(chamber, kind, label, start s, end s)]; kinds ramp, soak, step, overlap"""
+        entries = []
+        for ch in self.campaign.chambers:
+            if chamber is not None and ch.name != chamber:
+                continue
+            entries.extend(self._project(ch, self.orders[ch.name]))
+        return sorted(entries, key=lambda e: (e[3], e[0]))
+
+    def _project(self, ch, order):
+        thermal = [s for s in self.campaign.steps if s.thermal]
+        overlap = [s for s in self.campaign.steps if not s.thermal]
+        out = []
+        t, cur = 0.0, ch.start
+        bg_end = 0.0
+        for temp in order:
+            ramp = ch.model.ramp_time(cur, temp)
+            out.append((ch.name, 'ramp', '%g -> %g' % (cur, temp), t, t + ramp))
+            t += ramp
+            out.append((ch.name, 'soak', '%g' % temp, t, t + ch.model.soak))
+            t += ch.model.soak
+            # 后台步骤与下一次升降温重叠, 同一时间只有一组在跑
+            t = max(t, bg_end) if overlap else t
+            for s in thermal:
+                out.append((ch.name, 'step', '%s @ %g' % (s.name, temp), t, t + s.duration))
+                t += s.duration
+            bg = t
+            for s in overlap:
+                out.append((ch.name, 'overlap', '%s @ %g' % (s.name, temp), bg, bg + s.duration))
+                bg += s.duration
+            bg_end = bg
+            cur = temp
+        if self.end is not None:
+            ramp = ch.model.ramp_time(cur, self.end)
+            out.append((ch.name, 'ramp', '%g -> %g' % (cur, self.end), t, t + ramp))
+            t += ramp
+        return out
+
+    def total(self, chamber=None):
+        entries = self.timeline(chamber)
+        return max((e[4] for e in entries), default=0.0)
+
+    def report(self):
+        """projected timeline as text, with the as-given order for comparison"""
+        lines = []
+        for ch in self.campaign.chambers:
+            given = self.given[ch.name] if isinstance(self.given, dict) else self.given
+            planned = self.total(ch.name)
+            as_given = max((e[4] for e in self._project(ch, list(given))), default=0.0)
+            lines.append('%s: %s  %s (given order %s, saves %s)' % (
+                ch.name, ' -> '.join('%g' % p for p in self.orders[ch.name]),
+                _hms(planned), _hms(as_given), _hms(as_given - planned)))
+        lines.append('')
+        for name, kind, label, start, end in self.timeline():
+            lines.append('%8s %8s  %-8s %-7s %s' % (_hms(start), _hms(end), name, kind, label))
+        lines.append('total %s' % _hms(self.total()))
+        return '\n'.join(lines)
+
+    def run(self, timeout_factor=3.0):
+        """execute the plan, chambers in parallel
+
+        :timeout_factor: a move may take this many times its projection before failing
+        :return: {chamber name: [(temp, [step results])]}
+        """
+        t0 = time.monotonic()
+        with ThreadPoolExecutor(max_workers=len(self.campaign.chambers), thread_name_prefix='campaign') as pool:
+            futures = {ch.name: pool.submit(self._run_chamber, ch, t0, timeout_factor)
+                       for ch in self.campaign.chambers}
+            return {name: f.result() for name, f in futures.items()}
+
+    def _log(self, ch, kind, label, start, end, t0):
+        self.actual.append((ch.name, kind, label, start - t0, end - t0))
+
+    def _run_chamber(self, ch, t0, timeout_factor):
+        thermal = [s for s in self.campaign.steps if s.thermal]
+        overlap = [s for s in self.campaign.steps if not s.thermal]
+        results = []
+        if ch.model.scan_rate is not None and hasattr(ch.driver, 'set_sr'):
+            ch.driver.set_sr(ch.model.scan_rate)
+        mon = TempMonitor(ch.driver, **ch.monitor)
+        mon.track(ch.start)
+        points = self.orders[ch.name] + ([] if self.end is None else [self.end])
+        with mon, ThreadPoolExecutor(max_workers=1, thread_name_prefix='overlap-' + ch.name) as bg:
+            pending = None
+            cur = ch.start
+            for i, temp in enumerate(points):
+                start = time.monotonic()
+                if ch.set_temp is None:
+                    mon.set_temp(temp)
+                else:
+                    ch.set_temp(mon, temp)
+                limit = ch.model.move_time(cur, temp) * timeout_factor + mon.hold
+                if not mon.wait(limit):
+                    raise TimeoutError('%s: not settled at %g after %.0f s' % (ch.name, temp, limit))
+                now = time.monotonic()
+                self._log(ch, 'move', '%g -> %g' % (cur, temp), start, now, t0)
+                ch.model.update(cur, temp, now - start)
+                debugPrint('%s settled at %g in %.0f s' % (ch.name, temp, now - start))
+                cur = temp
+                if i >= len(self.orders[ch.name]):
+                    break       # 回到 end 温度, 不测试
+                if pending is not None:
+                    pending.result()
+                out = []
+                for s in thermal:
+                    start = time.monotonic()
+                    out.append(s.func(ch.name, ch.duts, temp))
+                    self._log(ch, 'step', '%s @ %g' % (s.name, temp), start, time.monotonic(), t0)
+                results.append((temp, out))
+                if overlap:
+                    pending = bg.submit(self._overlap, ch, overlap, temp, t0)
+            if pending is not None:
+                pending.result()
+        return results
+
+    def _overlap(self, ch, steps, temp, t0):
+        for s in steps:
+            start = time.monotonic()
+            s.func(ch.name, ch.duts, temp)
+            self._log(ch, 'overlap', '%s @ %g' % (s.name, temp), start, time.monotonic(), t0)
+
+
+def _hms(seconds):
+    seconds = int(round(seconds))
+    sign = '-' if seconds < 0 else ''
+    m, s = divmod(abs(seconds), 60)
+    h, m = divmod(m, 60)
+    return '%s%d:%02d:%02d' % (sign, h, m, s)
+
@@ -0,0 +1,271 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   TempMonitor.py
+@Time    :   2026/10/18 20:52:07
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import asyncio
+import math
+import threading
+import time
+import numpy as np
+from .AsyncInstr import instrument_lock
+from .Trace import debugPrint
+
+
+def fit_first_order(t, temp, setpoint=None, floor=0.0):
+    """fit temp(t) = final + (temp0 - final) * exp(-t / tau)
+
+    :setpoint: known final value, the fit is then a line through log|temp - setpoint|;
+               None estimates final too, from dT/dt = (final - T) / tau
+    :floor: samples closer than this to the setpoint (noise) are left out
+    :return: (tau s, final) or None when the samples do not show an approach
+    """
+    t = np.asarray(t, dtype=float)
+    temp = np.asarray(temp, dtype=float)
+    if len(t) < 4 or t[-1] - t[0] <= 0:
+        return None
+    if setpoint is not None:
+        err = np.abs(temp - setpoint)
+        keep = err > max(floor, 1e-6)
+        if keep.sum() < 4:
+            return None
+        slope = np.polyfit(t[keep], np.log(err[keep]), 1)[0]
+        if slope >= 0:
+            return None
+        return -1.0 / slope, float(setpoint)
+    # 按四段平均求导, 抑制噪声
+    n = len(t) // 4 * 4
+    if n < 8:
+        return None
+    tm = t[-n:].reshape(4, -1).mean(axis=1)
+    vm = temp[-n:].reshape(4, -1).mean(axis=1)
+    dvdt = np.diff(vm) / np.diff(tm)
+    mid = (vm[1:] + vm[:-1]) / 2
+    a, b = np.polyfit(mid, dvdt, 1)     # dT/dt = a*T + b, a = -1/tau
+    if a >= 0:
+        return None
+    # 段间差分对指数曲线偏小: a = -2/dt * tanh(dt / 2tau), 按此还原 tau
+    dt = float(np.mean(np.diff(tm)))
+    x = -a * dt / 2
+    tau = dt / (2 * math.atanh(x)) if x < 1 else -1.0 / a
+    return tau, float(-b / a)
+
+
+# 温度稳定监视
+class TempMonitor():
+    """sample a chamber / bath temperature in the background and detect settling
+
+        mon = TempMonitor(ZCTB_400L('COM11'), band=0.2, hold=60)
+        mon.start()
+        mon.set_temp(85)                # 或 chamber.set_temp(85); mon.track(85)
+        print(mon.predict())            # 预计还需多少秒稳定
+        mon.wait(timeout=3600)          # 阻塞; 或 await mon.wait_async(); 或 mon.on_settled(cb)
+
+    Settled: every sample of the last hold seconds lies within setpoint +- band
+    and the fitted slope over that window is below slope (degC per minute).
+    Works with ZCTB_400L, ZCTB, TEMP_BOX (read_current_temp / read_set_temp)
+    and ATS5XX (read_current_temp only, give the setpoint to track()).
+    """
+
+    def __init__(self, chamber, period=1.0, band=0.1, slope=0.05, hold=30.0, window=3600, fit=120.0) -> None:
+        """
+        :chamber: temperature driver with read_current_temp()
+        :period: s between samples
+        :band: degC, allowed distance to the setpoint
+        :slope: degC/min, allowed drift over the hold window
+        :hold: s the temperature has to stay in band
+        :window: samples kept in the rolling buffer
+        :fit: s of recent samples used for the time-to-settle prediction
+        """
+        self.chamber = chamber
+        self.period = period
+        self.band = band
+        self.slope = slope
+        self.hold = hold
+        self.fit = fit
+        self.setpoint = None
+        self.errors = 0
+        self._t = np.full(window, np.nan)
+        self._temp = np.full(window, np.nan)
+        self._n = 0                     # 已采样总数
+        self._lock = threading.Lock()
+        self._settled = threading.Event()
+        self._callbacks = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            if self.setpoint is None and hasattr(self.chamber, 'read_set_temp'):
+                self.track(float(self._call(self.chamber.read_set_temp)))
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='temp-monitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _call(self, func, *args):
+        # 与其他线程对同一仪器的访问串行
+        with instrument_lock(self.chamber):
+            return func(*args)
+
+    def set_temp(self, temp, *args):
+        """chamber.set_temp(...) and track the new setpoint; ATS5XX: set_temp(temp, state)"""
+        if args:
+            self._call(self.chamber.set_temp, *args, temp)
+        else:
+            self._call(self.chamber.set_temp, temp)
+        self.track(temp)
+
+    def track(self, setpoint):
+        """watch for settling at a new setpoint"""
+        with self._lock:
+            self.setpoint = float(setpoint)
+            self._settled.clear()
+
+    def sample(self):
+        """take one sample now"""
+        temp = float(self._call(self.chamber.read_current_temp))
+        now = time.monotonic()
+        with self._lock:
+            i = self._n % len(self._t)
+            self._t[i] = now
+            self._temp[i] = temp
+            self._n += 1
+        self._check()
+        return temp
+
+    def _run(self):
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                self.sample()
+            except Exception as e:
+                self.errors += 1
+                debugPrint('temp monitor: %s' % e)
+            self._stop.wait(max(0.0, self.period - (time.monotonic() - start)))
+
+    def history(self, seconds=None):
+        """(t, temp) arrays of the buffered samples, oldest first, t in time.monotonic()"""
+        with self._lock:
+            n = min(self._n, len(self._t))
+            i = self._n % len(self._t)
+            t = np.roll(self._t, -i)[-n:] if n == len(self._t) else self._t[:n].copy()
+            temp = np.roll(self._temp, -i)[-n:] if n == len(self._t) else self._temp[:n].copy()
+        if seconds is not None and n:
+            keep = t >= t[-1] - seconds
+            t, temp = t[keep], temp[keep]
+        return t, temp
+
+    @property
+    def temp(self):
+        """latest sample, None before the first one"""
+        t, temp = self.history(0)
+        return float(temp[-1]) if len(temp) else None
+
+    def drift(self, seconds=None):
+        """fitted slope over the last seconds (default hold), degC/min"""
+        t, temp = self.history(self.hold if seconds is None else seconds)
+        if len(t) < 2 or t[-1] == t[0]:
+            return None
+        return float(np.polyfit(t - t[0], temp, 1)[0] * 60)
+
+    def in_band(self):
+        t, temp = self.history(self.hold)
+        # 窗口内首尾样本相距至少 hold - 一个采样周期
+        if self.setpoint is None or not len(t) or t[-1] - t[0] < self.hold - 1.5 * self.period:
+            return False
+        if np.any(np.abs(temp - self.setpoint) > self.band):
+            return False
+        drift = self.drift()
+        return drift is not None and abs(drift) <= self.slope
+
+    def _check(self):
+        if self._settled.is_set() or not self.in_band():
+            return
+        self._settled.set()
+        for cb in list(self._callbacks):
+            try:
+                cb(self)
+            except Exception as e:
+                debugPrint('temp monitor callback: %s' % e)
+
+    @property
+    def settled(self):
+        return self._settled.is_set()
+
+    def on_settled(self, callback):
+        """callback(monitor) from the sampling thread, each time the setpoint is reached"""
+        self._callbacks.append(callback)
+        if self._settled.is_set():
+            callback(self)
+
+    def wait(self, timeout=None):
+        """block until settled, return False on timeout"""
+        return self._settled.wait(timeout)
+
+    async def wait_async(self, timeout=None):
+        """awaitable form of wait()"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._settled.wait, timeout)
+
+    def model(self):
+        """first-order fit (tau s, final degC) of the last fit seconds, or None"""
+        t, temp = self.history(self.fit)
+        if len(t) < 4:
+            return None
+        return fit_first_order(t - t[0], temp, self.setpoint, self.band / 4)
+
+    def predict(self):
+        """predicted seconds until settled (0 when settled), None if unknown
+
+        Time for the fitted first-order approach to come within half the band
+        of the setpoint, plus the hold time still to go; or, if later, for its
+        drift in the middle of the hold window to fall below slope.
+        """
+        if self.settled:
+            return 0.0
+        t, temp = self.history(self.hold)
+        if self.setpoint is None or not len(t):
+            return None
+        err = abs(float(temp[-1]) - self.setpoint)
+        drift = self.drift()
+        drifting = drift is not None and abs(drift) > self.slope
+        approach = 0.0
+        if err > self.band / 2 or drifting:
+            fitted = self.model()
+            if fitted is None:
+                return None
+            tau, final = fitted
+            if abs(final - self.setpoint) >= self.band / 2:
+                return math.inf     # 终值不在带内, 不会稳定
+            gap = abs(float(temp[-1]) - final)
+            if err > self.band / 2:
+                approach = tau * math.log(gap / (self.band / 2 - abs(final - self.setpoint)))
+            # 一阶过程的漂移为 gap / tau, 要在 hold 窗口中段降到 slope 以下
+            calm = self.slope / 60 * tau
+            if gap > calm:
+                return max(max(0.0, approach) + self.hold, tau * math.log(gap / calm) + self.hold / 2)
+        # 已在带内的时长可抵扣 hold
+        held = 0.0
+        inside = np.abs(temp - self.setpoint) <= self.band
+        if approach == 0.0 and inside[-1]:
+            out = np.nonzero(~inside)[0]
+            held = t[-1] - (t[out[-1] + 1] if len(out) else t[0])
+        return max(0.0, approach) + max(0.0, self.hold - held)
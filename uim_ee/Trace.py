@@ -0,0 +1,221 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   Trace.py
+@Time    :   2026/10/18 20:11:32
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+
+
+# 仪器 I/O 跟踪, 环形缓冲
+class Tracer():
+    """record every instrument transaction into a bounded ring buffer
+
+        from uim_ee.Trace import tracer
+        tracer.enable(only={'DP800', 'SDM3065'})
+        ...
+        tracer.to_chrome('run.json')     # chrome://tracing or ui.perfetto.dev
+
+    An event is (start, end, thread, transport, instrument, op, command,
+    nbytes, error); times are time.perf_counter() seconds. While disabled the
+    drivers skip tracing after one attribute check.
+    """
+
+    def __init__(self, capacity=100000) -> None:
+        self.enabled = False
+        self.echo = False       # 同时打印到控制台
+        self.only = None        # 仪器过滤: 类名或 '类名@地址'
+        self.events = deque(maxlen=capacity)
+        self._local = threading.local()
+
+    def enable(self, capacity=None, echo=False, only=None):
+        """
+        :capacity: ring buffer size in events, None keeps the current one
+        :echo: also print each event
+        :only: iterable of instrument names ('DP800' or 'DP800@192.168.12.119'), None for all
+        """
+        if capacity is not None and capacity != self.events.maxlen:
+            self.events = deque(self.events, maxlen=capacity)
+        self.echo = echo
+        self.only = None if only is None else set(only)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        self.events.clear()
+
+    def wanted(self, instrument):
+        if self.only is None:
+            return True
+        return instrument in self.only or instrument.split('@', 1)[0] in self.only
+
+    def record(self, transport, instrument, op, command, start, end, nbytes=None, error=None):
+        self._local.instrument = instrument
+        if not self.wanted(instrument):
+            return
+        if isinstance(command, (bytes, bytearray, memoryview)):
+            command = bytes(command[:200]).decode('latin-1')
+        elif command is not None:
+            command = str(command)[:200]
+        event = (start, end, threading.get_ident(), transport, instrument, op, command, nbytes, error)
+        self.events.append(event)
+        if self.echo:
+            print(format_event(event))
+
+    def note(self, msg):
+        """free text event, attributed to the last instrument used by this thread"""
+        instrument = getattr(self._local, 'instrument', '')
+        if not self.wanted(instrument):
+            return
+        t = time.perf_counter()
+        self.events.append((t, t, threading.get_ident(), 'log', instrument, 'log', str(msg)[:200], None, None))
+        if self.echo:
+            print(msg)
+
+    def snapshot(self):
+        """the recorded events as dicts, oldest first"""
+        keys = ('start', 'end', 'thread', 'transport', 'instrument', 'op', 'command', 'nbytes', 'error')
+        return [dict(zip(keys, e)) for e in list(self.events)]
+
+    def summary(self):
+        """{(instrument, op): [count, total seconds, bytes]}"""
+        out = {}
+        for start, end, tid, transport, instrument, op, command, nbytes, error in list(self.events):
+            s = out.setdefault((instrument, op), [0, 0.0, 0])
+            s[0] += 1
+            s[1] += end - start
+            s[2] += nbytes or 0
+        return out
+
+    def to_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=1)
+
+    def to_chrome(self, path):
+        """Chrome trace event format, one track per instrument"""
+        events = list(self.events)
+        t0 = events[0][0] if events else 0.0
+        tracks = {}
+        out = []
+        for start, end, tid, transport, instrument, op, command, nbytes, error in events:
+            track = tracks.get(instrument)
+            if track is None:
+                track = tracks[instrument] = len(tracks) + 1
+                out.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': track,
+                            'args': {'name': instrument or '?'}})
+            ev = {'name': op if command is None else '%s %s' % (op, command[:40]), 'cat': transport,
+                  'pid': 1, 'tid': track, 'ts': (start - t0) * 1e6,
+                  'args': {'command': command, 'nbytes': nbytes, 'thread': tid}}
+            if error is not None:
+                ev['args']['error'] = error
+            if end > start:
+                ev.update(ph='X', dur=(end - start) * 1e6)
+            else:
+                ev.update(ph='i', s='t')
+            out.append(ev)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': out, 'displayTimeUnit': 'ms'}, f)
+
+
+def format_event(event):
+    start, end, tid, transport, instrument, op, command, nbytes, error = event
+    return '%.6f %-6s %s %s %r %s%.3f ms%s' % (start, transport, instrument, op, command,
+                                              '' if nbytes is None else '%d B ' % nbytes,
+                                              (end - start) * 1e3, '' if error is None else ' ' + error)
+
+
+tracer = Tracer()
+
+
+def debugPrint(msg):
+    # 原 print 调试输出: 跟踪开启时记录, echo 时打印
+    if tracer.enabled:
+        tracer.note(msg)
+
+
+def _size(ret):
+    if isinstance(ret, (str, bytes, bytearray)):
+        return len(ret)
+    return getattr(ret, 'nbytes', None)
+
+
+def traced_call(transport, instrument, op, func, command=None):
+    """func wrapped so that every call is recorded"""
+    @functools.wraps(func)
+    def call(*args, **kwargs):
+        cmd = command if command is not None else (args[0] if args else None)
+        start = time.perf_counter()
+        try:
+            ret = func(*args, **kwargs)
+        except Exception as e:
+            tracer.record(transport, instrument, op, cmd, start, time.perf_counter(), None, type(e).__name__)
+            raise
+        tracer.record(transport, instrument, op, cmd, start, time.perf_counter(), _size(ret))
+        return ret
+    return call
+
+
+# 会话代理: 方法调用被记录, 属性读写透传
+class TracedProxy():
+    def __init__(self, target, transport, instrument) -> None:
+        object.__setattr__(self, '_target', target)
+        object.__setattr__(self, '_transport', transport)
+        object.__setattr__(self, '_instrument', instrument)
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        return traced_call(self._transport, self._instrument, name, attr)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+def _instrument_name(obj):
+    addr = getattr(obj, 'ipaddr', None) or getattr(obj, 'instr_id', None) or getattr(obj, 'url', None)
+    return type(obj).__name__ if addr is None else '%s@%s' % (type(obj).__name__, addr)
+
+
+class TracedAttr():
+    """descriptor for a driver's session attribute
+
+    Reads give the session itself while tracing is disabled, and a
+    TracedProxy of it while enabled. Objects with trace_passthrough = True
+    (ScpiBatch.BatchSession) are returned as they are: their real I/O goes
+    through the session they wrap.
+    """
+
+    def __init__(self, transport) -> None:
+        self.transport = transport
+
+    def __set_name__(self, owner, name):
+        self.slot = '_%s_value' % name
+        self.proxy_slot = '_%s_traced' % name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = obj.__dict__.get(self.slot)
+        if not tracer.enabled or value is None or getattr(value, 'trace_passthrough', False):
+            return value
+        proxy = obj.__dict__.get(self.proxy_slot)
+        if proxy is None or proxy._target is not value:
+            proxy = obj.__dict__[self.proxy_slot] = TracedProxy(value, self.transport, _instrument_name(obj))
+        return proxy
+
+    def __set__(self, obj, value):
+        if isinstance(value, TracedProxy):
+            value = value._target
+        obj.__dict__[self.slot] = value
@@ -0,0 +1,100 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   VxiInstr.py
+@Time    :   2026/10/18 13:11:02
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import contextlib
+from . import InstrProfile
+from .AsyncInstr import instrument_lock
+from .LinkPool import pool
+from .StateShadow import StateShadow
+from .ScpiBatch import ScpiBatch, BatchSession
+from .Trace import TracedAttr, debugPrint
+
+
+# vxi11 网口仪器的公共部分
+class VxiInstrument():
+    """common part of the LAN drivers
+
+        psu = DP800('192.168.12.119')                           # VXI-11
+        psu = DP800('192.168.12.119', transport='socket')       # SCPI 端口 5025
+        psu = DP800('TCPIP0::192.168.12.119::hislip0::INSTR')   # HiSLIP
+
+    The session is duck-typed as vxi11.Instrument whatever the transport.
+    """
+    batch_max_len = 256     # 单条消息最大长度
+    transport = None        # 默认传输: None/'vxi11', 'socket', 'hislip'
+    session = TracedAttr('vxi11')
+
+    def __init__(self, ipaddr, transport=None) -> None:
+        self.ipaddr = ipaddr
+        # 同一地址的驱动对象共用一条连接
+        self.session = pool.lan(ipaddr, transport or self.transport)
+        self.shadow = StateShadow()
+
+    @property
+    def profile(self):
+        """identity and capabilities (InstrProfile.Profile), *IDN? is queried once per address"""
+        return InstrProfile.profile(self.ipaddr, lambda command: self.session.ask(command))
+
+    def capability(self, name, default=None):
+        # 型号能力表 / 运行中学到的能力, 未知或查询失败时用 default
+        try:
+            return self.profile.get(name, default)
+        except Exception as e:
+            debugPrint('%s profile: %s' % (self.ipaddr, e))
+            return default
+
+    def learn(self, name, value):
+        # 记下运行中发现的型号能力 (如不支持的命令), 以后不再尝试
+        try:
+            InstrProfile.learn(self.profile, name, value)
+        except Exception as e:
+            debugPrint('%s profile: %s' % (self.ipaddr, e))
+
+    def waitOpc(self, timeout=10.0):
+        """block until all pending operations are complete (*OPC?)
+
+        :timeout: s, upper bound for the operation
+        """
+        # 连接共享时, 修改 timeout 到恢复之间不让其他线程插入
+        with instrument_lock(self):
+            old = self.session.timeout
+            self.session.timeout = max(old, timeout)
+            try:
+                self.session.ask('*OPC?')
+            except Exception:
+                self.shadow.invalidate()
+                raise
+            finally:
+                self.session.timeout = old
+
+    @contextlib.contextmanager
+    def batch(self):
+        """send the writes made inside the block as one ';' joined message
+
+            with dmm.batch():
+                dmm.configVolt('DC')
+                dmm.SampleCount(100)
+        """
+        if isinstance(self.session, BatchSession):
+            yield self.session.batch
+            return
+        session = self.session
+        batch = ScpiBatch(session.write, self.batch_max_len)
+        self.session = BatchSession(session, batch)
+        try:
+            yield batch
+            self.session = session
+            batch.flush()
+        except Exception:
+            self.shadow.invalidate()
+            raise
+        finally:
+            self.session = session
@@ -9,22 +9,23 @@
 
 # here put the import lib
 
-from tkinter import E
-import vxi11
-import serial
+# 平铺脚本 (python WaveGen.py / 在本目录 from WaveGen import ...): 同目录模块按 uim_ee 包导入
+if not __package__:
+    import os
+    import sys
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = 'uim_ee'
+
+from .VxiInstr import VxiInstrument
 import time
+from .Trace import debugPrint
+from .LazyImport import lazy_import
 
+serial = lazy_import('serial', 'pyserial')
 
-DEBUG = 1
-def debugPrint(msg):
-    if DEBUG:
-        print(msg)
 
 # 鼎阳的信号发生器
-class SDG6000X_E():
-    def __init__(self, ipaddr) -> None:
-        self.session = vxi11.Instrument(ipaddr)
-
+class SDG6000X_E(VxiInstrument):
     def getIDN(self):
         ret = self.session.ask('*IDN?')
         debugPrint(ret)
@@ -134,7 +135,7 @@ class SDG6000X_E():
         eg: wave650mv800mv30ms  local
         '''
         self.session.write('C%s:ARWV NAME,%s'%(chnnl,name))
-        print('C%s:ARWV NAME,''%s'''%(chnnl,name))
+        debugPrint('C%s:ARWV NAME,''%s'''%(chnnl,name))
 
         
     def GetARB(self,chnnl:int):
@@ -0,0 +1,38 @@
+# -*- encoding: utf-8 -*-
+'''
+@File    :   __init__.py
+@Time    :   2026/10/19 00:12:44
+@Author  :   feiyang.xie
+@Version :   1.0
+@Contact :   feiyang.xie@uim-solution.com
+'''
+
+# here put the import lib
+
+import importlib
+
+# uim_ee 仪器驱动
+#
+#     import uim_ee
+#     psu = uim_ee.DP800('192.168.12.119')        # 此时才导入 PwrSupply
+#     dmm = uim_ee.driver('Instruments.Keysight34461A')('IP:169.254.4.61')
+#
+# 导入包只加载本注册表; 驱动模块及其后端 (vxi11, pyvisa, pyserial, pyftdi,
+# numpy) 在首次使用时导入. 包内模块相对导入, 不修改 sys.path.
+
+from .Registry import DRIVERS, TOOLS, driver, drivers
+
+
+def __getattr__(name):
+    if name in DRIVERS:
+        value = driver(name)
+    elif name in TOOLS:
+        value = getattr(importlib.import_module('.' + TOOLS[name], __name__), name)
+    else:
+        raise AttributeError('module %r has no attribute %r' % (__name__, name))
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(DRIVERS) + list(TOOLS))